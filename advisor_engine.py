@@ -1,328 +1,474 @@
-# advisor_engine.py
-# Small Business Digital Transformation Advisor - Expert Rule Engine
-# Knowledge derived from McKinsey Digital Maturity Framework (2023),
-# Gartner IT Maturity Model (2024), and EU SME Digital Index (2023)
-
-class DigitalTransformationAdvisor:
-
-    def __init__(self, answers):
-        """
-        answers: dict with keys from 8 business profile questions + 25 rule questions
-        All values are 1 (Yes) or 0 (No)
-        Profile keys: company_size, budget_level, industry, years_operating
-        """
-        self.answers = answers
-        self.score = 0
-        self.max_score = 100
-        self.recommendations = []          # (priority, category, text)
-        self.rule_log = []                 # fired rule descriptions
-        self.category_scores = {}          # per-category breakdown
-        self.risk_flags = []               # risk assessment findings
-        self.critical_gaps = []            # must-fix items
-
-    # ─────────────────────────────────────────────
-    #  HELPER
-    # ─────────────────────────────────────────────
-
-    def _a(self, key):
-        return bool(self.answers.get(key, 0))
-
-    def _add_rule(self, rule_id, description, score_delta, category):
-        self.score += score_delta
-        self.category_scores[category] = self.category_scores.get(category, 0) + score_delta
-        self.rule_log.append({
-            "id": rule_id,
-            "description": description,
-            "points": score_delta,
-            "category": category
-        })
-
-    def _add_rec(self, priority, category, text):
-        """priority: Critical | Important | Optional"""
-        self.recommendations.append({
-            "priority": priority,
-            "category": category,
-            "text": text
-        })
-
-    # ─────────────────────────────────────────────
-    #  25 EXPERT RULES
-    # ─────────────────────────────────────────────
-
-    def apply_rules(self):
-        a = self._a
-
-        # ── INFRASTRUCTURE (Rules 1–5) ──────────────────────────────────
-
-        # Rule 1: Cloud adoption
-        if a("cloud"):
-            self._add_rule(1, "Cloud infrastructure adopted — scalability and remote access enabled.", 6, "Infrastructure")
-        else:
-            self._add_rule(1, "No cloud adoption — critical scalability gap identified.", 0, "Infrastructure")
-            self._add_rec("Critical", "Infrastructure",
-                "Migrate to cloud infrastructure (e.g. AWS, Azure, Google Cloud). "
-                "Even a free-tier start reduces hardware costs and improves resilience.")
-            self.critical_gaps.append("Cloud Infrastructure")
-
-        # Rule 2: Cybersecurity practices
-        if a("security"):
-            self._add_rule(2, "Active cybersecurity measures — operational risk is controlled.", 6, "Infrastructure")
-        else:
-            self._add_rule(2, "No cybersecurity — high risk of data breach and legal liability.", 0, "Infrastructure")
-            self._add_rec("Critical", "Infrastructure",
-                "Implement cybersecurity baseline: firewall, endpoint protection, MFA, "
-                "and regular security audits. GDPR non-compliance can result in heavy fines.")
-            self.risk_flags.append("Cybersecurity Gap — HIGH RISK")
-            self.critical_gaps.append("Cybersecurity")
-
-        # Rule 3: Automated backup systems
-        if a("backup"):
-            self._add_rule(3, "Automated backups maintained — data loss risk minimised.", 4, "Infrastructure")
-        else:
-            self._add_rule(3, "No backup system — data loss risk is significant.", 0, "Infrastructure")
-            self._add_rec("Critical", "Infrastructure",
-                "Set up automated daily backups using cloud storage (e.g. Backblaze, AWS S3). "
-                "Data loss can permanently cripple a small business.")
-            self.risk_flags.append("No Backup System — DATA LOSS RISK")
-
-        # Rule 4: Cloud + Security compound rule
-        if a("cloud") and a("security"):
-            self._add_rule(4, "Cloud AND Security active — infrastructure maturity is strong. Bonus awarded.", 4, "Infrastructure")
-        elif not a("cloud") and not a("security"):
-            self._add_rule(4, "Neither cloud nor security implemented — infrastructure critically underdeveloped.", 0, "Infrastructure")
-            self.risk_flags.append("Infrastructure foundations completely absent")
-
-        # Rule 5: Mobile access to systems
-        if a("mobile_access"):
-            self._add_rule(5, "Mobile-accessible systems — workforce flexibility supported.", 3, "Infrastructure")
-        else:
-            self._add_rule(5, "No mobile access — workforce agility is restricted.", 0, "Infrastructure")
-            self._add_rec("Important", "Infrastructure",
-                "Enable mobile access to key business systems. "
-                "Remote and field teams require mobile-ready tools to remain productive.")
-
-        # ── DATA & INTELLIGENCE (Rules 6–9) ─────────────────────────────
-
-        # Rule 6: Data analytics usage
-        if a("analytics"):
-            self._add_rule(6, "Data analytics in use — decisions are evidence-based.", 5, "Data & Intelligence")
-        else:
-            self._add_rule(6, "No analytics — decisions are likely based on intuition, reducing accuracy.", 0, "Data & Intelligence")
-            self._add_rec("Important", "Data & Intelligence",
-                "Adopt business intelligence tools (e.g. Google Looker Studio, Power BI). "
-                "Data-driven decisions improve revenue by up to 23% (McKinsey, 2023).")
-
-        # Rule 7: Centralised data management
-        if a("data_management"):
-            self._add_rule(7, "Centralised data management — data accessibility and quality are ensured.", 4, "Data & Intelligence")
-        else:
-            self._add_rule(7, "Data is siloed — inconsistency and duplication likely.", 0, "Data & Intelligence")
-            self._add_rec("Important", "Data & Intelligence",
-                "Implement a centralised data warehouse or cloud database. "
-                "Data silos prevent analytics and slow operational decisions.")
-
-        # Rule 8: Performance tracking tools
-        if a("performance_tracking"):
-            self._add_rule(8, "Digital performance tracking active — KPIs are visible and actionable.", 3, "Data & Intelligence")
-        else:
-            self._add_rule(8, "No performance tracking — business health is not measurable.", 0, "Data & Intelligence")
-            self._add_rec("Important", "Data & Intelligence",
-                "Deploy KPI dashboards to track sales, customer satisfaction, and operational metrics in real time.")
-
-        # Rule 9: Analytics + Data Management compound
-        if a("analytics") and a("data_management"):
-            self._add_rule(9, "Analytics AND centralised data both present — full data intelligence capability achieved.", 4, "Data & Intelligence")
-
-        # ── AUTOMATION & AI (Rules 10–13) ────────────────────────────────
-
-        # Rule 10: Business process automation
-        if a("automation"):
-            self._add_rule(10, "Process automation adopted — manual workload significantly reduced.", 5, "Automation & AI")
-        else:
-            self._add_rule(10, "No automation — staff are overloaded with repetitive tasks.", 0, "Automation & AI")
-            self._add_rec("Important", "Automation & AI",
-                "Automate repetitive workflows using tools like Zapier or Microsoft Power Automate. "
-                "SMEs recover 20+ hours/week through basic automation.")
-
-        # Rule 11: AI in operations
-        if a("ai_tools"):
-            self._add_rule(11, "AI tools in operations — predictive capability and efficiency enhanced.", 5, "Automation & AI")
-        else:
-            self._add_rule(11, "No AI adoption — competitive disadvantage growing as AI becomes standard.", 0, "Automation & AI")
-            self._add_rec("Optional", "Automation & AI",
-                "Explore AI tools for customer service (chatbots), inventory prediction, or marketing automation. "
-                "Many are affordable for SMEs (e.g. HubSpot AI, Tidio).")
-
-        # Rule 12: Automation + AI compound — high maturity signal
-        if a("automation") and a("ai_tools"):
-            self._add_rule(12, "Automation AND AI both implemented — highest operational efficiency tier reached.", 5, "Automation & AI")
-
-        # Rule 13: Agile methodologies used
-        if a("agile"):
-            self._add_rule(13, "Agile methods adopted — adaptability and project delivery speed improved.", 3, "Automation & AI")
-        else:
-            self._add_rec("Optional", "Automation & AI",
-                "Adopt agile project management (Scrum or Kanban) to improve team responsiveness and delivery cycles.")
-
-        # ── CUSTOMER & MARKET (Rules 14–17) ──────────────────────────────
-
-        # Rule 14: CRM system
-        if a("crm"):
-            self._add_rule(14, "CRM system in use — customer relationships are systematically managed.", 5, "Customer & Market")
-        else:
-            self._add_rule(14, "No CRM — customer data is likely scattered, losing revenue opportunities.", 0, "Customer & Market")
-            self._add_rec("Critical", "Customer & Market",
-                "Implement a CRM system (e.g. HubSpot Free, Zoho CRM). "
-                "CRM adoption increases customer retention by up to 27% (Gartner, 2024).")
-            self.critical_gaps.append("CRM System")
-
-        # Rule 15: Digital customer platform/portal
-        if a("customer_platform"):
-            self._add_rule(15, "Digital customer platform active — customer accessibility enhanced.", 4, "Customer & Market")
-        else:
-            self._add_rule(15, "No digital customer channel — customer experience is limited to offline.", 0, "Customer & Market")
-            self._add_rec("Important", "Customer & Market",
-                "Build a customer-facing digital portal or website with self-service capability.")
-
-        # Rule 16: Digital marketing
-        if a("digital_marketing"):
-            self._add_rule(16, "Digital marketing in use — customer reach is extended online.", 3, "Customer & Market")
-        else:
-            self._add_rule(16, "No digital marketing — growth potential is severely limited.", 0, "Customer & Market")
-            self._add_rec("Important", "Customer & Market",
-                "Invest in digital marketing: SEO, email campaigns, and social media. "
-                "Cost-effective tools include Mailchimp and Google Ads.")
-
-        # Rule 17: CRM + Digital Marketing compound — full customer lifecycle
-        if a("crm") and a("digital_marketing"):
-            self._add_rule(17, "CRM AND digital marketing combined — full customer acquisition-to-retention loop operational.", 4, "Customer & Market")
-
-        # ── STRATEGY & GOVERNANCE (Rules 18–21) ──────────────────────────
-
-        # Rule 18: Defined digital strategy
-        if a("strategy"):
-            self._add_rule(18, "Digital strategy defined — transformation has clear direction and milestones.", 5, "Strategy & Governance")
-        else:
-            self._add_rule(18, "No digital strategy — investment risks being wasted without direction.", 0, "Strategy & Governance")
-            self._add_rec("Critical", "Strategy & Governance",
-                "Develop a 12-month digital transformation roadmap. "
-                "Define goals, budget allocation, and success metrics before investing in tools.")
-            self.critical_gaps.append("Digital Strategy")
-
-        # Rule 19: Leadership support
-        if a("leadership"):
-            self._add_rule(19, "Leadership actively supports digital transformation — organisational alignment ensured.", 4, "Strategy & Governance")
-        else:
-            self._add_rule(19, "No leadership buy-in — transformation initiatives are likely to stall.", 0, "Strategy & Governance")
-            self._add_rec("Critical", "Strategy & Governance",
-                "Secure executive sponsorship for digital transformation. "
-                "Without leadership alignment, 70% of transformation programmes fail (McKinsey, 2023).")
-            self.risk_flags.append("No Leadership Buy-In — TRANSFORMATION RISK")
-
-        # Rule 20: IT governance defined
-        if a("governance"):
-            self._add_rule(20, "IT governance in place — technology investments are controlled and compliant.", 3, "Strategy & Governance")
-        else:
-            self._add_rec("Optional", "Strategy & Governance",
-                "Establish basic IT governance policies covering data privacy, software licensing, and access control.")
-
-        # Rule 21: Strategy + Leadership compound
-        if a("strategy") and a("leadership"):
-            self._add_rule(21, "Strategy AND leadership aligned — transformation success probability significantly elevated.", 4, "Strategy & Governance")
-
-        # ── PEOPLE & COLLABORATION (Rules 22–25) ─────────────────────────
-
-        # Rule 22: Employee digital training
-        if a("training"):
-            self._add_rule(22, "Digital training programme active — workforce capability continuously improving.", 4, "People & Collaboration")
-        else:
-            self._add_rule(22, "No digital training — tools adopted without skilled users will underperform.", 0, "People & Collaboration")
-            self._add_rec("Important", "People & Collaboration",
-                "Invest in structured digital skills training. "
-                "Platforms like Google Digital Garage and LinkedIn Learning offer free SME-focused courses.")
-
-        # Rule 23: Digital collaboration tools
-        if a("collaboration"):
-            self._add_rule(23, "Digital collaboration tools in use — team coordination and communication are efficient.", 3, "People & Collaboration")
-        else:
-            self._add_rule(23, "No collaboration tools — team efficiency is impaired.", 0, "People & Collaboration")
-            self._add_rec("Important", "People & Collaboration",
-                "Adopt collaboration platforms (e.g. Microsoft Teams, Slack, Notion) to improve team communication and productivity.")
-
-        # Rule 24: Remote work capability
-        if a("remote_work"):
-            self._add_rule(24, "Remote work infrastructure in place — business continuity is protected.", 3, "People & Collaboration")
-        else:
-            self._add_rec("Optional", "People & Collaboration",
-                "Enable remote working capability to attract talent and ensure business continuity during disruptions.")
-
-        # Rule 25: Training + Collaboration + Leadership — triple maturity compound rule
-        if a("training") and a("collaboration") and a("leadership"):
-            self._add_rule(25, "Training, Collaboration AND Leadership all present — people-led digital culture fully established. Maximum people maturity bonus awarded.", 5, "People & Collaboration")
-        elif a("training") and a("collaboration"):
-            self._add_rule(25, "Training and Collaboration present — strong people capability, but leadership alignment is still needed.", 2, "People & Collaboration")
-
-    # ─────────────────────────────────────────────
-    #  RISK ASSESSMENT
-    # ─────────────────────────────────────────────
-
-    def assess_risk(self):
-        critical_count = sum(1 for r in self.recommendations if r["priority"] == "Critical")
-
-        if critical_count >= 4:
-            risk_level = "HIGH"
-            risk_description = "Multiple critical gaps identified. Immediate action required to avoid operational and competitive risk."
-        elif critical_count >= 2:
-            risk_level = "MEDIUM"
-            risk_description = "Some critical weaknesses present. Address priority items within the next 6 months."
-        else:
-            risk_level = "LOW"
-            risk_description = "Organisation shows solid digital foundations. Focus on optimisation and innovation."
-
-        return risk_level, risk_description
-
-    # ─────────────────────────────────────────────
-    #  MATURITY LEVEL
-    # ─────────────────────────────────────────────
-
-    def get_maturity_level(self):
-        if self.score >= 72:
-            return "Advanced Digital Business", "#27ae60", 3
-        elif self.score >= 42:
-            return "Developing Digital Business", "#f39c12", 2
-        else:
-            return "Early Stage Digital Business", "#e74c3c", 1
-
-    # ─────────────────────────────────────────────
-    #  EVALUATE
-    # ─────────────────────────────────────────────
-
-    def evaluate(self):
-        self.apply_rules()
-
-        level, color, tier = self.get_maturity_level()
-        risk_level, risk_description = self.assess_risk()
-
-        # Normalise score to 100
-        raw_possible = 100
-        normalised = min(round((self.score / raw_possible) * 100), 100)
-
-        sorted_recs = sorted(
-            self.recommendations,
-            key=lambda r: {"Critical": 0, "Important": 1, "Optional": 2}[r["priority"]]
-        )
-
-        return {
-            "score": self.score,
-            "score_pct": normalised,
-            "level": level,
-            "level_color": color,
-            "tier": tier,
-            "risk_level": risk_level,
-            "risk_description": risk_description,
-            "risk_flags": self.risk_flags,
-            "critical_gaps": self.critical_gaps,
-            "recommendations": sorted_recs,
-            "rules_triggered": self.rule_log,
-            "category_scores": self.category_scores
-        }
\ No newline at end of file
+# advisor_engine.py
+# Small Business Digital Transformation Advisor - Expert Rule Engine
+# Knowledge derived from McKinsey Digital Maturity Framework (2023),
+# Gartner IT Maturity Model (2024), and EU SME Digital Index (2023)
+#
+# The rules themselves live in knowledge_base.py as data. They are compiled
+# once at import into a small set of lookup blocks (see RuleProgram), so that
+# forward chaining over the whole rule base costs one table read per block
+# rather than one Python branch per rule. The fired rules and recommendations
+# are turned back into evaluate() lists through decode tables built at the same
+# time, so a result is assembled without walking bits or sorting.
+
+import hashlib
+import json
+
+import instrumentation
+from instrumentation import stage
+from knowledge_base import (
+    CATEGORIES, MATURITY_LEVELS, PRIORITIES, QUESTION_KEYS, RISK_BANDS, RULES,
+)
+
+# ─────────────────────────────────────────────
+#  ANSWER ENCODING
+# ─────────────────────────────────────────────
+
+# Bit i of an answer mask is the Yes/No answer to QUESTION_KEYS[i].
+ANSWER_SPACE = 1 << len(QUESTION_KEYS)
+RISK_LEVELS = tuple(level for _, level, _ in reversed(RISK_BANDS))   # LOW, MEDIUM, HIGH
+
+
+def encode_answers(answers):
+    """Pack a {key: 0/1} answers dict into a 19-bit integer mask."""
+    mask = 0
+    for bit, key in enumerate(QUESTION_KEYS):
+        if answers.get(key, 0):
+            mask |= 1 << bit
+    return mask
+
+
+def decode_mask(mask):
+    """Inverse of encode_answers(): 19-bit mask -> {key: 0/1} answers dict."""
+    return {key: (mask >> bit) & 1 for bit, key in enumerate(QUESTION_KEYS)}
+
+
+def iter_bits(value):
+    """Yield the indices of the set bits of an int, lowest first."""
+    while value:
+        low = value & -value
+        yield low.bit_length() - 1
+        value ^= low
+
+
+def maturity_level(score):
+    """(level, colour, tier) for a total score."""
+    for threshold, level, color, tier in MATURITY_LEVELS:
+        if score >= threshold:
+            return level, color, tier
+    raise ValueError(f"no maturity level covers score {score}")
+
+
+def risk_band(critical_count):
+    """(risk_level, risk_description) for a number of Critical recommendations."""
+    for threshold, level, description in RISK_BANDS:
+        if critical_count >= threshold:
+            return level, description
+    raise ValueError(f"no risk band covers {critical_count} critical items")
+
+
+# ─────────────────────────────────────────────
+#  RULE COMPILER
+# ─────────────────────────────────────────────
+
+COMPILER_VERSION = 1
+MAX_BLOCK_BITS = 12     # widest contiguous answer slice folded into one lookup table
+DECODE_BITS = 8         # bitset slice turned into catalogue entries by one table read
+DECODE_MASK = (1 << DECODE_BITS) - 1
+
+
+def _decoded(tables, bits):
+    """Catalogue entries of a bitset, lowest bit first, read through decode tables."""
+    out = []
+    for table in tables:
+        out += table[bits & DECODE_MASK]
+        bits >>= DECODE_BITS
+    return out
+
+
+class RuleBlock:
+    """
+    A group of rules whose conditions only read answer bits in `bits`. The
+    block's table has one precomputed, lane-packed outcome per combination of
+    those bits; contiguous blocks are indexed with a shift and a mask.
+    """
+
+    def __init__(self, rules, bits, contiguous):
+        self.rules = rules
+        self.bits = tuple(bits)
+        self.contiguous = contiguous
+        self.shift = self.bits[0] if contiguous else None
+        self.care = sum(1 << b for b in self.bits)
+        self.entries = []      # per local index: (category points, fired, recs, flags, gaps)
+
+    def index(self, mask):
+        """Compressed local index of a full answer mask."""
+        if self.contiguous:
+            return (mask >> self.shift) & ((1 << len(self.bits)) - 1)
+        return sum(((mask >> b) & 1) << j for j, b in enumerate(self.bits))
+
+    def expand(self, local):
+        """Full answer mask with only this block's bits set from a local index."""
+        return sum(1 << b for j, b in enumerate(self.bits) if (local >> j) & 1)
+
+
+class RuleProgram:
+    """Compiled form of the knowledge base."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.rule_count = len(rules)
+        self.question_count = len(QUESTION_KEYS)
+        self.outcomes = []           # rule-trace entries, in program order
+        self.recommendations = []    # {"priority", "category", "text"}, in program order
+        self.risk_flags = []
+        self.critical_gaps = []
+        self.outcome_rule = []       # rule id of each outcome
+        self.dependents = {key: [] for key in QUESTION_KEYS}
+        self.category_max = dict.fromkeys(CATEGORIES, 0)
+
+        bit_of = {key: i for i, key in enumerate(QUESTION_KEYS)}
+        cat_of = {c: i for i, c in enumerate(CATEGORIES)}
+        compiled = []
+        for r in rules:
+            if r["category"] not in cat_of:
+                raise ValueError(f"Rule {r['id']}: unknown category {r['category']!r}")
+            branches, care = [], 0
+            for br in r["branches"]:
+                for key in br["yes"] + br["no"]:
+                    if key not in bit_of:
+                        raise ValueError(f"Rule {r['id']}: unknown answer key {key!r}")
+                    care |= 1 << bit_of[key]
+                    if r["id"] not in self.dependents[key]:
+                        self.dependents[key].append(r["id"])
+                if br["points"] < 0 or (br["points"] and br["description"] is None):
+                    raise ValueError(f"Rule {r['id']}: points need a non-negative value and a description")
+                out = [0, 0, 0, 0]
+                if br["description"] is not None:
+                    out[0] = 1 << len(self.outcomes)
+                    self.outcomes.append({"id": r["id"], "description": br["description"],
+                                          "points": br["points"], "category": r["category"]})
+                    self.outcome_rule.append(r["id"])
+                if br["rec"] is not None:
+                    priority, text = br["rec"]
+                    if priority not in PRIORITIES:
+                        raise ValueError(f"Rule {r['id']}: unknown priority {priority!r}")
+                    out[1] = 1 << len(self.recommendations)
+                    self.recommendations.append({"priority": priority, "category": r["category"], "text": text})
+                if br["risk_flag"] is not None:
+                    out[2] = 1 << len(self.risk_flags)
+                    self.risk_flags.append(br["risk_flag"])
+                if br["critical_gap"] is not None:
+                    out[3] = 1 << len(self.critical_gaps)
+                    self.critical_gaps.append(br["critical_gap"])
+                yes = sum(1 << bit_of[k] for k in br["yes"])
+                no = sum(1 << bit_of[k] for k in br["no"])
+                branches.append((yes, no, br["points"], out))
+            self.category_max[r["category"]] += max([b[2] for b in branches] + [0])
+            compiled.append((r, cat_of[r["category"]], care, branches))
+
+        self.max_score = sum(self.category_max.values())
+        self.score_pct = tuple(min(round(s * 100 / self.max_score), 100) if self.max_score else 0
+                               for s in range(self.max_score + 1))
+        self.critical_mask = sum(1 << i for i, rec in enumerate(self.recommendations)
+                                 if rec["priority"] == "Critical")
+        self._compiled = compiled
+        self.blocks = self._partition(compiled)
+        self._pack()
+        self._build_decoders()
+        self.version = self._fingerprint()
+
+    # ── compilation ──────────────────────────────────────────────────
+
+    @staticmethod
+    def _fire(item, mask):
+        """(category index, points, [fired, rec, flag, gap] bits) of the first matching branch, or None."""
+        _, cat, _, branches = item
+        for yes, no, points, out in branches:
+            if mask & yes == yes and not mask & no:
+                return cat, points, out
+        return None
+
+    def block_packed(self, index, mask):
+        """Packed contribution of block `index` for an answer mask, looked up as packed() does."""
+        shift, width, table = self._block_terms[index]
+        return table[(mask >> shift) & width] if shift is not None else table[mask & width]
+
+    def _partition(self, compiled):
+        """Greedily pack rules into contiguous bit windows of at most MAX_BLOCK_BITS."""
+        blocks, window, lo, hi = [], [], None, None
+
+        def close():
+            if window:
+                blocks.append((window[:], list(range(lo, hi + 1)), True))
+                window.clear()
+
+        spans = []
+        for item in compiled:
+            care = item[2]
+            bits = [b for b in range(len(QUESTION_KEYS)) if (care >> b) & 1]
+            spans.append((bits[0] if bits else 0, bits[-1] if bits else 0, bits, item))
+        for first, last, bits, item in sorted(spans, key=lambda s: (s[0], s[1])):
+            if last - first + 1 > MAX_BLOCK_BITS:
+                blocks.append(([item], bits, False))       # wide rule: its own sparse block
+                continue
+            if window and max(hi, last) - lo + 1 <= MAX_BLOCK_BITS:
+                hi = max(hi, last)
+            else:
+                close()
+                lo, hi = first, last
+            window.append(item)
+        close()
+
+        result = []
+        for items, bits, contiguous in blocks:
+            block = RuleBlock([it[0]["id"] for it in items], bits, contiguous)
+            for local in range(1 << len(block.bits)):
+                mask = block.expand(local)
+                cats = [0] * len(CATEGORIES)
+                bitsets = [0, 0, 0, 0]
+                for item in items:
+                    fired = self._fire(item, mask)
+                    if fired:
+                        cat, points, out = fired
+                        cats[cat] += points
+                        bitsets = [a | b for a, b in zip(bitsets, out)]
+                block.entries.append((tuple(cats), *bitsets))
+            result.append(block)
+        return result
+
+    def _pack(self):
+        """
+        Fold each table entry into one int: a score lane, one lane per category,
+        then the fired / recommendation / flag / gap bitsets. Blocks never share
+        rules, so summing entries across blocks sums every field independently.
+        The same packing gives every rule its own small contribution table,
+        which lets IncrementalAdvisor patch a total rule by rule.
+        """
+        lane = self.max_score.bit_length() or 1
+        self._lane = lane
+        self._lane_mask = (1 << lane) - 1
+        n = len(CATEGORIES)
+        self._cat_shifts = [lane * (i + 1) for i in range(n)]
+        self._tier_of = [maturity_level(s)[2] for s in range(self.max_score + 1)]
+        self._risk_of = [RISK_LEVELS.index(risk_band(c)[0]) for c in range(bin(self.critical_mask).count("1") + 1)]
+        self._fired_at = lane * (n + 1)
+        self._recs_at = self._fired_at + len(self.outcomes)
+        self._flags_at = self._recs_at + len(self.recommendations)
+        self._gaps_at = self._flags_at + len(self.risk_flags)
+
+        def pack(entry):
+            cats, fired, recs, flags, gaps = entry
+            v = sum(cats)
+            for i, c in enumerate(cats):
+                v |= c << (lane * (i + 1))
+            return (v | fired << self._fired_at | recs << self._recs_at
+                    | flags << self._flags_at | gaps << self._gaps_at)
+
+        self._windows = []
+        self._sparse = []
+        self._block_terms = []                # per block, as packed() reads it: (shift or None, width or care, table)
+        for block in self.blocks:
+            packed = [pack(e) for e in block.entries]
+            if block.contiguous:
+                self._windows.append((block.shift, (1 << len(block.bits)) - 1, packed))
+                self._block_terms.append(self._windows[-1])
+            else:
+                self._sparse.append((block.care, {block.expand(i): v for i, v in enumerate(packed)}))
+                self._block_terms.append((None,) + self._sparse[-1])
+
+        # Per-rule contribution tables keyed by (mask & care)
+        self.rule_tables = []
+        for item in self._compiled:
+            care = item[2]
+            table, sub = {}, care
+            while True:                       # every subset of the care bits
+                fired = self._fire(item, sub)
+                cats = [0] * n
+                bitsets = [0, 0, 0, 0]
+                if fired:
+                    cat, points, bitsets = fired
+                    cats[cat] = points
+                table[sub] = pack((cats, *bitsets))
+                if not sub:
+                    break
+                sub = (sub - 1) & care
+            self.rule_tables.append((care, table))
+
+    def _build_decoders(self):
+        """
+        Tables that turn run()'s bitsets back into catalogue entries without
+        walking bits: entry v of a slice's table holds the entries whose bits
+        in that slice are set in v. Outcome entries also carry their category
+        indices in first-fired order; recommendation entries are split by
+        priority, so concatenating them gives evaluate()'s priority order.
+        """
+        cat_of = {c: i for i, c in enumerate(CATEGORIES)}
+        rank = {p: i for i, p in enumerate(PRIORITIES)}
+
+        def tables(items, empty=(), prepend=lambda item, rest: (item,) + rest):
+            result = []
+            for start in range(0, len(items), DECODE_BITS):
+                part = items[start:start + DECODE_BITS]
+                table = [empty]
+                for v in range(1, 1 << len(part)):      # v = its lowest bit + an entry already built
+                    low = v & -v
+                    table.append(prepend(part[low.bit_length() - 1], table[v ^ low]))
+                result.append(table)
+            return result
+
+        def with_category(outcome, rest):
+            cat = cat_of[outcome["category"]]
+            return (outcome,) + rest[0], (cat,) + tuple(c for c in rest[1] if c != cat)
+
+        def by_priority(rec, rest):
+            p = rank[rec["priority"]]
+            return rest[:p] + ((rec,) + rest[p],) + rest[p + 1:]
+
+        self._outcome_tables = tables(self.outcomes, ((), ()), with_category)
+        self._rec_tables = tables(self.recommendations, ((),) * len(PRIORITIES), by_priority)
+        self._flag_tables = tables(self.risk_flags)
+        self._gap_tables = tables(self.critical_gaps)
+        self.risks = [(lv, d) for level in RISK_LEVELS for _, lv, d in RISK_BANDS if lv == level]
+
+    def _fingerprint(self):
+        source = {
+            "compiler": COMPILER_VERSION, "questions": QUESTION_KEYS, "categories": CATEGORIES,
+            "rules": self.rules, "levels": MATURITY_LEVELS, "risk": RISK_BANDS,
+        }
+        blob = json.dumps(source, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    # ── evaluation ───────────────────────────────────────────────────
+
+    def run(self, mask):
+        """
+        Evaluate an answer mask. Returns
+        (score, tier, risk_index, category_scores, fired, recommendations, risk_flags, critical_gaps)
+        where risk_index indexes RISK_LEVELS, category scores follow CATEGORIES
+        and the last four fields are bitsets over this program's catalogues.
+        """
+        return self.unpack(self.packed(mask))
+
+    def packed(self, mask):
+        """Lane-packed sum of every rule's contribution for an answer mask."""
+        total = 0
+        for shift, width, table in self._windows:
+            total += table[(mask >> shift) & width]
+        for care, table in self._sparse:
+            total += table[mask & care]
+        return total
+
+    def decode(self, cats, fired, recs, flags, gaps):
+        """
+        The tail of a run() record as evaluate() fields: (rules_triggered,
+        recommendations in priority order, category_scores, risk_flags,
+        critical_gaps). The rule and recommendation dicts are fresh copies.
+        """
+        rule_log, order = [], []
+        for table in self._outcome_tables:
+            outcomes, categories = table[fired & DECODE_MASK]
+            rule_log += outcomes
+            order += categories
+            fired >>= DECODE_BITS
+        rule_log = [o.copy() for o in rule_log]
+        category_scores = {CATEGORIES[i]: cats[i] for i in dict.fromkeys(order)}
+        parts = []
+        for table in self._rec_tables:
+            parts.append(table[recs & DECODE_MASK])
+            recs >>= DECODE_BITS
+        recommendations = [r.copy() for p in range(len(PRIORITIES)) for part in parts for r in part[p]]
+        return (rule_log, recommendations, category_scores,
+                _decoded(self._flag_tables, flags), _decoded(self._gap_tables, gaps))
+
+    def unpack(self, total):
+        """Split a packed total into the run() record."""
+        lm = self._lane_mask
+        score = total & lm
+        cats = tuple([(total >> shift) & lm for shift in self._cat_shifts])
+        fired = (total >> self._fired_at) & ((1 << len(self.outcomes)) - 1)
+        recs = (total >> self._recs_at) & ((1 << len(self.recommendations)) - 1)
+        flags = (total >> self._flags_at) & ((1 << len(self.risk_flags)) - 1)
+        gaps = total >> self._gaps_at
+        return (score, self._tier_of[score], self._risk_of[bin(recs & self.critical_mask).count("1")],
+                cats, fired, recs, flags, gaps)
+
+
+PROGRAM = RuleProgram(RULES)
+
+
+class DigitalTransformationAdvisor:
+
+    def __init__(self, answers):
+        """
+        answers: dict with keys from 8 business profile questions + 25 rule questions
+        All values are 1 (Yes) or 0 (No)
+        Profile keys: company_size, budget_level, industry, years_operating
+        """
+        self.answers = answers
+        self.score = 0
+        self.max_score = PROGRAM.max_score
+        self.recommendations = []          # (priority, category, text), Critical first
+        self.rule_log = []                 # fired rule descriptions
+        self.category_scores = {}          # per-category breakdown
+        self.risk_flags = []               # risk assessment findings
+        self.critical_gaps = []            # must-fix items
+        self._risk = 0                     # RISK_LEVELS index, set by apply_rules()
+
+    # ─────────────────────────────────────────────
+    #  HELPER
+    # ─────────────────────────────────────────────
+
+    def _a(self, key):
+        return bool(self.answers.get(key, 0))
+
+    # ─────────────────────────────────────────────
+    #  EXPERT RULES (compiled from knowledge_base.RULES)
+    # ─────────────────────────────────────────────
+
+    def apply_rules(self):
+        self.score, _, self._risk, *record = PROGRAM.run(encode_answers(self.answers))
+        (self.rule_log, self.recommendations, self.category_scores,
+         self.risk_flags, self.critical_gaps) = PROGRAM.decode(*record)
+
+    # ─────────────────────────────────────────────
+    #  RISK ASSESSMENT
+    # ─────────────────────────────────────────────
+
+    def assess_risk(self):
+        return PROGRAM.risks[self._risk]
+
+    # ─────────────────────────────────────────────
+    #  MATURITY LEVEL
+    # ─────────────────────────────────────────────
+
+    def get_maturity_level(self):
+        return maturity_level(self.score)
+
+    # ─────────────────────────────────────────────
+    #  EVALUATE
+    # ─────────────────────────────────────────────
+
+    def evaluate(self):
+        if instrumentation.ENABLED:           # separate probe, outside the stage timers
+            instrumentation.probe_blocks(PROGRAM, encode_answers(self.answers))
+        with stage("engine.apply_rules"):
+            self.apply_rules()
+
+        with stage("engine.assess"):
+            level, color, tier = self.get_maturity_level()
+            risk_level, risk_description = self.assess_risk()
+
+        return {
+            "score": self.score,
+            "score_pct": PROGRAM.score_pct[self.score],
+            "level": level,
+            "level_color": color,
+            "tier": tier,
+            "risk_level": risk_level,
+            "risk_description": risk_description,
+            "risk_flags": self.risk_flags,
+            "critical_gaps": self.critical_gaps,
+            "recommendations": self.recommendations,
+            "rules_triggered": self.rule_log,
+            "category_scores": self.category_scores
+        }
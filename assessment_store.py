@@ -0,0 +1,417 @@
+# assessment_store.py
+# Persistent assessment store for the Digital Transformation Advisor
+#
+# Every completed analysis is saved to a local SQLite database: the business
+# profile, the answer bitmask, score, tier, risk level and the six category
+# scores. The database runs in WAL mode so readers never block the writer and
+# several app workers (processes) can write to the same file; each write is one
+# BEGIN IMMEDIATE transaction with busy-timeout retries.
+#
+# Writes are batched. save() only queues the row; a background thread drains
+# the queue every BATCH_WAIT seconds (or BATCH_MAX rows) and inserts the batch
+# with one executemany() over a cached prepared statement. In the same
+# transaction it updates cohort_daily, a rollup of counts and sums per day,
+# industry and company size. Cohort queries read that rollup, so they cost
+# O(days) rather than O(rows). Every combination of history() filters
+# (industry, company size, tier) has an index of those columns followed by
+# created_at, so a history query walks one index newest first and never sorts.
+#
+# The database is .data/assessments.db unless DTA_ASSESSMENT_DB names another
+# file (empty string: persistence disabled).
+#
+# Usage:  python assessment_store.py stats
+#         python assessment_store.py history [--industry X] [--size X] [--limit 20]
+#         python assessment_store.py cohort [--industry X] [--size X] [--days 30]
+#         python assessment_store.py bench [--rows 2000000] [--writers 4] [--db /tmp/bench.db]
+
+import argparse
+import atexit
+import contextlib
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from advisor_engine import ANSWER_SPACE, PROGRAM, RISK_LEVELS
+from knowledge_base import CATEGORIES, PROFILE_OPTIONS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(HERE, ".data", "assessments.db")
+SCHEMA_VERSION = 1
+
+BATCH_MAX = 500         # rows per transaction
+BATCH_WAIT = 0.05       # seconds the writer waits to fill a batch
+DAY = 86400
+
+CAT_COLUMNS = tuple("cat_" + re.sub(r"\W+", "_", c.lower()).strip("_") for c in CATEGORIES)
+ROW_COLUMNS = ("created_at", "company_size", "industry", "budget", "years",
+               "answers", "score", "tier", "risk") + CAT_COLUMNS
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS assessments (
+    id           INTEGER PRIMARY KEY,
+    created_at   REAL    NOT NULL,
+    company_size TEXT    NOT NULL,
+    industry     TEXT    NOT NULL,
+    budget       TEXT    NOT NULL,
+    years        TEXT    NOT NULL,
+    answers      INTEGER NOT NULL,
+    score        INTEGER NOT NULL,
+    tier         INTEGER NOT NULL,
+    risk         TEXT    NOT NULL,
+    {", ".join(f"{c} INTEGER NOT NULL" for c in CAT_COLUMNS)}
+);
+-- one index per combination of history() filters, each ending in created_at
+CREATE INDEX IF NOT EXISTS ix_assessments_time          ON assessments (created_at);
+CREATE INDEX IF NOT EXISTS ix_assessments_industry_only ON assessments (industry, created_at);
+CREATE INDEX IF NOT EXISTS ix_assessments_industry      ON assessments (industry, company_size, created_at);
+CREATE INDEX IF NOT EXISTS ix_assessments_size          ON assessments (company_size, created_at);
+CREATE INDEX IF NOT EXISTS ix_assessments_tier          ON assessments (tier, created_at);
+CREATE INDEX IF NOT EXISTS ix_assessments_industry_tier ON assessments (industry, tier, created_at);
+CREATE INDEX IF NOT EXISTS ix_assessments_size_tier     ON assessments (company_size, tier, created_at);
+CREATE INDEX IF NOT EXISTS ix_assessments_segment_tier  ON assessments (industry, company_size, tier, created_at);
+
+CREATE TABLE IF NOT EXISTS cohort_daily (
+    day          INTEGER NOT NULL,
+    industry     TEXT    NOT NULL,
+    company_size TEXT    NOT NULL,
+    n            INTEGER NOT NULL,
+    score_sum    INTEGER NOT NULL,
+    score_sq_sum INTEGER NOT NULL,
+    tier_1 INTEGER NOT NULL, tier_2 INTEGER NOT NULL, tier_3 INTEGER NOT NULL,
+    {", ".join(f"risk_{r.lower()} INTEGER NOT NULL" for r in RISK_LEVELS)},
+    {", ".join(f"{c} INTEGER NOT NULL" for c in CAT_COLUMNS)},
+    PRIMARY KEY (industry, company_size, day)
+) WITHOUT ROWID;
+"""
+
+_ROLLUP_COLUMNS = (("n", "score_sum", "score_sq_sum", "tier_1", "tier_2", "tier_3")
+                   + tuple(f"risk_{r.lower()}" for r in RISK_LEVELS) + CAT_COLUMNS)
+
+_INSERT = f"INSERT INTO assessments ({', '.join(ROW_COLUMNS)}) VALUES ({', '.join('?' * len(ROW_COLUMNS))})"
+_UPSERT = (f"INSERT INTO cohort_daily (day, industry, company_size, {', '.join(_ROLLUP_COLUMNS)}) "
+           f"VALUES ({', '.join('?' * (len(_ROLLUP_COLUMNS) + 3))}) "
+           f"ON CONFLICT (industry, company_size, day) DO UPDATE SET "
+           + ", ".join(f"{c} = {c} + excluded.{c}" for c in _ROLLUP_COLUMNS))
+
+
+def make_row(mask, company_size, industry, budget, years, created_at=None):
+    """Row tuple (ROW_COLUMNS order) for an answer mask and business profile."""
+    score, tier, risk, cats, *_ = PROGRAM.run(mask)
+    return (time.time() if created_at is None else created_at, company_size, industry, budget, years,
+            mask, score, tier, RISK_LEVELS[risk]) + tuple(cats)
+
+
+def _rollup(rows):
+    """Aggregate rows into cohort_daily upsert parameters."""
+    acc = {}
+    tier_at, risk_at = 3, 6
+    for row in rows:
+        created_at, size, industry, score, tier, risk = row[0], row[1], row[2], row[6], row[7], row[8]
+        key = (int(created_at // DAY), industry, size)
+        a = acc.get(key)
+        if a is None:
+            a = acc[key] = [0] * len(_ROLLUP_COLUMNS)
+        a[0] += 1
+        a[1] += score
+        a[2] += score * score
+        a[tier_at + tier - 1] += 1
+        a[risk_at + RISK_LEVELS.index(risk)] += 1
+        for i, v in enumerate(row[9:], risk_at + len(RISK_LEVELS)):
+            a[i] += v
+    return [key + tuple(a) for key, a in acc.items()]
+
+
+@contextlib.contextmanager
+def _transaction(conn):
+    conn.execute("BEGIN IMMEDIATE")     # take the write lock up front: no lock-upgrade deadlocks
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class AssessmentStore:
+
+    def __init__(self, path, batch_max=BATCH_MAX, batch_wait=BATCH_WAIT):
+        self.path = path
+        self.batch_max = batch_max
+        self.batch_wait = batch_wait
+        self._local = threading.local()     # one connection per thread
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.written = 0
+        self.write_errors = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with _transaction(conn):
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                raise RuntimeError(f"{path}: schema version {version}, expected {SCHEMA_VERSION}")
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")      # durable at checkpoints; safe with WAL
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.execute("PRAGMA cache_size=-65536")      # 64 MB: keeps the index pages hot
+            self._local.conn = conn
+        return conn
+
+    # ─────────────────────────────────────────────
+    #  WRITES
+    # ─────────────────────────────────────────────
+
+    def insert_many(self, rows):
+        """Insert make_row() tuples in one transaction (synchronous)."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        with _transaction(self._conn()) as conn:
+            conn.executemany(_INSERT, rows)
+            conn.executemany(_UPSERT, _rollup(rows))
+        self.written += len(rows)
+        return len(rows)
+
+    def save(self, mask, company_size, industry, budget, years):
+        """Queue one assessment for the background writer; returns immediately."""
+        self._start_writer()
+        self._queue.put(make_row(mask, company_size, industry, budget, years))
+
+    def flush(self):
+        """Block until every queued assessment has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _start_writer(self):
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="assessment-writer", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.flush)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_max:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self.insert_many(batch)
+            except sqlite3.Error as exc:
+                self.write_errors += len(batch)
+                print(f"assessment_store: dropped {len(batch)} rows: {exc}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    # ─────────────────────────────────────────────
+    #  QUERIES
+    # ─────────────────────────────────────────────
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM assessments").fetchone()[0]
+
+    def answer_counts(self):
+        """(answers, company_size, industry, count) for every distinct stored combination."""
+        return self._conn().execute(
+            "SELECT answers, company_size, industry, COUNT(*) FROM assessments GROUP BY 1, 2, 3")
+
+    def history(self, industry=None, company_size=None, tier=None, since=None, until=None, limit=50):
+        """Most recent assessments first, as dicts (category_scores keyed by category)."""
+        where, params = [], []
+        for column, value in (("industry", industry), ("company_size", company_size), ("tier", tier)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("created_at < ?")
+            params.append(until)
+        sql = (f"SELECT id, {', '.join(ROW_COLUMNS)} FROM assessments"
+               f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY created_at DESC LIMIT ?")
+        out = []
+        for row in self._conn().execute(sql, params + [limit]):
+            item = dict(zip(("id",) + ROW_COLUMNS[:9], row[:10]))
+            item["category_scores"] = dict(zip(CATEGORIES, row[10:]))
+            out.append(item)
+        return out
+
+    def cohort(self, industry=None, company_size=None, since=None):
+        """
+        Aggregate of a segment from the daily rollup (whole days; since is rounded
+        down to its day): count, mean/std score, tier and risk counts, mean
+        category scores.
+        """
+        where, params = [], []
+        for column, value in (("industry", industry), ("company_size", company_size)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("day >= ?")
+            params.append(int(since // DAY))
+        sql = (f"SELECT {', '.join(f'TOTAL({c})' for c in _ROLLUP_COLUMNS)} FROM cohort_daily"
+               f"{' WHERE ' + ' AND '.join(where) if where else ''}")
+        sums = [int(v) for v in self._conn().execute(sql, params).fetchone()]
+        n = sums[0]
+        mean = sums[1] / n if n else 0.0
+        return {
+            "count": n,
+            "mean_score": mean,
+            "std_score": max(sums[2] / n - mean * mean, 0.0) ** 0.5 if n else 0.0,
+            "tiers": {t: sums[2 + t] for t in (1, 2, 3)},
+            "risk": dict(zip(RISK_LEVELS, sums[6:6 + len(RISK_LEVELS)])),
+            "category_means": {c: (v / n if n else 0.0) for c, v in zip(CATEGORIES, sums[6 + len(RISK_LEVELS):])},
+        }
+
+    def close(self):
+        self.flush()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Process-wide store, or None when DTA_ASSESSMENT_DB is set to an empty string
+    or the database cannot be opened (reported once on stderr).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.environ.get("DTA_ASSESSMENT_DB", DEFAULT_PATH)
+                try:
+                    _store = AssessmentStore(path) if path else False
+                except (OSError, sqlite3.Error, RuntimeError) as exc:
+                    print(f"assessment_store: persistence disabled: {exc}", file=sys.stderr)
+                    _store = False
+    return _store or None
+
+
+# ─────────────────────────────────────────────
+#  COMMAND LINE
+# ─────────────────────────────────────────────
+
+def _random_rows(rng, times):
+    sizes, industries = PROFILE_OPTIONS["company_size"], PROFILE_OPTIONS["industry"]
+    budgets, years = PROFILE_OPTIONS["budget"], PROFILE_OPTIONS["years"]
+    return [make_row(rng.randrange(ANSWER_SPACE), rng.choice(sizes), rng.choice(industries),
+                     rng.choice(budgets), rng.choice(years), t) for t in times]
+
+
+def _bench_writer(path, rows, seed, start, span):
+    """Insert rows whose timestamps advance over [start, start + span), like live traffic."""
+    store = AssessmentStore(path)
+    rng = random.Random(seed)
+    step = span / rows
+    for done in range(0, rows, BATCH_MAX):
+        store.insert_many(_random_rows(rng, [start + i * step for i in range(done, min(done + BATCH_MAX, rows))]))
+    store.close()
+
+
+def _timed(fn, repeat=20):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return sorted(times)[len(times) // 2] * 1000
+
+
+def bench(path, rows, writers, days=365):
+    import multiprocessing
+    if os.path.exists(path):
+        raise SystemExit(f"{path} exists; bench writes a fresh database")
+    AssessmentStore(path).close()
+    start, span = time.time() - days * DAY, days * DAY
+    procs = [multiprocessing.Process(target=_bench_writer, args=(path, rows // writers, seed, start, span))
+             for seed in range(writers)]
+    t = time.perf_counter()
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t
+    total = rows // writers * writers
+    print(f"ingest: {total:,} rows from {writers} processes in {elapsed:.1f}s — {total / elapsed:,.0f} rows/s")
+
+    store = AssessmentStore(path)
+    industry, size = PROFILE_OPTIONS["industry"][1], PROFILE_OPTIONS["company_size"][1]
+    month = time.time() - 30 * DAY
+    queries = [
+        ("history, latest 50", lambda: store.history(limit=50)),
+        ("history, segment", lambda: store.history(industry=industry, company_size=size, limit=50)),
+        ("history, tier 3, last 30 days", lambda: store.history(tier=3, since=month, limit=50)),
+        ("cohort, all", lambda: store.cohort()),
+        ("cohort, segment", lambda: store.cohort(industry=industry, company_size=size)),
+        ("cohort, segment, last 30 days", lambda: store.cohort(industry=industry, company_size=size, since=month)),
+    ]
+    for label, fn in queries:
+        print(f"  {label:32s} {_timed(fn):8.2f} ms (median)")
+    store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or benchmark the assessment store.")
+    parser.add_argument("command", choices=("stats", "history", "cohort", "bench"))
+    parser.add_argument("--db", help="database file (default: DTA_ASSESSMENT_DB or .data/assessments.db)")
+    parser.add_argument("--industry")
+    parser.add_argument("--size", help="company size")
+    parser.add_argument("--days", type=float, help="only the last N days")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=2_000_000, help="bench: rows to insert")
+    parser.add_argument("--writers", type=int, default=4, help="bench: concurrent writer processes")
+    args = parser.parse_args(argv)
+
+    path = args.db or os.environ.get("DTA_ASSESSMENT_DB") or DEFAULT_PATH
+    if args.command == "bench":
+        bench(path, args.rows, args.writers)
+        return 0
+    store = AssessmentStore(path)
+    since = time.time() - args.days * DAY if args.days else None
+    if args.command == "stats":
+        print(f"{path}: {store.count():,} assessments")
+    elif args.command == "history":
+        for item in store.history(args.industry, args.size, since=since, limit=args.limit):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(item["created_at"]))
+            print(f"{item['id']:>9} {when}  {item['score']:>3}  tier {item['tier']}  {item['risk']:6s} "
+                  f"{item['industry']} / {item['company_size']}")
+    else:
+        c = store.cohort(args.industry, args.size, since)
+        print(f"{c['count']:,} assessments  mean score {c['mean_score']:.1f} (sd {c['std_score']:.1f})")
+        print("  tiers: " + ", ".join(f"{t}: {n}" for t, n in c["tiers"].items()))
+        print("  risk:  " + ", ".join(f"{r}: {n}" for r, n in c["risk"].items()))
+        for cat, mean in c["category_means"].items():
+            print(f"  {cat:24s} {mean:6.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# batch_engine.py
+# Vectorised batch evaluation for the Digital Transformation Advisor
+#
+# Scores many businesses at once from an (N x 19) Yes/No answer matrix whose
+# columns follow advisor_engine.QUESTION_KEYS. The compiled rule blocks of
+# advisor_engine.PROGRAM are turned into NumPy lookup arrays, so a whole
+# portfolio is scored in a handful of gathers and produces exactly the numbers
+# evaluate() would for each row. Work is done in fixed-size chunks to keep
+# temporaries bounded.
+
+import threading
+
+import numpy as np
+
+from advisor_engine import CATEGORIES, PROGRAM, QUESTION_KEYS, RISK_LEVELS
+from knowledge_base import MATURITY_LEVELS, RISK_BANDS
+
+RISK_NAMES = np.array(RISK_LEVELS)
+SCORE_PCT = np.array(PROGRAM.score_pct, dtype=np.int16)
+DEFAULT_CHUNK = 65536
+
+_COL = {key: i for i, key in enumerate(QUESTION_KEYS)}
+
+
+def answers_matrix(records):
+    """Stack {key: 0/1} answer dicts into an (N x 19) uint8 matrix."""
+    out = np.zeros((len(records), len(QUESTION_KEYS)), dtype=np.uint8)
+    for row, answers in enumerate(records):
+        for key, col in _COL.items():
+            if answers.get(key, 0):
+                out[row, col] = 1
+    return out
+
+
+def _check_matrix(answers):
+    answers = np.asarray(answers)
+    if answers.ndim != 2 or answers.shape[1] != len(QUESTION_KEYS):
+        raise ValueError(
+            f"answers must have shape (N, {len(QUESTION_KEYS)}), got {answers.shape}")
+    return answers
+
+
+# ─────────────────────────────────────────────
+#  VECTORISED RULE PROGRAM
+# ─────────────────────────────────────────────
+
+# Each compiled rule block becomes a pair of lookup arrays indexed by the
+# block's slice of the answer mask: category points and Critical-rec count.
+BLOCK_TABLES = [
+    (block,
+     np.array([e[0] for e in block.entries], dtype=np.int16).reshape(-1, len(CATEGORIES)),
+     np.array([bin(e[2] & PROGRAM.critical_mask).count("1") for e in block.entries], dtype=np.int16))
+    for block in PROGRAM.blocks
+]
+_BIT_WEIGHTS = (1 << np.arange(len(QUESTION_KEYS))).astype(np.int32)
+_TIERS = [(threshold, tier) for threshold, _, _, tier in reversed(MATURITY_LEVELS)]
+_RISKS = [(threshold, RISK_LEVELS.index(level)) for threshold, level, _ in reversed(RISK_BANDS)]
+
+
+def answers_to_masks(answers):
+    """(N x 19) answer matrix -> int32 answer masks (advisor_engine.encode_answers order)."""
+    return (_check_matrix(answers) != 0).astype(np.int32) @ _BIT_WEIGHTS
+
+
+def block_index(block, masks):
+    """Vectorised RuleBlock.index: each mask's local index into the block's tables."""
+    if block.contiguous:
+        return (masks >> block.shift) & ((1 << len(block.bits)) - 1)
+    index = np.zeros_like(masks)
+    for j, b in enumerate(block.bits):
+        index |= ((masks >> b) & 1) << j
+    return index
+
+
+def _evaluate_chunk(masks):
+    """Score one chunk of answer masks. Returns (category_scores[n x 6], critical_count[n])."""
+    cats = np.zeros((masks.shape[0], len(CATEGORIES)), dtype=np.int16)
+    critical = np.zeros(masks.shape[0], dtype=np.int16)
+    for block, cat_lut, crit_lut in BLOCK_TABLES:
+        index = block_index(block, masks)
+        cats += cat_lut[index]
+        critical += crit_lut[index]
+    return cats, critical
+
+
+def _finish(cats, critical):
+    score = cats.sum(axis=1, dtype=np.int16)
+    tier = np.zeros(score.shape, dtype=np.uint8)
+    for threshold, t in _TIERS:
+        tier[score >= threshold] = t
+    risk = np.zeros(score.shape, dtype=np.uint8)
+    for threshold, r in _RISKS:
+        risk[critical >= threshold] = r
+    return score, tier, risk
+
+
+def iter_evaluate_batch(answers, chunk_size=DEFAULT_CHUNK):
+    """
+    Yield (start, score, tier, risk_code, category_scores) per chunk of rows.
+    risk_code indexes advisor_engine.RISK_LEVELS. Use this to stream very large inputs
+    without materialising full-length outputs.
+    """
+    answers = _check_matrix(answers)
+    for start in range(0, answers.shape[0], chunk_size):
+        masks = answers_to_masks(answers[start:start + chunk_size])
+        cats, critical = _evaluate_chunk(masks)
+        score, tier, risk = _finish(cats, critical)
+        yield start, score, tier, risk, cats
+
+
+def evaluate_masks(masks, chunk_size=DEFAULT_CHUNK):
+    """
+    Evaluate integer answer masks (e.g. np.arange(ANSWER_SPACE) for the whole answer
+    space). Returns (score, tier, risk_code, category_scores) arrays.
+    """
+    masks = np.asarray(masks, dtype=np.int32)
+    n = masks.shape[0]
+    score = np.empty(n, dtype=np.int16)
+    tier = np.empty(n, dtype=np.uint8)
+    risk = np.empty(n, dtype=np.uint8)
+    cats = np.empty((n, len(CATEGORIES)), dtype=np.int16)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        c, critical = _evaluate_chunk(masks[start:stop])
+        score[start:stop], tier[start:stop], risk[start:stop] = _finish(c, critical)
+        cats[start:stop] = c
+    return score, tier, risk, cats
+
+
+_space = None
+_space_lock = threading.Lock()
+
+
+def answer_space():
+    """
+    evaluate_masks() over every possible answer mask: (score, tier, risk_code,
+    category_scores) indexed by mask. Read-only views of the host-wide
+    shared_tables mapping, or computed once per process (~60 ms) when sharing is off.
+    """
+    global _space
+    if _space is None:
+        with _space_lock:
+            if _space is None:
+                import shared_tables
+                tables = shared_tables.get_tables()
+                _space = tables.answer_space() if tables else \
+                    evaluate_masks(np.arange(1 << len(QUESTION_KEYS), dtype=np.int32))
+    return _space
+
+
+def evaluate_batch(answers, chunk_size=DEFAULT_CHUNK):
+    """
+    Evaluate an (N x 19) bool/uint8 answer matrix. Returns a dict of arrays:
+      score, score_pct, tier, risk_level (str), risk_code, category_scores (N x 6)
+    category_scores columns follow advisor_engine.CATEGORIES.
+    """
+    answers = _check_matrix(answers)
+    n = answers.shape[0]
+    score = np.empty(n, dtype=np.int16)
+    tier = np.empty(n, dtype=np.uint8)
+    risk = np.empty(n, dtype=np.uint8)
+    cats = np.empty((n, len(CATEGORIES)), dtype=np.int16)
+    for start, s, t, r, c in iter_evaluate_batch(answers, chunk_size):
+        stop = start + len(s)
+        score[start:stop], tier[start:stop], risk[start:stop], cats[start:stop] = s, t, r, c
+    return {
+        "score": score,
+        "score_pct": SCORE_PCT[score],
+        "tier": tier,
+        "risk_level": RISK_NAMES[risk],
+        "risk_code": risk,
+        "category_scores": cats,
+    }
@@ -0,0 +1,101 @@
+# bench_memory.py
+# Memory per stored assessment result, dict vs compact
+#
+# Evaluates --count seeded random answer masks and keeps every result alive in
+# one of three forms, measuring the heap growth with tracemalloc:
+#   dict          – the evaluate() dict (what the app and bulk tools held so far)
+#   CompactResult – __slots__ object with bitsets, text resolved on access
+#   ResultStore   – typed-array columns, results viewed on demand
+# The container (list) is counted too; build times include tracemalloc's
+# overhead. A sample of compact results is checked against evaluate() through
+# the dict-compatibility view; exits 1 on mismatch.
+#
+# Usage:  python bench_memory.py [--count 50000] [--json out.json]
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from advisor_engine import ANSWER_SPACE, DigitalTransformationAdvisor, decode_mask
+from compact_result import CompactResult, ResultStore
+
+
+def _dicts(masks):
+    return [DigitalTransformationAdvisor(decode_mask(m)).evaluate() for m in masks]
+
+
+def _compact(masks):
+    return [CompactResult.from_mask(m) for m in masks]
+
+
+def _store(masks):
+    store = ResultStore()
+    store.extend_masks(masks)
+    return store
+
+
+FORMS = (("dict", _dicts), ("CompactResult", _compact), ("ResultStore", _store))
+
+
+def measure(build, masks):
+    """(bytes held per result, build seconds per result)"""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    t = time.perf_counter()
+    held = build(masks)
+    elapsed = time.perf_counter() - t
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del held
+    return size / len(masks), elapsed / len(masks)
+
+
+def check(masks, sample=500):
+    """Masks whose compact view differs from evaluate()."""
+    bad = []
+    store = _store(masks[:sample])
+    for i, m in enumerate(masks[:sample]):
+        expected = DigitalTransformationAdvisor(decode_mask(m)).evaluate()
+        if CompactResult.from_mask(m).as_dict() != expected or dict(store[i]) != expected:
+            bad.append(m)
+    return bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure memory per stored assessment result.")
+    parser.add_argument("--count", type=int, default=50000, help="results to keep alive (default: 50000)")
+    parser.add_argument("--seed", type=int, default=6008)
+    parser.add_argument("--json", help="also write the measurements to this file")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    masks = [rng.randrange(ANSWER_SPACE) for _ in range(args.count)]
+    report = {"count": args.count, "forms": {}}
+    for name, build in FORMS:
+        per_result, seconds = measure(build, masks)
+        report["forms"][name] = {"bytes_per_result": per_result, "build_us": seconds * 1e6}
+
+    base = report["forms"]["dict"]["bytes_per_result"]
+    print(f"{args.count} results")
+    for name, row in report["forms"].items():
+        print(f"  {name:14s} {row['bytes_per_result']:9.1f} B/result  {base / row['bytes_per_result']:6.1f}x"
+              f"   build {row['build_us']:6.1f} µs/result")
+
+    report["mismatches"] = check(masks)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if report["mismatches"]:
+        print(f"FAIL: compact view differs from evaluate() for masks {report['mismatches'][:10]}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# bench_startup.py
+# Cold-start import budget for the Digital Transformation Advisor
+#
+# Streamlit re-executes app.py on every interaction and each new worker pays
+# for its module-level imports before the questionnaire appears. This script
+# measures, in fresh interpreters:
+#   engine        – `import advisor_engine`, which must pull in no third-party
+#                   package (it is shared by the CLI tools and workers)
+#   app imports   – app.py's module-level imports (parsed from the source), with
+#                   streamlit itself reported separately as the framework floor
+#   questionnaire – a first AppTest run of app.py, which must not load the
+#                   heavy result-only dependencies (matplotlib, numpy, reportlab)
+# Costs come from `python -X importtime` (best of --runs). Exits 1 when any
+# check fails or a cost exceeds its budget.
+#
+# Usage:  python bench_startup.py [--runs 5] [--budget-ms 200] [--json out.json]
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "app.py")
+HEAVY = ("matplotlib", "numpy", "reportlab")
+
+QUESTIONNAIRE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+t = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+print(json.dumps({{"ms": (time.perf_counter() - t) * 1000,
+                  "loaded": sorted({{m.split(".")[0] for m in set(sys.modules) - before}}),
+                  "errors": [str(e.value) for e in at.exception]}}))
+"""
+
+
+def _python(args):
+    proc = subprocess.run([sys.executable, *args], cwd=HERE, capture_output=True, text=True)
+    if proc.returncode:
+        raise SystemExit(f"subprocess failed:\n{proc.stderr[-2000:]}")
+    return proc
+
+
+def importtime(code, runs):
+    """
+    {module: cumulative ms} for the top-level imports made by `code` in a fresh
+    interpreter, best of `runs`. Also returns the full set of modules loaded.
+    """
+    best, loaded = {}, set()
+    for _ in range(runs):
+        stderr = _python(["-X", "importtime", "-c", code]).stderr
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative, name = line.split("|")
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            name = name.strip()
+            loaded.add(name)
+            if depth == 0:
+                ms = int(cumulative) / 1000
+                best[name] = min(best.get(name, ms), ms)
+    return best, loaded
+
+
+def app_imports():
+    """Module names imported at module level of app.py."""
+    tree = ast.parse(open(APP, encoding="utf-8").read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names += [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names.append(node.module)
+    return names
+
+
+def _third_party(modules):
+    local = {os.path.splitext(f)[0] for f in os.listdir(HERE) if f.endswith(".py")}
+    _, site = importtime("pass", 1)          # interpreter start-up (site, .pth hooks)
+    return sorted({m.split(".")[0] for m in modules - site}
+                  - set(sys.stdlib_module_names) - local)
+
+
+def run(runs, budget_ms, engine_budget_ms):
+    report, failures = {}, []
+
+    costs, loaded = importtime("import advisor_engine", runs)
+    engine_ms = costs.get("advisor_engine", 0.0)
+    foreign = _third_party(loaded)
+    report["engine"] = {"ms": engine_ms, "third_party": foreign}
+    if foreign:
+        failures.append(f"advisor_engine imports third-party packages: {', '.join(foreign)}")
+    if engine_ms > engine_budget_ms:
+        failures.append(f"advisor_engine import {engine_ms:.1f} ms > budget {engine_budget_ms} ms")
+
+    names = app_imports()
+    local = [n for n in names if n.split(".")[0] != "streamlit"]
+    costs, _ = importtime("import streamlit; import " + ", ".join(local), runs)
+    app_costs = {n: costs.get(n, 0.0) for n in local}
+    app_ms = sum(app_costs.values())
+    streamlit_ms, _ = importtime("import streamlit", runs)
+    report["app_imports"] = {"ms": app_ms, "modules": app_costs,
+                             "streamlit_ms": streamlit_ms.get("streamlit", 0.0)}
+    if app_ms > budget_ms:
+        failures.append(f"app.py module-level imports {app_ms:.1f} ms > budget {budget_ms} ms")
+
+    first = json.loads(_python(["-c", QUESTIONNAIRE.format(app=APP)]).stdout.strip().splitlines()[-1])
+    heavy = [m for m in HEAVY if m in first["loaded"]]
+    report["questionnaire"] = {"ms": first["ms"], "heavy_loaded": heavy, "errors": first["errors"]}
+    if heavy:
+        failures.append(f"first page load imports {', '.join(heavy)}")
+    if first["errors"]:
+        failures.append(f"first page load raised: {first['errors'][0]}")
+
+    report["failures"] = failures
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import costs against a budget.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement (best of)")
+    parser.add_argument("--budget-ms", type=float, default=200.0,
+                        help="budget for app.py's module-level imports, excluding streamlit (default: 200)")
+    parser.add_argument("--engine-budget-ms", type=float, default=150.0,
+                        help="budget for `import advisor_engine` (default: 150)")
+    parser.add_argument("--json", help="also write the measurements to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.runs, args.budget_ms, args.engine_budget_ms)
+    eng, app, first = report["engine"], report["app_imports"], report["questionnaire"]
+    print(f"advisor_engine import   {eng['ms']:8.1f} ms   (budget {args.engine_budget_ms:.0f} ms)")
+    print(f"app.py imports          {app['ms']:8.1f} ms   (budget {args.budget_ms:.0f} ms)")
+    for name, ms in app["modules"].items():
+        print(f"  {name:21s} {ms:8.1f} ms")
+    print(f"streamlit (floor)       {app['streamlit_ms']:8.1f} ms")
+    print(f"first page load         {first['ms']:8.1f} ms   (AppTest, heavy modules: "
+          f"{', '.join(first['heavy_loaded']) or 'none'})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    for failure in report["failures"]:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+# benchmarks.py
+# Performance benchmarks for the Digital Transformation Advisor
+#
+# Times the rule engine on representative and exhaustive answer sets, each of
+# the four result charts, the PDF report, and a full rerun of app.py through
+# Streamlit's AppTest harness. Every benchmark is warmed up, calibrated to a
+# minimum sample duration and repeated with the garbage collector paused;
+# medians are compared against a stored baseline and slowdowns beyond the
+# threshold fail the run. Caches are bypassed (charts and reports are rendered
+# directly) so only the code under test is measured.
+#
+# The reference baseline is bench_baseline.json, committed with the
+# environment it was recorded on. A run on a different host still compares
+# against it but warns first, since the absolute timings then differ. Re-record
+# it on the reference machine when a change is meant to move the numbers.
+#
+# Usage:  python benchmarks.py                        # fast set vs bench_baseline.json
+#         python benchmarks.py --slow --json run.json   # include exhaustive 2^19 passes
+#         python benchmarks.py --slow --save-baseline bench_baseline.json
+#         python benchmarks.py --baseline other.json --threshold 0.15   (--baseline "" to skip the gate)
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+# measure rendering code, not the disk caches
+os.environ.setdefault("DTA_CHART_CACHE", "")
+os.environ.setdefault("DTA_REPORT_CACHE", "")
+os.environ.setdefault("DTA_ASSESSMENT_DB", "")         # app reruns must not fill the assessment history
+os.environ.setdefault("DTA_PEER_BENCHMARKS", "")       # ... or the peer distributions
+
+from advisor_engine import ANSWER_SPACE, PROGRAM, QUESTION_KEYS, DigitalTransformationAdvisor, decode_mask
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "bench_baseline.json")
+SEED = 6008
+
+BENCHMARKS = {}
+
+
+def benchmark(name, slow=False):
+    """Register a setup function that returns the zero-argument callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = (setup, slow)
+        return setup
+    return register
+
+
+def _representative_masks(n=1000):
+    """Seeded random answer sets plus the all-No / all-Yes corners."""
+    rng = random.Random(SEED)
+    return [0, ANSWER_SPACE - 1] + [rng.randrange(ANSWER_SPACE) for _ in range(n - 2)]
+
+
+def _sample_result():
+    return DigitalTransformationAdvisor(decode_mask(_representative_masks(3)[2])).evaluate()
+
+
+# ─────────────────────────────────────────────
+#  ENGINE
+# ─────────────────────────────────────────────
+
+@benchmark("evaluate.representative")
+def _evaluate_representative():
+    answers = [decode_mask(m) for m in _representative_masks()]
+    return lambda: [DigitalTransformationAdvisor(a).evaluate() for a in answers]
+
+
+@benchmark("evaluate.exhaustive", slow=True)
+def _evaluate_exhaustive():
+    return lambda: [DigitalTransformationAdvisor(decode_mask(m)).evaluate() for m in range(ANSWER_SPACE)]
+
+
+@benchmark("program.run.exhaustive", slow=True)
+def _run_exhaustive():
+    return lambda: [PROGRAM.run(m) for m in range(ANSWER_SPACE)]
+
+
+@benchmark("batch.exhaustive")
+def _batch_exhaustive():
+    import numpy as np
+    from batch_engine import evaluate_batch
+    bits = np.arange(len(QUESTION_KEYS))
+    answers = ((np.arange(ANSWER_SPACE)[:, None] >> bits) & 1).astype(np.uint8)
+    return lambda: evaluate_batch(answers)
+
+
+# ─────────────────────────────────────────────
+#  CHARTS AND REPORT
+# ─────────────────────────────────────────────
+
+def _chart(name):
+    def setup():
+        import charts
+        from themes import THEMES
+        result = _sample_result()
+        inputs = charts.chart_inputs(result, sum(decode_mask(0b1011011).values()), len(QUESTION_KEYS))[name]
+        palette = charts.palette_from_theme(THEMES["dark"])
+        return lambda: charts.render(name, inputs, palette)
+    return setup
+
+
+for _name in ("radar", "bar", "pie", "gauge"):
+    benchmark(f"chart.{_name}")(_chart(_name))
+
+
+@benchmark("report.generate_pdf")
+def _generate_pdf():
+    from report import generate_pdf
+    result = _sample_result()
+    return lambda: generate_pdf(result, "Small (10–49 employees)", "Retail", "£5,000 – £20,000", "3 – 10 years")
+
+
+# ─────────────────────────────────────────────
+#  FULL SCRIPT RERUN
+# ─────────────────────────────────────────────
+
+@benchmark("app.rerun")
+def _app_rerun():
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(HERE, "app.py"), default_timeout=120)
+    at.run()
+    rng = random.Random(SEED)
+    for sb in at.selectbox:
+        sb.set_value(rng.choice(["Yes", "No"]) if "Yes" in sb.options else sb.options[1])
+    button = next(b for b in at.button if "Run Expert" in str(b.label))
+
+    def rerun():
+        button.click()
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return rerun
+
+
+# ─────────────────────────────────────────────
+#  RUNNER
+# ─────────────────────────────────────────────
+
+def measure(fn, repeat=7, min_time=0.2):
+    """
+    Per-call timings in seconds: warm up once, pick a loop count so one sample
+    takes at least `min_time`, then take `repeat` samples with GC paused.
+    """
+    fn()
+    loops = 1
+    while True:
+        t = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - t >= min_time:
+            break
+        loops *= 2
+    samples = []
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - t) / loops)
+    finally:
+        if enabled:
+            gc.enable()
+    return {
+        "loops": loops, "repeat": repeat,
+        "min": min(samples), "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def environment():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    return {
+        "python": platform.python_version(), "platform": platform.platform(),
+        "cpus": os.cpu_count(), "git": rev, "engine": PROGRAM.version[:12],
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def environment_differences(recorded, current):
+    """Fields of the recording environment that affect timings and differ from the current one."""
+    return [f"{k}: {recorded.get(k)} -> {current[k]}" for k in ("python", "platform", "cpus")
+            if recorded.get(k) != current[k]]
+
+
+def compare(results, baseline, threshold):
+    """[(name, base median, new median, ratio)] for benchmarks slower than baseline * (1 + threshold)."""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base and stats["median"] > base["median"] * (1 + threshold):
+            regressions.append((name, base["median"], stats["median"], stats["median"] / base["median"]))
+    return regressions
+
+
+def _fmt(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e3), ("µs", 1e6)):
+        if seconds >= 1 / scale or unit == "µs":
+            return f"{seconds * scale:8.2f} {unit}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the performance benchmarks.")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--slow", action="store_true", help="include the exhaustive 2^19 engine passes")
+    parser.add_argument("--repeat", type=int, default=7, help="samples per benchmark (default: 7)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per sample (default: 0.2)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="compare medians against this results file (default: bench_baseline.json; '' to skip)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown vs baseline as a fraction (default: 0.25)")
+    parser.add_argument("--save-baseline", help="write results to this file as the new baseline")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            parser.error(f"baseline {args.baseline} not found (record one with --save-baseline, or pass --baseline '')")
+        with open(args.baseline, encoding="utf-8") as f:
+            recorded = json.load(f)
+        baseline = recorded["results"]
+        env = recorded.get("environment", {})
+        print(f"baseline {os.path.relpath(args.baseline)} (git {env.get('git', '?')}, {env.get('time', '?')})")
+        for difference in environment_differences(env, environment()):
+            print(f"warning: baseline recorded on a different environment ({difference})", file=sys.stderr)
+
+    results = {}
+    for name, (setup, slow) in BENCHMARKS.items():
+        if args.filter not in name or (slow and not args.slow):
+            continue
+        stats = results[name] = measure(setup(), args.repeat, args.min_time)
+        line = f"{name:26s} {_fmt(stats['median'])}  ± {stats['stdev'] / stats['median'] * 100:4.1f}%"
+        if name in baseline:
+            line += f"   {stats['median'] / baseline[name]['median']:5.2f}x baseline"
+        print(line, flush=True)
+
+    doc = {"environment": environment(), "results": results}
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(doc, f, indent=2)
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, new, ratio in regressions:
+        print(f"REGRESSION {name}: {_fmt(base).strip()} -> {_fmt(new).strip()} ({ratio:.2f}x)", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+# bulk_assess.py
+# Headless bulk assessment for the Digital Transformation Advisor
+#
+# Streams answer records from CSV or JSONL (file or stdin) through the rule
+# engine in fixed-size chunks and writes results incrementally to CSV or
+# JSONL, so memory stays constant however large the input is. Chunks can be
+# fanned out over a process pool; throughput and per-record latency
+# percentiles are reported on stderr when the run finishes. When the
+# precomputed result table (result_table.py build) is on disk, records are
+# read from it instead of being run through the rules.
+#
+# Usage:  python bulk_assess.py answers.csv -o results.jsonl --workers 4
+#         cat answers.jsonl | python bulk_assess.py - --input-format jsonl
+
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from advisor_engine import (
+    CATEGORIES, PROGRAM, QUESTION_KEYS, RISK_LEVELS,
+    DigitalTransformationAdvisor, encode_answers, iter_bits, maturity_level,
+)
+from result_table import available_table
+
+YES = {"1", "yes", "y", "true", "t"}
+NO = {"0", "no", "n", "false", "f", ""}
+
+SUMMARY_FIELDS = (["score", "score_pct", "level", "tier", "risk_level"]
+                  + [f"cat_{c}" for c in CATEGORIES]
+                  + ["rules_fired", "critical_gaps", "error"])
+
+
+# ─────────────────────────────────────────────
+#  INPUT
+# ─────────────────────────────────────────────
+
+def _open_in(path):
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, newline="", encoding="utf-8")
+
+
+@contextlib.contextmanager
+def _open_out(path):
+    """Output stream. A file is written under a temporary name and replaces `path` only once complete."""
+    if path == "-":
+        yield sys.stdout
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+
+def _detect_format(path, explicit):
+    if explicit:
+        return explicit
+    if path != "-" and path.lower().endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+
+# an unparsed JSONL line; parse_record() turns it into a record dict
+JsonLine = namedtuple("JsonLine", "lineno text")
+
+
+def read_records(stream, fmt):
+    """
+    Yield raw records one at a time: dicts for CSV, JsonLine for JSONL. JSON is
+    parsed with the rest of the record (parse_record), so a malformed line is
+    an invalid record rather than the end of the run.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for lineno, line in enumerate(stream, 1):
+            line = line.strip()
+            if line:
+                yield JsonLine(lineno, line)
+
+
+def parse_record(record):
+    """Record dict from a raw record; ValueError naming the line for JSON that is not an object."""
+    if not isinstance(record, JsonLine):
+        return record
+    try:
+        value = json.loads(record.text)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"line {record.lineno}: invalid JSON ({exc.msg} at column {exc.colno})") from None
+    if not isinstance(value, dict):
+        raise ValueError(f"line {record.lineno}: expected a JSON object, got {type(value).__name__}")
+    return value
+
+
+def chunked(records, size):
+    chunk = []
+    for rec in records:
+        chunk.append(rec)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_answer(value):
+    """Accept Yes/No, 1/0, true/false (any case); blank or missing counts as No."""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        if value in (0, 1):
+            return int(value)
+        raise ValueError(f"invalid answer {value!r}")
+    text = str(value).strip().lower()
+    if text in YES:
+        return 1
+    if text in NO:
+        return 0
+    raise ValueError(f"invalid answer {value!r}")
+
+
+def split_record(record):
+    """Return (answers dict, passthrough dict). Answers may be top-level or under "answers"."""
+    record = parse_record(record)
+    source = record.get("answers", record)
+    answers = {k: parse_answer(source.get(k)) for k in QUESTION_KEYS}
+    passthrough = {k: v for k, v in record.items() if k not in QUESTION_KEYS and k != "answers"}
+    return answers, passthrough
+
+
+# ─────────────────────────────────────────────
+#  EVALUATION (runs in workers)
+# ─────────────────────────────────────────────
+
+def _summary(mask, run=PROGRAM.run):
+    score, tier, risk, cats, fired, _, _, gaps = run(mask)
+    row = {
+        "score": score,
+        "score_pct": PROGRAM.score_pct[score],
+        "level": maturity_level(score)[0],
+        "tier": tier,
+        "risk_level": RISK_LEVELS[risk],
+    }
+    row.update({f"cat_{c}": v for c, v in zip(CATEGORIES, cats)})
+    row["rules_fired"] = sum(1 for _ in iter_bits(fired))
+    row["critical_gaps"] = "; ".join(PROGRAM.critical_gaps[i] for i in iter_bits(gaps))
+    return row
+
+
+def evaluate_chunk(chunk, full=False):
+    """
+    Evaluate a list of raw records. Returns (rows, latencies_ns, n_errors).
+    Invalid records yield a row carrying only the passthrough fields and "error".
+    """
+    clock = time.perf_counter_ns
+    table = available_table()
+    run = table.lookup if table else PROGRAM.run
+    rows, latencies, errors = [], [], 0
+    for record in chunk:
+        t0 = clock()
+        try:
+            record = parse_record(record)
+            answers, row = split_record(record)
+            if full:
+                row["result"] = table.result(encode_answers(answers)) if table else \
+                    DigitalTransformationAdvisor(answers).evaluate()
+            else:
+                row.update(_summary(encode_answers(answers), run))
+        except (ValueError, AttributeError, TypeError) as exc:
+            row = {k: v for k, v in record.items() if k not in QUESTION_KEYS} if isinstance(record, dict) else {}
+            row["error"] = str(exc)
+            errors += 1
+        latencies.append(clock() - t0)
+        rows.append(row)
+    return rows, latencies, errors
+
+
+def _pipeline(chunks, workers, full):
+    """Yield evaluated chunks in input order, with at most 2 * workers chunks in flight."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield evaluate_chunk(chunk, full)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(evaluate_chunk, chunk, full))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ─────────────────────────────────────────────
+#  OUTPUT AND STATS
+# ─────────────────────────────────────────────
+
+class LatencyHistogram:
+    """Constant-memory log-bucketed histogram (~2% relative error) for percentiles."""
+
+    GROWTH = 1.02
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+
+    def add_many(self, values_ns):
+        log_g = math.log(self.GROWTH)
+        for v in values_ns:
+            b = int(math.log(v) / log_g) if v > 0 else 0
+            self.counts[b] = self.counts.get(b, 0) + 1
+        self.total += len(values_ns)
+
+    def percentile(self, q):
+        if not self.total:
+            return 0.0
+        target = q / 100 * self.total
+        seen = 0
+        for b in sorted(self.counts):
+            seen += self.counts[b]
+            if seen >= target:
+                return self.GROWTH ** (b + 0.5)
+        return self.GROWTH ** (max(self.counts) + 0.5)
+
+
+class ResultWriter:
+    """
+    CSV or JSONL rows. CSV columns are the passthrough fields (extra_fields,
+    else the first row's other keys) followed by `fields`; with fields=() they
+    are simply the first row's keys.
+    """
+
+    def __init__(self, stream, fmt, extra_fields=(), fields=SUMMARY_FIELDS):
+        self.stream = stream
+        self.fmt = fmt
+        self.extra_fields = list(extra_fields)
+        self.fields = list(fields)
+        self._csv = None
+
+    def write(self, rows):
+        if self.fmt == "jsonl":
+            self.stream.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in rows)
+            return
+        if self._csv is None:
+            passthrough = self.extra_fields or [k for k in rows[0] if k not in self.fields]
+            self._csv = csv.DictWriter(self.stream, fieldnames=passthrough + self.fields,
+                                       extrasaction="ignore", restval="")
+            self._csv.writeheader()
+        self._csv.writerows(rows)
+
+
+def run(args):
+    in_fmt = _detect_format(args.input, args.input_format)
+    out_fmt = args.output_format or _detect_format(args.output, None)
+    if out_fmt == "csv" and args.full:
+        raise SystemExit("--full results are nested and need JSONL output")
+
+    hist = LatencyHistogram()
+    n = errors = 0
+    start = time.perf_counter()
+    with _open_in(args.input) as src, _open_out(args.output) as dst:
+        records = read_records(src, in_fmt)
+        writer = ResultWriter(dst, out_fmt, args.passthrough)
+        for rows, latencies, bad in _pipeline(chunked(records, args.chunk_size), args.workers, args.full):
+            if bad and not args.skip_invalid:
+                first = next(r for r in rows if "error" in r)
+                raise SystemExit(f"record {n + rows.index(first) + 1}: {first['error']} "
+                                 f"(use --skip-invalid to continue)")
+            writer.write(rows)
+            hist.add_many(latencies)
+            n += len(rows)
+            errors += bad
+        dst.flush()
+    elapsed = time.perf_counter() - start
+
+    if not args.quiet:
+        rate = n / elapsed if elapsed else float("inf")
+        print(f"{n} records in {elapsed:.2f}s — {rate:,.0f} records/s "
+              f"({args.workers} worker{'s' if args.workers != 1 else ''})", file=sys.stderr)
+        print(f"per-record latency: p50 {hist.percentile(50) / 1000:.1f} µs, "
+              f"p99 {hist.percentile(99) / 1000:.1f} µs", file=sys.stderr)
+        if errors:
+            print(f"{errors} invalid record(s) skipped", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score answer records in bulk.")
+    parser.add_argument("input", help="CSV/JSONL file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="default: from file extension")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="default: from file extension")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="records per chunk (default: 5000)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"worker processes (default: 1, this host has {os.cpu_count()})")
+    parser.add_argument("--passthrough", nargs="*", default=(),
+                        help="input fields to copy to CSV output (default: all non-answer fields of the first chunk)")
+    parser.add_argument("--full", action="store_true", help="emit the complete evaluate() result (JSONL only)")
+    parser.add_argument("--skip-invalid", action="store_true", help="write an error row instead of stopping")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print throughput stats")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1 or args.workers < 1:
+        parser.error("--chunk-size and --workers must be at least 1")
+    try:
+        return run(args)
+    except BrokenPipeError:
+        # downstream reader (e.g. head) went away — stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# byte_cache.py
+# Two-tier LRU cache for rendered artefacts (chart images, PDF reports)
+#
+# Values are immutable bytes addressed by a hex key. The memory tier is an
+# OrderedDict bounded by total bytes; the optional disk tier keeps one file
+# per key in a directory, also bounded by total bytes, and evicts the least
+# recently used files (access order is tracked in process and mirrored to
+# mtimes so a restarted process picks it up). Hit/miss counters are kept per
+# tier so the bounds can be sized from real traffic.
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def cache_key(*parts):
+    """Stable sha256 hex key for JSON-serialisable parts (tuples become lists)."""
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class BytesCache:
+
+    def __init__(self, max_bytes=32 << 20, disk_dir=None, disk_max_bytes=256 << 20, suffix=".bin"):
+        """
+        max_bytes:      memory tier bound
+        disk_dir:       directory for the disk tier (None disables it)
+        disk_max_bytes: disk tier bound
+        suffix:         file extension for disk entries
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()
+        self._mem_bytes = 0
+        self._disk = OrderedDict()      # key -> size, least recently used first
+        self._disk_bytes = 0
+        self.hits = self.disk_hits = self.misses = 0
+        self.evictions = self.disk_evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    # ─────────────────────────────────────────────
+    #  DISK TIER
+    # ─────────────────────────────────────────────
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key + self.suffix)
+
+    def _scan_disk(self):
+        entries = []
+        with os.scandir(self.disk_dir) as it:
+            for e in it:
+                if e.name.endswith(self.suffix) and e.is_file():
+                    st = e.stat()
+                    entries.append((st.st_mtime, e.name[:-len(self.suffix)], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _disk_get(self, key):
+        if key not in self._disk:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:                         # removed by another process
+            self._disk_bytes -= self._disk.pop(key)
+            return None
+        self._disk.move_to_end(key)
+        return data
+
+    def _disk_put(self, key, data):
+        if key in self._disk or len(data) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        self._disk[key] = len(data)
+        self._disk_bytes += len(data)
+        while self._disk_bytes > self.disk_max_bytes:
+            old, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
+
+    # ─────────────────────────────────────────────
+    #  PUBLIC API
+    # ─────────────────────────────────────────────
+
+    def _mem_put(self, key, data):
+        if key in self._mem or len(data) > self.max_bytes:
+            return
+        self._mem[key] = data
+        self._mem_bytes += len(data)
+        while self._mem_bytes > self.max_bytes:
+            _, old = self._mem.popitem(last=False)
+            self._mem_bytes -= len(old)
+            self.evictions += 1
+
+    def get(self, key):
+        """Cached bytes for key, or None. Disk hits are promoted to memory."""
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return data
+            if self.disk_dir:
+                data = self._disk_get(key)
+                if data is not None:
+                    self._mem_put(key, data)
+                    self.disk_hits += 1
+                    return data
+            self.misses += 1
+            return None
+
+    def put(self, key, data):
+        with self._lock:
+            self._mem_put(key, data)
+            if self.disk_dir:
+                self._disk_put(key, data)
+
+    def get_or_create(self, key, factory):
+        """Return cached bytes for key, calling factory() and storing its result on a miss."""
+        data = self.get(key)
+        if data is None:
+            data = factory()
+            self.put(key, data)
+        return data
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._mem or key in self._disk
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+            if disk and self.disk_dir:
+                for key in self._disk:
+                    try:
+                        os.remove(self._path(key))
+                    except OSError:
+                        pass
+                self._disk.clear()
+                self._disk_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._mem), "bytes": self._mem_bytes, "evictions": self.evictions,
+                "disk_entries": len(self._disk), "disk_bytes": self._disk_bytes,
+                "disk_evictions": self.disk_evictions,
+            }
@@ -0,0 +1,143 @@
+# chart_cache.py
+# Pre-rendered chart images for the Digital Transformation Advisor
+#
+# Chart inputs come from a small finite space (category score vectors, the
+# adoption count, the score, and the theme palette), so rendered PNGs are
+# cached in a byte_cache.BytesCache keyed on (chart, inputs, palette, chart
+# code version, rule program version). The results page asks render_charts()
+# for its four images and only renders the misses.
+#
+# Usage:  python chart_cache.py warm [--from answers.csv] [--top 200]
+#         python chart_cache.py stats
+
+import argparse
+import os
+import sys
+import threading
+from collections import Counter
+
+import matplotlib
+
+import charts
+from advisor_engine import PROGRAM, QUESTION_KEYS, encode_answers
+from byte_cache import BytesCache, cache_key
+from themes import THEMES
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "charts")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Process-wide chart cache. The disk tier lives in .cache/charts unless
+    DTA_CHART_CACHE names another directory (empty string: memory only).
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                disk_dir = os.environ.get("DTA_CHART_CACHE", DEFAULT_DIR) or None
+                _cache = BytesCache(max_bytes=64 << 20, disk_dir=disk_dir,
+                                    disk_max_bytes=512 << 20, suffix=".img")
+    return _cache
+
+
+def chart_key(name, inputs, palette, fmt="png"):
+    return cache_key("chart", charts.CHART_VERSION, matplotlib.__version__, PROGRAM.version,
+                     name, inputs, palette, fmt)
+
+
+def render_charts(jobs, palette, fmt="png", cache=None):
+    """{chart name: inputs} -> {chart name: image bytes}, rendering only cache misses."""
+    cache = cache or get_cache()
+    out, missing = {}, {}
+    for name, inputs in jobs.items():
+        data = cache.get(chart_key(name, inputs, palette, fmt))
+        if data is None:
+            missing[name] = inputs
+        else:
+            out[name] = data
+    for name, data in charts.render_many(missing, palette, fmt).items():
+        cache.put(chart_key(name, missing[name], palette, fmt), data)
+        out[name] = data
+    return out
+
+
+# ─────────────────────────────────────────────
+#  WARM-UP
+# ─────────────────────────────────────────────
+
+def _corner_masks():
+    """All-No, all-Yes and every single answer away from either end."""
+    full = (1 << len(QUESTION_KEYS)) - 1
+    masks = {0, full}
+    for b in range(len(QUESTION_KEYS)):
+        masks.update((1 << b, full ^ (1 << b)))
+    return masks
+
+
+def warm_inputs(masks=None, top=200):
+    """
+    (chart, inputs) pairs worth pre-rendering: every gauge score and adoption
+    count, plus category vectors for the `top` most frequent masks
+    (default: the corner profiles, _corner_masks()).
+    """
+    n = len(QUESTION_KEYS)
+    masks = Counter(masks) if masks is not None else Counter(_corner_masks())
+    cat_counts = Counter()
+    for mask, count in masks.items():
+        cat_counts[PROGRAM.run(mask)[3]] += count
+    pairs = [("gauge", (s,)) for s in range(PROGRAM.max_score + 1)]
+    pairs += [("pie", (a, n)) for a in range(n + 1)]
+    for cats, _ in cat_counts.most_common(top):
+        pairs += [("radar", cats), ("bar", cats)]
+    return pairs
+
+
+def warm(pairs, themes=tuple(THEMES), cache=None):
+    """Render every (chart, inputs) pair missing for each theme. Returns the number rendered."""
+    cache = cache or get_cache()
+    rendered = 0
+    for theme in themes:
+        palette = charts.palette_from_theme(THEMES[theme])
+        todo = [(name, inputs) for name, inputs in pairs if chart_key(name, inputs, palette) not in cache]
+        pool = charts.get_pool()
+        futures = [(name, inputs, pool.submit(charts.render, name, inputs, palette)) for name, inputs in todo]
+        for name, inputs, f in futures:
+            cache.put(chart_key(name, inputs, palette), f.result())
+            rendered += 1
+    return rendered
+
+
+def _masks_from_file(path):
+    from bulk_assess import _detect_format, _open_in, read_records, split_record
+    with _open_in(path) as src:
+        for record in read_records(src, _detect_format(path, None)):
+            yield encode_answers(split_record(record)[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render and inspect the chart image cache.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("warm", help="pre-render common chart combinations")
+    w.add_argument("--from", dest="source", help="CSV/JSONL answer records to take frequencies from")
+    w.add_argument("--top", type=int, default=200, help="category profiles to pre-render (default: 200)")
+    w.add_argument("--theme", nargs="*", choices=list(THEMES), default=list(THEMES))
+    sub.add_parser("stats", help="show cache size")
+    args = parser.parse_args(argv)
+
+    cache = get_cache()
+    if args.cmd == "warm":
+        masks = list(_masks_from_file(args.source)) if args.source else None
+        pairs = warm_inputs(masks, args.top)
+        n = warm(pairs, args.theme, cache)
+        print(f"{n} chart(s) rendered, {len(pairs) * len(args.theme) - n} already cached")
+    for k, v in cache.stats().items():
+        print(f"{k:15s} {v}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
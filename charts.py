@@ -0,0 +1,219 @@
+# charts.py
+# Chart rendering engine for the Digital Transformation Advisor
+#
+# Builds the four result charts (capability radar, stacked gap bar, adoption
+# pie, maturity gauge) as matplotlib.figure.Figure objects on the Agg canvas,
+# never touching pyplot's global figure manager, and renders them to PNG/SVG
+# bytes. Streamlit serves sessions on threads, so each thread keeps its own
+# radar and gauge templates (static fills and tier bands drawn once, only the
+# data artists updated per render) and rendering runs on a bounded pool.
+
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from advisor_engine import CATEGORIES, PROGRAM
+from instrumentation import stage
+
+CHART_NAMES = ("radar", "bar", "pie", "gauge")
+CHART_VERSION = 2     # bump when the drawing code changes so cached images are not reused
+
+# chart palette
+CA   = "#1a6b45"  # achieved green
+CG   = "#c0392b"  # gap red
+CAMB = "#d4a017"  # amber
+
+SHORT_LABELS = ["Infra.", "Data", "Auto/AI", "Customer", "Strategy", "People"]
+GAUGE_TIERS = [("Early Stage\n(0–41)", CG, 41), ("Developing\n(42–71)", CAMB, 30),
+               (f"Advanced\n(72–{PROGRAM.max_score})", CA, PROGRAM.max_score - 71)]
+SAVE_KW = {"dpi": 200, "bbox_inches": "tight"}     # same defaults st.pyplot uses
+
+Palette = namedtuple("Palette", "bg txt grid marker")
+
+
+def palette_from_theme(theme):
+    """Chart colours from an app theme dict (DARK / LIGHT)."""
+    return Palette(theme["chart_bg"], theme["chart_txt"], theme["chart_grid"], theme["marker"])
+
+
+def chart_inputs(result, adopted, total):
+    """
+    Hashable inputs of each chart for an evaluate() result:
+      radar / bar – category scores in CATEGORIES order
+      pie         – (adopted, total) capability counts
+      gauge       – (score,)
+    """
+    cats = tuple(result["category_scores"].get(c, 0) for c in CATEGORIES)
+    return {"radar": cats, "bar": cats, "pie": (adopted, total), "gauge": (result["score"],)}
+
+
+def _new_figure(size, palette, **subplot_kw):
+    fig = Figure(figsize=size)
+    FigureCanvasAgg(fig)
+    fig.patch.set_facecolor(palette.bg)
+    ax = fig.add_subplot(111, **subplot_kw)
+    ax.set_facecolor(palette.bg)
+    return fig, ax
+
+
+# ─────────────────────────────────────────────
+#  RADAR
+# ─────────────────────────────────────────────
+
+class _RadarTemplate:
+    """Radar axes with the concentric band fills and labels drawn once."""
+
+    def __init__(self, palette):
+        n = len(CATEGORIES)
+        self.angs = np.linspace(0, 2 * np.pi, n, endpoint=False)
+        self.ap = np.append(self.angs, self.angs[0])
+        self.fig, ax = _new_figure((5.2, 4.8), palette, polar=True)
+        ax.fill(self.ap, [100] * len(self.ap), color=CG, alpha=0.07)
+        ax.fill(self.ap, [60] * len(self.ap), color=CAMB, alpha=0.09)
+        ax.fill(self.ap, [30] * len(self.ap), color=CA, alpha=0.11)
+        zeros = np.zeros(n + 1)
+        (self.line,) = ax.plot(self.ap, zeros, color=CA, linewidth=2.5)
+        (self.area,) = ax.fill(self.ap, zeros, color=CA, alpha=0.28)
+        self.dots = ax.scatter(self.angs, zeros[:-1], color=CAMB, s=50, zorder=5)
+        ax.set_xticks(self.angs); ax.set_xticklabels(SHORT_LABELS, color=palette.txt, fontsize=9)
+        ax.set_yticklabels([]); ax.set_ylim(0, 100)
+        ax.spines["polar"].set_color(palette.grid); ax.grid(color=palette.grid, linestyle="--", linewidth=0.6)
+        self.fig.tight_layout()
+
+    def update(self, cat_scores):
+        vals = [min(s / PROGRAM.category_max[c] * 100, 100) for c, s in zip(CATEGORIES, cat_scores)]
+        vp = np.append(vals, vals[0])
+        self.line.set_ydata(vp)
+        self.area.set_xy(np.column_stack([self.ap, vp]))
+        self.dots.set_offsets(np.column_stack([self.angs, vals]))
+        return self.fig
+
+
+# ─────────────────────────────────────────────
+#  GAUGE
+# ─────────────────────────────────────────────
+
+class _GaugeTemplate:
+    """Maturity gauge with the three tier bands drawn once; only the marker moves."""
+
+    def __init__(self, palette):
+        self.fig, ax = _new_figure((5.2, 4.2), palette)
+        left = 0
+        for lbl, col, wid in GAUGE_TIERS:
+            ax.barh(0, wid, left=left, color=col, alpha=0.65, height=0.32, edgecolor=palette.bg, linewidth=1.5)
+            ax.text(left + wid / 2, 0, lbl, ha="center", va="center", color=palette.txt, fontsize=9)
+            left += wid
+        self.marker = ax.axvline(0, color=palette.marker, linewidth=2.5, linestyle="--", zorder=5)
+        self.label = ax.text(0, 0.22, "", color=palette.marker, fontsize=11, fontweight="bold", va="bottom")
+        ax.set_xlim(0, PROGRAM.max_score); ax.set_ylim(-0.3, 0.45); ax.axis("off")
+        self.fig.tight_layout()
+
+    def update(self, score):
+        self.marker.set_xdata([score, score])
+        self.label.set_x(score)
+        self.label.set_text(f"  ▼ {score}")
+        return self.fig
+
+
+# ─────────────────────────────────────────────
+#  BAR AND PIE
+# ─────────────────────────────────────────────
+
+def _bar_figure(cat_scores, palette):
+    ach = list(cat_scores)
+    mx = [PROGRAM.category_max[c] for c in CATEGORIES]
+    gap = [m - a for m, a in zip(mx, ach)]
+    x = np.arange(len(CATEGORIES))
+    fig, ax = _new_figure((5.5, 4.8), palette)
+    ax.bar(x, ach, color=CA, label="Achieved", width=0.45, zorder=3, edgecolor=palette.bg)
+    ax.bar(x, gap, bottom=ach, color=CG, label="Gap", width=0.45, zorder=3, alpha=0.75, edgecolor=palette.bg)
+    for xi, val in zip(x, ach):
+        if val > 0:
+            ax.text(xi, val + .2, str(int(val)), ha="center", va="bottom", color=palette.txt, fontsize=9, fontweight="bold")
+    ax.set_xticks(x); ax.set_xticklabels(SHORT_LABELS, color=palette.txt, fontsize=9, rotation=18, ha="right")
+    ax.set_ylabel("Score (points)", color=palette.txt, fontsize=10, labelpad=8)
+    ax.tick_params(axis="y", colors=palette.txt, labelsize=9); ax.tick_params(axis="x", colors=palette.txt)
+    for sp in ["top", "right"]: ax.spines[sp].set_visible(False)
+    for sp in ["bottom", "left"]: ax.spines[sp].set_color(palette.grid)
+    ax.grid(axis="y", color=palette.grid, linestyle="--", linewidth=0.5, zorder=0)
+    ax.legend(facecolor=palette.bg, edgecolor=palette.grid, labelcolor=palette.txt, fontsize=9, loc="upper right")
+    fig.tight_layout()
+    return fig
+
+
+def _pie_figure(counts, palette):
+    adopted, total = counts
+    fig, ax = _new_figure((4.8, 4.2), palette)
+    _, _, autotexts = ax.pie(
+        [adopted, total - adopted], labels=["Implemented", "Not Yet Adopted"], autopct="%1.1f%%",
+        colors=[CA, CG], startangle=90,
+        wedgeprops=dict(edgecolor=palette.bg, linewidth=2.5),
+        textprops=dict(color=palette.txt, fontsize=10))
+    for at in autotexts:
+        at.set_color(palette.txt); at.set_fontsize(10); at.set_fontweight("bold")
+    fig.tight_layout()
+    return fig
+
+
+# ─────────────────────────────────────────────
+#  RENDERING
+# ─────────────────────────────────────────────
+
+_local = threading.local()
+_TEMPLATES = {"radar": _RadarTemplate, "gauge": _GaugeTemplate}
+
+
+def build_figure(name, inputs, palette):
+    """
+    Figure for one chart. Radar and gauge figures are this thread's reusable
+    templates, so they must be rendered before the thread builds the next one.
+    """
+    if name in _TEMPLATES:
+        cache = getattr(_local, "templates", None)
+        if cache is None:
+            cache = _local.templates = {}
+        template = cache.get((name, palette))
+        if template is None:
+            template = cache[(name, palette)] = _TEMPLATES[name](palette)
+        return template.update(*inputs) if name == "gauge" else template.update(inputs)
+    if name == "bar":
+        return _bar_figure(inputs, palette)
+    if name == "pie":
+        return _pie_figure(inputs, palette)
+    raise ValueError(f"unknown chart {name!r}")
+
+
+def render(name, inputs, palette, fmt="png"):
+    """Render one chart to PNG or SVG bytes."""
+    with stage(f"chart.{name}"):
+        fig = build_figure(name, inputs, palette)
+        buf = BytesIO()
+        fig.savefig(buf, format=fmt, facecolor=fig.get_facecolor(), **SAVE_KW)
+        return buf.getvalue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide bounded render pool (size from DTA_CHART_WORKERS, default ≤ 4)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = int(os.environ.get("DTA_CHART_WORKERS", min(4, os.cpu_count() or 1)))
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chart")
+    return _pool
+
+
+def render_many(jobs, palette, fmt="png"):
+    """Render {chart name: inputs} concurrently on the shared pool. Returns {name: bytes}."""
+    futures = {name: get_pool().submit(render, name, inputs, palette, fmt) for name, inputs in jobs.items()}
+    return {name: f.result() for name, f in futures.items()}
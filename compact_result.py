@@ -0,0 +1,186 @@
+# compact_result.py
+# Compact assessment results for the Digital Transformation Advisor
+#
+# An evaluate() dict carries a fresh dict for every fired rule and
+# recommendation. A CompactResult keeps only what identifies the outcome:
+# score, tier and risk as small ints, and the fired rules, recommendations,
+# risk flags and critical gaps as bitsets over the rule program's catalogues.
+# Text and per-rule dicts are resolved from one shared Catalogue only when a
+# field is read. CompactResult is a read-only Mapping with the evaluate() keys,
+# so code written against the dict (app.py, report.py) can use it as is, and
+# as_dict() returns an exact evaluate() dict. ResultStore holds many results
+# column-wise in typed arrays (18 bytes per result).
+
+import array
+from collections.abc import Mapping
+
+from advisor_engine import PROGRAM, RISK_LEVELS, encode_answers, iter_bits
+from incremental_engine import PRIORITY_ORDER, RESULT_FIELDS
+from knowledge_base import MATURITY_LEVELS, RISK_BANDS
+
+
+class Catalogue:
+    """Text and metadata shared by every result of one rule program."""
+
+    def __init__(self, program=PROGRAM):
+        self.program = program
+        self.outcomes = program.outcomes
+        self.outcome_cat = [(o["category"], o["points"]) for o in program.outcomes]
+        self.recommendations = program.recommendations
+        self.rec_rank = [PRIORITY_ORDER[r["priority"]] for r in program.recommendations]
+        self.risk_flags = program.risk_flags
+        self.critical_gaps = program.critical_gaps
+        self.levels = {tier: (level, color) for _, level, color, tier in MATURITY_LEVELS}
+        desc = {level: d for _, level, d in RISK_BANDS}
+        self.risks = [(level, desc[level]) for level in RISK_LEVELS]
+
+
+CATALOGUE = Catalogue()
+
+
+class CompactResult(Mapping):
+
+    __slots__ = ("score", "tier", "risk", "fired", "recs", "flags", "gaps")
+
+    catalogue = CATALOGUE
+
+    def __init__(self, score, tier, risk, fired, recs, flags, gaps):
+        self.score, self.tier, self.risk = score, tier, risk
+        self.fired, self.recs, self.flags, self.gaps = fired, recs, flags, gaps
+
+    @classmethod
+    def from_record(cls, record):
+        """From a RuleProgram.run() record."""
+        score, tier, risk, _, fired, recs, flags, gaps = record
+        return cls(score, tier, risk, fired, recs, flags, gaps)
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls.from_record(cls.catalogue.program.run(mask))
+
+    @classmethod
+    def from_answers(cls, answers):
+        return cls.from_mask(encode_answers(answers))
+
+    # ── fields, resolved on access ───────────────────────────────────
+
+    @property
+    def score_pct(self):
+        return PROGRAM.score_pct[self.score]
+
+    @property
+    def level(self):
+        return self.catalogue.levels[self.tier][0]
+
+    @property
+    def level_color(self):
+        return self.catalogue.levels[self.tier][1]
+
+    @property
+    def risk_level(self):
+        return self.catalogue.risks[self.risk][0]
+
+    @property
+    def risk_description(self):
+        return self.catalogue.risks[self.risk][1]
+
+    @property
+    def risk_flags(self):
+        return [self.catalogue.risk_flags[i] for i in iter_bits(self.flags)]
+
+    @property
+    def critical_gaps(self):
+        return [self.catalogue.critical_gaps[i] for i in iter_bits(self.gaps)]
+
+    @property
+    def recommendations(self):
+        c = self.catalogue
+        return [dict(c.recommendations[i]) for i in sorted(iter_bits(self.recs), key=c.rec_rank.__getitem__)]
+
+    @property
+    def rules_triggered(self):
+        return [dict(self.catalogue.outcomes[i]) for i in iter_bits(self.fired)]
+
+    @property
+    def category_scores(self):
+        scores = {}
+        for i in iter_bits(self.fired):
+            cat, points = self.catalogue.outcome_cat[i]
+            scores[cat] = scores.get(cat, 0) + points
+        return scores
+
+    # ── dict compatibility ───────────────────────────────────────────
+
+    def __getitem__(self, key):
+        if key not in RESULT_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(RESULT_FIELDS)
+
+    def __len__(self):
+        return len(RESULT_FIELDS)
+
+    def as_dict(self):
+        """The exact dict evaluate() returns for this outcome."""
+        return {key: getattr(self, key) for key in RESULT_FIELDS}
+
+    def __eq__(self, other):
+        if isinstance(other, CompactResult):
+            return self._key() == other._key()
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def _key(self):
+        return self.score, self.tier, self.risk, self.fired, self.recs, self.flags, self.gaps
+
+    def __repr__(self):
+        return (f"CompactResult(score={self.score}, tier={self.tier}, risk={self.risk_level}, "
+                f"rules={bin(self.fired).count('1')}, recommendations={bin(self.recs).count('1')})")
+
+
+class ResultStore:
+    """Append-only column store of results; indexing yields CompactResult views."""
+
+    # column typecodes: score, tier, risk, fired, recs, flags, gaps
+    _TYPES = ("H", "B", "B", "Q", "I", "B", "B")
+
+    def __init__(self, program=PROGRAM):
+        widths = (len(program.outcomes), len(program.recommendations),
+                  len(program.risk_flags), len(program.critical_gaps))
+        for bits, code in zip(widths, self._TYPES[3:]):
+            if bits > array.array(code).itemsize * 8:
+                raise ValueError(f"catalogue of {bits} entries does not fit a {code!r} column")
+        self._cols = [array.array(code) for code in self._TYPES]
+
+    def append(self, result):
+        """Add a CompactResult or a RuleProgram.run() record."""
+        if not isinstance(result, CompactResult):
+            result = CompactResult.from_record(result)
+        for col, value in zip(self._cols, result._key()):
+            col.append(value)
+
+    def extend_masks(self, masks):
+        """Evaluate and store answer masks."""
+        run = PROGRAM.run
+        cols = self._cols
+        for mask in masks:
+            score, tier, risk, _, fired, recs, flags, gaps = run(mask)
+            for col, value in zip(cols, (score, tier, risk, fired, recs, flags, gaps)):
+                col.append(value)
+
+    def __len__(self):
+        return len(self._cols[0])
+
+    def __getitem__(self, i):
+        return CompactResult(*(col[i] for col in self._cols))
+
+    def __iter__(self):
+        return (CompactResult(*values) for values in zip(*self._cols))
+
+    @property
+    def nbytes(self):
+        return sum(col.itemsize * len(col) for col in self._cols)
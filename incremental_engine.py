@@ -0,0 +1,177 @@
+# incremental_engine.py
+# Incremental re-evaluation for the Digital Transformation Advisor
+#
+# Keeps one assessment live between reruns. A dependency index maps every
+# answer key to the rules that read it (e.g. leadership -> rules 19, 21, 25).
+# When answers change, only those rules are re-run: their packed contributions
+# (see RuleProgram.rule_tables) are swapped in the running total, and only the
+# result fields whose inputs moved are rebuilt. update() reports which
+# evaluate() fields changed so downstream rendering can skip the rest.
+#
+# Given a result_table.ResultTable, full evaluations (the initial build, and
+# updates that touch more than half of the rules) take the run() record from
+# the table instead of unpacking the recomputed total.
+
+import instrumentation
+from advisor_engine import (
+    PROGRAM, QUESTION_KEYS, RISK_LEVELS,
+    encode_answers, iter_bits, maturity_level,
+)
+from instrumentation import stage
+from knowledge_base import RISK_BANDS
+
+RESULT_FIELDS = (
+    "score", "score_pct", "level", "level_color", "tier", "risk_level",
+    "risk_description", "risk_flags", "critical_gaps", "recommendations",
+    "rules_triggered", "category_scores",
+)
+
+PRIORITY_ORDER = {"Critical": 0, "Important": 1, "Optional": 2}
+_RISK_DESCRIPTIONS = {level: desc for _, level, desc in RISK_BANDS}
+
+# run() record position -> evaluate() fields derived from it
+_RECORD_FIELDS = {
+    0: ("score", "score_pct"),
+    1: ("level", "level_color", "tier"),
+    2: ("risk_level", "risk_description"),
+    4: ("rules_triggered",),
+    5: ("recommendations",),
+    6: ("risk_flags",),
+    7: ("critical_gaps",),
+}
+
+
+class IncrementalAdvisor:
+
+    def __init__(self, answers=None, program=PROGRAM, table=None):
+        """
+        answers: initial {key: 0/1} dict (missing keys count as No)
+        program: compiled RuleProgram to evaluate against
+        table:   optional result_table.ResultTable generated from the same program
+        """
+        self.program = program
+        self.table = table
+        self.mask = encode_answers(answers or {})
+        self._bit_rules = [
+            [i for i, (care, _) in enumerate(program.rule_tables) if (care >> bit) & 1]
+            for bit in range(len(QUESTION_KEYS))
+        ]
+        if instrumentation.ENABLED:           # separate probe, outside the stage timers
+            instrumentation.probe_blocks(program, self.mask)
+        with stage("engine.incremental_build"):
+            self._contrib = [table[self.mask & care] for care, table in program.rule_tables]
+            self._total = sum(self._contrib)
+            self.record = self._full_record(self.mask)
+            self.result = self._build(self.record, RESULT_FIELDS)
+        self.rules_evaluated = len(self._contrib)     # rules re-run by the last update
+
+    # ─────────────────────────────────────────────
+    #  DEPENDENCY INDEX
+    # ─────────────────────────────────────────────
+
+    @property
+    def dependency_index(self):
+        """{answer key: [rule ids]} — which rules read each answer."""
+        return {key: [self.program.rules[i]["id"] for i in self._bit_rules[bit]]
+                for bit, key in enumerate(QUESTION_KEYS)}
+
+    def affected_rules(self, keys):
+        """Rule ids that must be re-run when any of `keys` changes."""
+        idx = set()
+        for key in keys:
+            idx.update(self._bit_rules[QUESTION_KEYS.index(key)])
+        return [self.program.rules[i]["id"] for i in sorted(idx)]
+
+    # ─────────────────────────────────────────────
+    #  UPDATES
+    # ─────────────────────────────────────────────
+
+    def update(self, answers):
+        """Move to a new full answers dict. Returns the set of changed result fields."""
+        return self.apply_mask(encode_answers(answers))
+
+    def set_answer(self, key, value):
+        """Change a single answer. Returns the set of changed result fields."""
+        bit = 1 << QUESTION_KEYS.index(key)
+        return self.apply_mask(self.mask | bit if value else self.mask & ~bit)
+
+    def apply_mask(self, mask):
+        if instrumentation.ENABLED and mask != self.mask:
+            instrumentation.probe_blocks(self.program, mask)
+        with stage("engine.incremental_update"):
+            return self._apply_mask(mask)
+
+    def _apply_mask(self, mask):
+        delta = mask ^ self.mask
+        self.mask = mask
+        if not delta:
+            self.rules_evaluated = 0
+            return set()
+
+        touched = set()
+        for bit in iter_bits(delta):
+            touched.update(self._bit_rules[bit])
+        total = self._total
+        for i in touched:
+            care, table = self.program.rule_tables[i]
+            new = table[mask & care]
+            total += new - self._contrib[i]
+            self._contrib[i] = new
+        self._total = total
+        self.rules_evaluated = len(touched)
+
+        full = 2 * len(touched) > len(self._contrib)
+        old, new = self.record, self._full_record(mask) if full else self.program.unpack(total)
+        self.record = new
+        changed = set()
+        for pos, fields in _RECORD_FIELDS.items():
+            if old[pos] != new[pos]:
+                changed.update(fields)
+        if old[3] != new[3] or "rules_triggered" in changed:
+            changed.add("category_scores")
+        patch = self._build(new, changed)
+        if patch.get("category_scores") == self.result["category_scores"]:
+            changed.discard("category_scores")
+            del patch["category_scores"]
+        self.result = {**self.result, **patch}
+        return changed
+
+    # ─────────────────────────────────────────────
+    #  RESULT FIELDS
+    # ─────────────────────────────────────────────
+
+    def _full_record(self, mask):
+        """run() record of a full evaluation: a table read when there is a table."""
+        return self.table.lookup(mask) if self.table is not None else self.program.unpack(self._total)
+
+    def _build(self, record, fields):
+        """Materialise the requested evaluate() fields from a run() record."""
+        score, tier, risk, _, fired, recs, flags, gaps = record
+        p = self.program
+        out = {}
+        if "score" in fields:
+            out["score"] = score
+            out["score_pct"] = p.score_pct[score]
+        if "tier" in fields:
+            out["level"], out["level_color"], out["tier"] = maturity_level(score)
+        if "risk_level" in fields:
+            out["risk_level"] = RISK_LEVELS[risk]
+            out["risk_description"] = _RISK_DESCRIPTIONS[out["risk_level"]]
+        if "risk_flags" in fields:
+            out["risk_flags"] = [p.risk_flags[i] for i in iter_bits(flags)]
+        if "critical_gaps" in fields:
+            out["critical_gaps"] = [p.critical_gaps[i] for i in iter_bits(gaps)]
+        if "recommendations" in fields:
+            out["recommendations"] = sorted(
+                (dict(p.recommendations[i]) for i in iter_bits(recs)),
+                key=lambda r: PRIORITY_ORDER[r["priority"]])
+        if "rules_triggered" in fields or "category_scores" in fields:
+            rule_log = [dict(p.outcomes[i]) for i in iter_bits(fired)]
+            if "rules_triggered" in fields:
+                out["rules_triggered"] = rule_log
+            if "category_scores" in fields:
+                cat_scores = {}
+                for r in rule_log:
+                    cat_scores[r["category"]] = cat_scores.get(r["category"], 0) + r["points"]
+                out["category_scores"] = cat_scores
+        return out
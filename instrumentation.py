@@ -0,0 +1,238 @@
+# instrumentation.py
+# Opt-in timing instrumentation for the Digital Transformation Advisor
+#
+# Code paths are wrapped in `with stage("engine.apply_rules"):` blocks. While
+# instrumentation is disabled (the default) stage() returns one shared no-op
+# context manager, so the cost is a global flag test. When enabled, each stage
+# records wall time and thread CPU time into an in-process histogram
+# registry. A separate probe, run outside the stage timers, times the engine's
+# compiled lookup of each rule block (dta_block_probe_seconds); it is not a
+# breakdown of any stage. The registry can be dumped to a JSON file or served
+# in Prometheus text format.
+#
+# Enable with DTA_INSTRUMENT=1 (or enable()); DTA_METRICS_FILE=path dumps the
+# registry at exit and DTA_METRICS_PORT=9108 serves /metrics over HTTP.
+
+import atexit
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("DTA_INSTRUMENT", "") not in ("", "0")
+
+# histogram bucket upper bounds in seconds (1 µs .. 10 s)
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+           1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "dta_stage_wall_seconds": ("stage", "Wall-clock time per processing stage"),
+    "dta_stage_cpu_seconds": ("stage", "Thread CPU time per processing stage"),
+    "dta_block_probe_seconds": ("block", "Probe, not a stage breakdown: compiled lookup time of each rule block"),
+}
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+# ─────────────────────────────────────────────
+#  HISTOGRAM REGISTRY
+# ─────────────────────────────────────────────
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus cumulative layout on export)."""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)      # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bucket bound containing quantile q (0..1)."""
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}                           # (metric, label value) -> Histogram
+
+    def observe(self, metric, label, value):
+        with self._lock:
+            hist = self._series.get((metric, label))
+            if hist is None:
+                hist = self._series[(metric, label)] = Histogram()
+            hist.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """{metric: {label: {"count", "sum", "p50", "p99", "buckets"}}}"""
+        with self._lock:
+            items = sorted(self._series.items(), key=lambda kv: (kv[0][0], _label_order(kv[0][1])))
+            out = {}
+            for (metric, label), h in items:
+                out.setdefault(metric, {})[label] = {
+                    "count": h.count, "sum": h.sum,
+                    "p50": h.quantile(0.5), "p99": h.quantile(0.99),
+                    "buckets": list(h.counts),
+                }
+            return out
+
+    def prometheus(self):
+        """Registry in Prometheus text exposition format."""
+        lines = []
+        snap = self.snapshot()
+        bounds = [repr(b) for b in BUCKETS] + ["+Inf"]
+        for metric, series in snap.items():
+            label_name, help_text = METRICS.get(metric, ("label", metric))
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for label, h in series.items():
+                lv = str(label).replace("\\", "\\\\").replace('"', '\\"')
+                cumulative = 0
+                for bound, n in zip(bounds, h["buckets"]):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{label_name}="{lv}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label_name}="{lv}"}} {h["sum"]!r}')
+                lines.append(f'{metric}_count{{{label_name}="{lv}"}} {h["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write the snapshot as JSON (atomically)."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"buckets": list(BUCKETS), "metrics": self.snapshot()}, f, indent=2)
+        os.replace(tmp, path)
+
+
+def _label_order(label):
+    return (0, label, "") if isinstance(label, int) else (1, 0, str(label))
+
+
+REGISTRY = Registry()
+
+
+# ─────────────────────────────────────────────
+#  TIMERS
+# ─────────────────────────────────────────────
+
+class _Stage:
+
+    __slots__ = ("name", "wall", "cpu")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        cpu = time.thread_time() - self.cpu
+        wall = time.perf_counter() - self.wall
+        REGISTRY.observe("dta_stage_wall_seconds", self.name, wall)
+        REGISTRY.observe("dta_stage_cpu_seconds", self.name, cpu)
+        return False
+
+
+_NOOP = contextlib.nullcontext()
+
+
+def stage(name):
+    """Context manager timing a named stage; a shared no-op while disabled."""
+    if not ENABLED:
+        return _NOOP
+    return _Stage(name)
+
+
+def probe_blocks(program, mask):
+    """
+    Time each rule block's compiled lookup for an answer mask, the work
+    RuleProgram.run() does (enabled only). Call it outside any stage() so the
+    probe is not charged to the stage it describes.
+    """
+    clock = time.perf_counter
+    for index, block in enumerate(program.blocks):
+        t = clock()
+        program.block_packed(index, mask)
+        REGISTRY.observe("dta_block_probe_seconds", f"bits {block.bits[0]}-{block.bits[-1]}", clock() - t)
+
+
+# ─────────────────────────────────────────────
+#  EXPORT
+# ─────────────────────────────────────────────
+
+_server = None
+_configure_lock = threading.Lock()
+_dump_registered = False
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve GET /metrics in Prometheus text format on a daemon thread. Returns the server."""
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    _server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
+
+
+def configure_from_env():
+    """Start the /metrics endpoint and exit-time dump requested by the environment (once)."""
+    global _dump_registered
+    if not ENABLED:
+        return
+    with _configure_lock:
+        port = os.environ.get("DTA_METRICS_PORT")
+        if port and _server is None:
+            try:
+                serve(int(port))
+            except OSError:
+                pass                # another worker process already serves this port
+        path = os.environ.get("DTA_METRICS_FILE")
+        if path and not _dump_registered:
+            atexit.register(REGISTRY.dump, path)
+            _dump_registered = True
@@ -0,0 +1,325 @@
+# knowledge_base.py
+# Small Business Digital Transformation Advisor - Declarative Knowledge Base
+# Knowledge derived from McKinsey Digital Maturity Framework (2023),
+# Gartner IT Maturity Model (2024), and EU SME Digital Index (2023)
+#
+# The questionnaire, the 25 production rules and the maturity / risk bands are
+# plain data. advisor_engine compiles RULES once at import; adding a rule here
+# is all that is needed for it to appear in scoring, the UI and the report.
+
+# ─────────────────────────────────────────────
+#  DIAGNOSTIC QUESTIONS
+# ─────────────────────────────────────────────
+
+# (key, category, icon, question) — order defines the answer-mask bit layout
+QUESTIONS = [
+    ("cloud","Infrastructure","☁️","Does your business use cloud computing (e.g. AWS, Azure, Google Cloud, Microsoft 365)?"),
+    ("security","Infrastructure","🔒","Are active cybersecurity measures in place (firewall, antivirus, MFA, security audits)?"),
+    ("backup","Infrastructure","💾","Are automated data backups maintained on a regular schedule?"),
+    ("mobile_access","Infrastructure","📱","Can employees access business systems securely via mobile devices?"),
+    ("analytics","Data & Intelligence","📊","Does your business use data analytics tools to support decision-making?"),
+    ("data_management","Data & Intelligence","🗄️","Is business data stored and managed in a centralised, organised system?"),
+    ("performance_tracking","Data & Intelligence","📈","Are business KPIs and performance metrics tracked through digital tools?"),
+    ("automation","Automation & AI","⚙️","Are any repetitive business processes automated (e.g. invoicing, stock alerts, scheduling)?"),
+    ("ai_tools","Automation & AI","🤖","Does your business use any AI-powered tools (chatbots, predictive analytics, AI assistants)?"),
+    ("agile","Automation & AI","🔄","Does your team use agile or iterative project management methods (Scrum, Kanban)?"),
+    ("crm","Customer & Market","👥","Do you use a CRM system to manage customer relationships and sales pipelines?"),
+    ("customer_platform","Customer & Market","🌐","Do customers interact with your business through a digital platform (website, app, portal)?"),
+    ("digital_marketing","Customer & Market","📣","Do you actively use digital marketing channels (SEO, email, social media, paid ads)?"),
+    ("strategy","Strategy & Governance","🎯","Does your business have a documented digital transformation strategy or roadmap?"),
+    ("leadership","Strategy & Governance","👔","Does senior leadership actively champion and invest in digital transformation?"),
+    ("governance","Strategy & Governance","📋","Are formal IT governance policies defined (data privacy, access control, compliance)?"),
+    ("training","People & Collaboration","🎓","Do employees receive structured training on digital tools and skills?"),
+    ("collaboration","People & Collaboration","💬","Do teams use digital collaboration platforms (Teams, Slack, Notion, Google Workspace)?"),
+    ("remote_work","People & Collaboration","🏠","Does your business have the infrastructure to support remote or hybrid working?"),
+]
+
+QUESTION_KEYS = tuple(q[0] for q in QUESTIONS)
+CATEGORIES = tuple(dict.fromkeys(q[1] for q in QUESTIONS))
+PRIORITIES = ("Critical", "Important", "Optional")
+
+
+# ─────────────────────────────────────────────
+#  BUSINESS PROFILE
+# ─────────────────────────────────────────────
+
+# profile field -> options offered by the questionnaire (stored with saved assessments)
+PROFILE_OPTIONS = {
+    "company_size": ("Micro (1–9 staff)", "Small (10–49 staff)", "Medium (50–249 staff)"),
+    "industry": ("Retail / E-Commerce", "Healthcare", "Manufacturing", "Financial Services",
+                 "Hospitality / Tourism", "Professional Services", "Other"),
+    "budget": ("Under £5,000", "£5,000 – £20,000", "£20,000 – £100,000", "Over £100,000"),
+    "years": ("Less than 2 years", "2–5 years", "6–15 years", "Over 15 years"),
+}
+
+# representative annual digital budget (GBP) for each budget band
+BUDGET_AMOUNTS = {
+    "Under £5,000": 4_000,
+    "£5,000 – £20,000": 12_500,
+    "£20,000 – £100,000": 60_000,
+    "Over £100,000": 150_000,
+}
+
+
+# ─────────────────────────────────────────────
+#  CAPABILITY COSTS
+# ─────────────────────────────────────────────
+
+# question key -> (indicative first-year cost in GBP, implementation effort in person-weeks)
+# of putting the capability in place in a small business; used by the roadmap optimiser
+CAPABILITY_COSTS = {
+    "cloud": (3_000, 2),
+    "security": (2_500, 2),
+    "backup": (1_000, 1),
+    "mobile_access": (1_500, 2),
+    "analytics": (4_000, 4),
+    "data_management": (5_000, 6),
+    "performance_tracking": (2_000, 3),
+    "automation": (6_000, 6),
+    "ai_tools": (3_000, 3),
+    "agile": (1_500, 4),
+    "crm": (4_000, 4),
+    "customer_platform": (8_000, 8),
+    "digital_marketing": (3_000, 3),
+    "strategy": (2_500, 4),
+    "leadership": (1_000, 2),
+    "governance": (2_000, 4),
+    "training": (3_000, 6),
+    "collaboration": (1_000, 1),
+    "remote_work": (2_500, 3),
+}
+
+# ─────────────────────────────────────────────
+#  MATURITY AND RISK BANDS
+# ─────────────────────────────────────────────
+
+# (minimum score, level, colour, tier) — highest band first
+MATURITY_LEVELS = [
+    (72, "Advanced Digital Business", "#27ae60", 3),
+    (42, "Developing Digital Business", "#f39c12", 2),
+    (0, "Early Stage Digital Business", "#e74c3c", 1),
+]
+
+# (minimum number of Critical recommendations, risk level, description) — highest band first
+RISK_BANDS = [
+    (4, "HIGH", "Multiple critical gaps identified. Immediate action required to avoid operational and competitive risk."),
+    (2, "MEDIUM", "Some critical weaknesses present. Address priority items within the next 6 months."),
+    (0, "LOW", "Organisation shows solid digital foundations. Focus on optimisation and innovation."),
+]
+
+
+# ─────────────────────────────────────────────
+#  RULE DEFINITION HELPERS
+# ─────────────────────────────────────────────
+
+def when(*yes, no=(), points=0, log=None, rec=None, risk=None, gap=None):
+    """
+    One branch of a rule. Fires when every key in yes is answered Yes and every
+    key in no is answered No; the first matching branch of a rule wins.
+      log  – rule-trace description (None: the branch adds nothing to the trace)
+      rec  – (priority, text) recommendation in the rule's category
+      risk – risk flag text, gap – critical gap label
+    """
+    return {"yes": tuple(yes), "no": tuple(no), "points": points,
+            "description": log, "rec": rec, "risk_flag": risk, "critical_gap": gap}
+
+
+def otherwise(**outcome):
+    """Fallback branch — matches whenever no earlier branch of the rule did."""
+    return when(**outcome)
+
+
+def rule(rule_id, category, *branches):
+    return {"id": rule_id, "category": category, "branches": list(branches)}
+
+
+# ─────────────────────────────────────────────
+#  25 EXPERT RULES
+# ─────────────────────────────────────────────
+
+RULES = [
+
+    # ── INFRASTRUCTURE (Rules 1–5) ──────────────────────────────────
+
+    # Rule 1: Cloud adoption
+    rule(1, "Infrastructure",
+        when("cloud", points=6, log="Cloud infrastructure adopted — scalability and remote access enabled."),
+        otherwise(log="No cloud adoption — critical scalability gap identified.",
+            rec=("Critical", "Migrate to cloud infrastructure (e.g. AWS, Azure, Google Cloud). "
+                 "Even a free-tier start reduces hardware costs and improves resilience."),
+            gap="Cloud Infrastructure")),
+
+    # Rule 2: Cybersecurity practices
+    rule(2, "Infrastructure",
+        when("security", points=6, log="Active cybersecurity measures — operational risk is controlled."),
+        otherwise(log="No cybersecurity — high risk of data breach and legal liability.",
+            rec=("Critical", "Implement cybersecurity baseline: firewall, endpoint protection, MFA, "
+                 "and regular security audits. GDPR non-compliance can result in heavy fines."),
+            risk="Cybersecurity Gap — HIGH RISK",
+            gap="Cybersecurity")),
+
+    # Rule 3: Automated backup systems
+    rule(3, "Infrastructure",
+        when("backup", points=4, log="Automated backups maintained — data loss risk minimised."),
+        otherwise(log="No backup system — data loss risk is significant.",
+            rec=("Critical", "Set up automated daily backups using cloud storage (e.g. Backblaze, AWS S3). "
+                 "Data loss can permanently cripple a small business."),
+            risk="No Backup System — DATA LOSS RISK")),
+
+    # Rule 4: Cloud + Security compound rule
+    rule(4, "Infrastructure",
+        when("cloud", "security", points=4,
+            log="Cloud AND Security active — infrastructure maturity is strong. Bonus awarded."),
+        when(no=("cloud", "security"),
+            log="Neither cloud nor security implemented — infrastructure critically underdeveloped.",
+            risk="Infrastructure foundations completely absent")),
+
+    # Rule 5: Mobile access to systems
+    rule(5, "Infrastructure",
+        when("mobile_access", points=3, log="Mobile-accessible systems — workforce flexibility supported."),
+        otherwise(log="No mobile access — workforce agility is restricted.",
+            rec=("Important", "Enable mobile access to key business systems. "
+                 "Remote and field teams require mobile-ready tools to remain productive."))),
+
+    # ── DATA & INTELLIGENCE (Rules 6–9) ─────────────────────────────
+
+    # Rule 6: Data analytics usage
+    rule(6, "Data & Intelligence",
+        when("analytics", points=5, log="Data analytics in use — decisions are evidence-based."),
+        otherwise(log="No analytics — decisions are likely based on intuition, reducing accuracy.",
+            rec=("Important", "Adopt business intelligence tools (e.g. Google Looker Studio, Power BI). "
+                 "Data-driven decisions improve revenue by up to 23% (McKinsey, 2023)."))),
+
+    # Rule 7: Centralised data management
+    rule(7, "Data & Intelligence",
+        when("data_management", points=4,
+            log="Centralised data management — data accessibility and quality are ensured."),
+        otherwise(log="Data is siloed — inconsistency and duplication likely.",
+            rec=("Important", "Implement a centralised data warehouse or cloud database. "
+                 "Data silos prevent analytics and slow operational decisions."))),
+
+    # Rule 8: Performance tracking tools
+    rule(8, "Data & Intelligence",
+        when("performance_tracking", points=3,
+            log="Digital performance tracking active — KPIs are visible and actionable."),
+        otherwise(log="No performance tracking — business health is not measurable.",
+            rec=("Important", "Deploy KPI dashboards to track sales, customer satisfaction, and operational metrics in real time."))),
+
+    # Rule 9: Analytics + Data Management compound
+    rule(9, "Data & Intelligence",
+        when("analytics", "data_management", points=4,
+            log="Analytics AND centralised data both present — full data intelligence capability achieved.")),
+
+    # ── AUTOMATION & AI (Rules 10–13) ────────────────────────────────
+
+    # Rule 10: Business process automation
+    rule(10, "Automation & AI",
+        when("automation", points=5, log="Process automation adopted — manual workload significantly reduced."),
+        otherwise(log="No automation — staff are overloaded with repetitive tasks.",
+            rec=("Important", "Automate repetitive workflows using tools like Zapier or Microsoft Power Automate. "
+                 "SMEs recover 20+ hours/week through basic automation."))),
+
+    # Rule 11: AI in operations
+    rule(11, "Automation & AI",
+        when("ai_tools", points=5, log="AI tools in operations — predictive capability and efficiency enhanced."),
+        otherwise(log="No AI adoption — competitive disadvantage growing as AI becomes standard.",
+            rec=("Optional", "Explore AI tools for customer service (chatbots), inventory prediction, or marketing automation. "
+                 "Many are affordable for SMEs (e.g. HubSpot AI, Tidio)."))),
+
+    # Rule 12: Automation + AI compound — high maturity signal
+    rule(12, "Automation & AI",
+        when("automation", "ai_tools", points=5,
+            log="Automation AND AI both implemented — highest operational efficiency tier reached.")),
+
+    # Rule 13: Agile methodologies used
+    rule(13, "Automation & AI",
+        when("agile", points=3, log="Agile methods adopted — adaptability and project delivery speed improved."),
+        otherwise(rec=("Optional", "Adopt agile project management (Scrum or Kanban) to improve team responsiveness and delivery cycles."))),
+
+    # ── CUSTOMER & MARKET (Rules 14–17) ──────────────────────────────
+
+    # Rule 14: CRM system
+    rule(14, "Customer & Market",
+        when("crm", points=5, log="CRM system in use — customer relationships are systematically managed."),
+        otherwise(log="No CRM — customer data is likely scattered, losing revenue opportunities.",
+            rec=("Critical", "Implement a CRM system (e.g. HubSpot Free, Zoho CRM). "
+                 "CRM adoption increases customer retention by up to 27% (Gartner, 2024)."),
+            gap="CRM System")),
+
+    # Rule 15: Digital customer platform/portal
+    rule(15, "Customer & Market",
+        when("customer_platform", points=4, log="Digital customer platform active — customer accessibility enhanced."),
+        otherwise(log="No digital customer channel — customer experience is limited to offline.",
+            rec=("Important", "Build a customer-facing digital portal or website with self-service capability."))),
+
+    # Rule 16: Digital marketing
+    rule(16, "Customer & Market",
+        when("digital_marketing", points=3, log="Digital marketing in use — customer reach is extended online."),
+        otherwise(log="No digital marketing — growth potential is severely limited.",
+            rec=("Important", "Invest in digital marketing: SEO, email campaigns, and social media. "
+                 "Cost-effective tools include Mailchimp and Google Ads."))),
+
+    # Rule 17: CRM + Digital Marketing compound — full customer lifecycle
+    rule(17, "Customer & Market",
+        when("crm", "digital_marketing", points=4,
+            log="CRM AND digital marketing combined — full customer acquisition-to-retention loop operational.")),
+
+    # ── STRATEGY & GOVERNANCE (Rules 18–21) ──────────────────────────
+
+    # Rule 18: Defined digital strategy
+    rule(18, "Strategy & Governance",
+        when("strategy", points=5, log="Digital strategy defined — transformation has clear direction and milestones."),
+        otherwise(log="No digital strategy — investment risks being wasted without direction.",
+            rec=("Critical", "Develop a 12-month digital transformation roadmap. "
+                 "Define goals, budget allocation, and success metrics before investing in tools."),
+            gap="Digital Strategy")),
+
+    # Rule 19: Leadership support
+    rule(19, "Strategy & Governance",
+        when("leadership", points=4,
+            log="Leadership actively supports digital transformation — organisational alignment ensured."),
+        otherwise(log="No leadership buy-in — transformation initiatives are likely to stall.",
+            rec=("Critical", "Secure executive sponsorship for digital transformation. "
+                 "Without leadership alignment, 70% of transformation programmes fail (McKinsey, 2023)."),
+            risk="No Leadership Buy-In — TRANSFORMATION RISK")),
+
+    # Rule 20: IT governance defined
+    rule(20, "Strategy & Governance",
+        when("governance", points=3,
+            log="IT governance in place — technology investments are controlled and compliant."),
+        otherwise(rec=("Optional", "Establish basic IT governance policies covering data privacy, software licensing, and access control."))),
+
+    # Rule 21: Strategy + Leadership compound
+    rule(21, "Strategy & Governance",
+        when("strategy", "leadership", points=4,
+            log="Strategy AND leadership aligned — transformation success probability significantly elevated.")),
+
+    # ── PEOPLE & COLLABORATION (Rules 22–25) ─────────────────────────
+
+    # Rule 22: Employee digital training
+    rule(22, "People & Collaboration",
+        when("training", points=4,
+            log="Digital training programme active — workforce capability continuously improving."),
+        otherwise(log="No digital training — tools adopted without skilled users will underperform.",
+            rec=("Important", "Invest in structured digital skills training. "
+                 "Platforms like Google Digital Garage and LinkedIn Learning offer free SME-focused courses."))),
+
+    # Rule 23: Digital collaboration tools
+    rule(23, "People & Collaboration",
+        when("collaboration", points=3,
+            log="Digital collaboration tools in use — team coordination and communication are efficient."),
+        otherwise(log="No collaboration tools — team efficiency is impaired.",
+            rec=("Important", "Adopt collaboration platforms (e.g. Microsoft Teams, Slack, Notion) to improve team communication and productivity."))),
+
+    # Rule 24: Remote work capability
+    rule(24, "People & Collaboration",
+        when("remote_work", points=3, log="Remote work infrastructure in place — business continuity is protected."),
+        otherwise(rec=("Optional", "Enable remote working capability to attract talent and ensure business continuity during disruptions."))),
+
+    # Rule 25: Training + Collaboration + Leadership — triple maturity compound rule
+    rule(25, "People & Collaboration",
+        when("training", "collaboration", "leadership", points=5,
+            log="Training, Collaboration AND Leadership all present — people-led digital culture fully established. Maximum people maturity bonus awarded."),
+        when("training", "collaboration", points=2,
+            log="Training and Collaboration present — strong people capability, but leadership alignment is still needed.")),
+]
@@ -0,0 +1,174 @@
+# load_client.py
+# Load generator for scoring_service.py
+#
+# Opens --concurrency keep-alive connections to the service and sends
+# --requests assessments (or batches of --batch records) with seeded random
+# answers, then reports throughput, latency percentiles and error counts.
+# With --spawn it starts the service itself on a free localhost port, so a
+# full round trip can be exercised with one command.
+#
+# Usage:  python load_client.py --spawn --workers 2 --requests 20000 --concurrency 64
+#         python load_client.py --port 8080 --batch 1000 --requests 50
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+
+from advisor_engine import ANSWER_SPACE, QUESTION_KEYS, decode_mask
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class Connection:
+    """One persistent HTTP/1.1 connection (Content-Length and chunked responses)."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            parts = []
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                data = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                parts.append(data[:-2])
+            payload = b"".join(parts)
+        else:
+            payload = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, payload
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+def _record(rng):
+    answers = decode_mask(rng.randrange(ANSWER_SPACE))
+    return {"answers": {k: "Yes" if answers[k] else "No" for k in QUESTION_KEYS}}
+
+
+async def run_load(host, port, requests, concurrency, batch=0, seed=6008, check=False):
+    """Returns (elapsed seconds, latencies, error count, records scored)."""
+    rng = random.Random(seed)
+    if batch:
+        path = "/v1/assess/batch"
+        bodies = [json.dumps({"records": [_record(rng) for _ in range(batch)]}).encode() for _ in range(min(requests, 32))]
+    else:
+        path = "/v1/assess"
+        bodies = [json.dumps(_record(rng)).encode() for _ in range(min(requests, 4096))]
+    queue = iter(range(requests))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        conn = Connection(host, port)
+        for i in queue:
+            t = time.perf_counter()
+            try:
+                status, payload = await conn.request("POST", path, bodies[i % len(bodies)])
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                errors += 1
+                await conn.close()
+                continue
+            latencies.append(time.perf_counter() - t)
+            if status != 200:
+                errors += 1
+            elif check:
+                result = json.loads(payload)
+                if len(result if batch else [result]) != (batch or 1):
+                    errors += 1
+        await conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, errors, requests * (batch or 1)
+
+
+async def _summary_metrics(host, port):
+    """Non-bucket lines of the service's /metrics (one worker's view)."""
+    conn = Connection(host, port)
+    _, payload = await conn.request("GET", "/metrics")
+    await conn.close()
+    return "".join(line + "\n" for line in payload.decode().splitlines()
+                   if line and not line.startswith("#") and "_bucket{" not in line)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))] if values else 0.0
+
+
+def _spawn(workers, extra=()):
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, "scoring_service.py"), "--port", "0",
+                             "--workers", str(workers), *extra], stderr=subprocess.PIPE, text=True)
+    line = proc.stderr.readline()           # "listening on http://host:port (...)"
+    if not line.startswith("listening on"):
+        proc.kill()
+        raise SystemExit(f"service failed to start: {line}{proc.stderr.read()}")
+    host, port = line.split("//")[1].split()[0].rsplit(":", 1)
+    return proc, host, int(port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate load against the scoring service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--spawn", action="store_true", help="start scoring_service.py on a free local port")
+    parser.add_argument("--workers", type=int, default=1, help="service workers when using --spawn")
+    parser.add_argument("--service-args", default="", help="extra scoring_service.py options when using --spawn")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch", type=int, default=0, help="records per request (0: single-assessment endpoint)")
+    parser.add_argument("--check", action="store_true", help="parse every response and count malformed ones as errors")
+    parser.add_argument("--metrics", action="store_true", help="print the service's summary metrics afterwards")
+    args = parser.parse_args(argv)
+
+    proc, metrics = None, ""
+    host, port = args.host, args.port
+    if args.spawn:
+        proc, host, port = _spawn(args.workers, shlex.split(args.service_args))
+    try:
+        elapsed, latencies, errors, records = asyncio.run(
+            run_load(host, port, args.requests, args.concurrency, args.batch, check=args.check))
+        if args.metrics:
+            metrics = asyncio.run(_summary_metrics(host, port))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+    print(f"{args.requests} requests ({records} records) in {elapsed:.2f}s — "
+          f"{args.requests / elapsed:,.0f} req/s, {records / elapsed:,.0f} records/s, {errors} errors")
+    print(f"latency: p50 {_percentile(latencies, 50) * 1000:.2f} ms, "
+          f"p99 {_percentile(latencies, 99) * 1000:.2f} ms, max {max(latencies, default=0) * 1000:.2f} ms")
+    print(metrics, end="")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
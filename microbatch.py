@@ -0,0 +1,152 @@
+# microbatch.py
+# Micro-batching scheduler for concurrent scoring requests
+#
+# Callers await submit(item). Items are held until either max_batch of them
+# are waiting or max_wait seconds have passed since the first one arrived,
+# then the whole batch goes through one call of the batch function and each
+# caller's future is resolved with its own result. The window trades a little
+# latency for fewer, larger engine passes; the metrics (queue depth, batch
+# size distribution, added latency, flush reasons) are there to tune it.
+
+import asyncio
+import time
+from collections import Counter
+
+from instrumentation import BUCKETS, Histogram
+
+
+class MicroBatcher:
+
+    def __init__(self, fn, max_batch=64, max_wait=0.002, executor=None):
+        """
+        fn:        list of items -> list of results (same order and length)
+        max_batch: flush as soon as this many items are waiting
+        max_wait:  flush this many seconds after the first item of a batch arrived
+        executor:  run fn there instead of on the event loop (None: inline)
+        """
+        if max_batch < 1 or max_wait < 0:
+            raise ValueError("max_batch must be >= 1 and max_wait >= 0")
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = executor
+        self._pending = []              # (item, future, enqueued at)
+        self._timer = None
+        self._inflight = 0              # batches handed to the executor, not finished
+        # metrics
+        self.submitted = 0
+        self.batches = 0
+        self.batch_sizes = Counter()    # exact size -> number of batches
+        self.flush_reasons = Counter()  # "size" | "window"
+        self.added_latency = Histogram()    # enqueue -> batch start, seconds
+        self.batch_seconds = Histogram()    # time spent in fn per batch
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self):
+        """Items waiting for a batch right now."""
+        return len(self._pending)
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        self.submitted += 1
+        if len(self._pending) > self.max_queue_depth:
+            self.max_queue_depth = len(self._pending)
+        if len(self._pending) >= self.max_batch:
+            self._flush("size")
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, "window")
+        return await future
+
+    def _flush(self, reason):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        start = time.perf_counter()
+        self.batches += 1
+        self.batch_sizes[len(batch)] += 1
+        self.flush_reasons[reason] += 1
+        for _, _, enqueued in batch:
+            self.added_latency.observe(start - enqueued)
+        items = [item for item, _, _ in batch]
+        if self.executor is None:
+            try:
+                results = self.fn(items)
+            except Exception as exc:
+                results, error = None, exc
+            else:
+                error = None
+            self.batch_seconds.observe(time.perf_counter() - start)
+            self._resolve(batch, results, error)
+        else:
+            self._inflight += 1
+            task = asyncio.get_running_loop().run_in_executor(self.executor, self.fn, items)
+            task.add_done_callback(lambda t: self._done(batch, start, t))
+
+    def _done(self, batch, start, task):
+        self._inflight -= 1
+        self.batch_seconds.observe(time.perf_counter() - start)
+        error = task.exception()
+        self._resolve(batch, None if error else task.result(), error)
+
+    @staticmethod
+    def _resolve(batch, results, error):
+        if error is None and len(results) != len(batch):
+            error = RuntimeError(f"batch function returned {len(results)} results for {len(batch)} items")
+        for i, (_, future, _) in enumerate(batch):
+            if future.done():           # caller went away (cancelled)
+                continue
+            if error is None:
+                future.set_result(results[i])
+            else:
+                future.set_exception(error)
+
+    # ─────────────────────────────────────────────
+    #  METRICS
+    # ─────────────────────────────────────────────
+
+    def stats(self):
+        mean = sum(s * n for s, n in self.batch_sizes.items()) / self.batches if self.batches else 0.0
+        return {
+            "max_batch": self.max_batch, "max_wait": self.max_wait,
+            "submitted": self.submitted, "batches": self.batches, "mean_batch_size": mean,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "flush_reasons": dict(self.flush_reasons),
+            "queue_depth": self.queue_depth, "max_queue_depth": self.max_queue_depth,
+            "inflight_batches": self._inflight,
+            "added_latency_p50": self.added_latency.quantile(0.5),
+            "added_latency_p99": self.added_latency.quantile(0.99),
+        }
+
+    def prometheus(self, prefix="dta_microbatch"):
+        """Metrics in Prometheus text exposition format."""
+        lines = [
+            f"# TYPE {prefix}_queue_depth gauge", f"{prefix}_queue_depth {self.queue_depth}",
+            f"# TYPE {prefix}_inflight_batches gauge", f"{prefix}_inflight_batches {self._inflight}",
+            f"# TYPE {prefix}_submitted_total counter", f"{prefix}_submitted_total {self.submitted}",
+            f"# TYPE {prefix}_flushes_total counter",
+        ]
+        lines += [f'{prefix}_flushes_total{{reason="{r}"}} {n}' for r, n in sorted(self.flush_reasons.items())]
+        lines.append(f"# TYPE {prefix}_batch_size histogram")
+        cumulative = 0
+        for size in range(1, self.max_batch + 1):
+            cumulative += self.batch_sizes.get(size, 0)
+            if size & (size - 1) == 0 or size == self.max_batch:       # powers of two and the cap
+                lines.append(f'{prefix}_batch_size_bucket{{le="{size}"}} {cumulative}')
+        lines.append(f'{prefix}_batch_size_bucket{{le="+Inf"}} {self.batches}')
+        lines.append(f"{prefix}_batch_size_sum {sum(s * n for s, n in self.batch_sizes.items())}")
+        lines.append(f"{prefix}_batch_size_count {self.batches}")
+        for name, hist in (("added_latency_seconds", self.added_latency), ("batch_seconds", self.batch_seconds)):
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            cumulative = 0
+            for bound, n in zip([repr(b) for b in BUCKETS] + ["+Inf"], hist.counts):
+                cumulative += n
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{prefix}_{name}_sum {hist.sum!r}")
+            lines.append(f"{prefix}_{name}_count {hist.count}")
+        return "\n".join(lines) + "\n"
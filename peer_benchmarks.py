@@ -0,0 +1,391 @@
+# peer_benchmarks.py
+# Peer benchmarking for the Digital Transformation Advisor
+#
+# Keeps, per industry × company size segment, the distribution of maturity
+# scores and of each category score. Scores are small bounded integers (0..104
+# overall, 0..23 per category), so each distribution is an exact histogram: a
+# fixed array of counts with a running count and sum. An update is one
+# increment, two histograms merge by adding their counts, and a percentile
+# rank is a lookup in a cumulative array of at most 105 entries. The cost
+# depends on the score range, not on how many assessments have been seen.
+# Industry-wide, size-wide and overall roll-ups are kept alongside the leaf
+# segments, so a lookup never aggregates.
+#
+# Each worker process counts new assessments in a pending delta. sync() folds
+# that delta into the shared file under an exclusive file lock and reloads the
+# merged totals, so workers converge without a coordinator. The file
+# (.data/peer_benchmarks.bin, DTA_PEER_BENCHMARKS overrides, empty string:
+# memory only) is a zlib-compressed array of leaf counts tagged with the rule
+# program version. A file recorded under other rules, or one that fails to
+# parse, is moved aside to <file>.rejected-<time> rather than overwritten;
+# `build` rebuilds the counts by re-scoring the assessment store.
+#
+# Usage:  python peer_benchmarks.py build        (re-score every stored assessment)
+#         python peer_benchmarks.py show [--industry X] [--size X]
+
+import argparse
+import array
+import atexit
+import fcntl
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+from advisor_engine import PROGRAM
+from knowledge_base import CATEGORIES, PROFILE_OPTIONS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(HERE, ".data", "peer_benchmarks.bin")
+FORMAT_VERSION = 1
+MAGIC = b"DTAPEER"
+ANY = "*"                   # wildcard segment component
+MIN_PEERS = 10              # smallest segment a percentile is reported against
+SYNC_EVERY = 25             # assessments between automatic syncs
+SYNC_SECONDS = 30.0         # ... or seconds, whichever comes first
+
+
+class Distribution:
+    """Exact histogram of an integer score in 0..size-1."""
+
+    __slots__ = ("counts", "count", "sum", "_cumulative")
+
+    def __init__(self, size):
+        self.counts = array.array("Q", bytes(8 * size))
+        self.count = 0
+        self.sum = 0
+        self._cumulative = None
+
+    def add(self, value, n=1):
+        self.counts[value] += n
+        self.count += n
+        self.sum += value * n
+        self._cumulative = None
+
+    def merge(self, other):
+        counts = self.counts
+        for i, n in enumerate(other.counts):
+            if n:
+                counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        self._cumulative = None
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, value):
+        """Mid-rank percentile of value: % of the distribution below it, plus half of the ties."""
+        if not self.count:
+            return None
+        cumulative = self._cumulative
+        if cumulative is None:
+            cumulative, total = [0], 0
+            for n in self.counts:
+                total += n
+                cumulative.append(total)
+            self._cumulative = cumulative
+        value = min(max(value, 0), len(self.counts) - 1)
+        below, equal = cumulative[value], self.counts[value]
+        return 100.0 * (below + equal / 2) / self.count
+
+    def quantile(self, q):
+        """Smallest score with at least q (0..1) of the distribution at or below it."""
+        target, seen = q * self.count, 0
+        for value, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return value
+        return None
+
+
+class PeerBenchmarks:
+
+    def __init__(self, program=PROGRAM):
+        self.version = program.version
+        self.widths = (program.max_score + 1,) + tuple(program.category_max[c] + 1 for c in CATEGORIES)
+        self.segments = {}          # (industry, company_size) incl. ANY roll-ups -> [Distribution per width]
+        self.pending = {}           # leaf segment -> distributions added since the last sync
+        self.pending_count = 0
+        self.synced_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _new(self):
+        return [Distribution(w) for w in self.widths]
+
+    def _segment(self, table, key):
+        dists = table.get(key)
+        if dists is None:
+            dists = table[key] = self._new()
+        return dists
+
+    @staticmethod
+    def _rollups(industry, company_size):
+        return ((industry, company_size), (industry, ANY), (ANY, company_size), (ANY, ANY))
+
+    def _add_values(self, values, industry, company_size, n=1):
+        for key in self._rollups(industry, company_size):
+            for dist, value in zip(self._segment(self.segments, key), values):
+                dist.add(value, n)
+
+    def add(self, mask, company_size, industry):
+        """Count one assessment (answer mask) for its segment and the roll-ups."""
+        score, _, _, cats, *_ = PROGRAM.run(mask)
+        values = (score,) + tuple(cats)
+        with self._lock:
+            self._add_values(values, industry, company_size)
+            for dist, value in zip(self._segment(self.pending, (industry, company_size)), values):
+                dist.add(value)
+            self.pending_count += 1
+
+    def leaves(self):
+        return {k: v for k, v in self.segments.items() if ANY not in k}
+
+    def merge_leaves(self, leaves):
+        """Add leaf-segment distributions (another process's counts) and their roll-ups."""
+        with self._lock:
+            self._merge_into(self.segments, leaves, rollups=True)
+
+    def _merge_into(self, table, leaves, rollups=False):
+        for (industry, company_size), dists in leaves.items():
+            keys = self._rollups(industry, company_size) if rollups else ((industry, company_size),)
+            for key in keys:
+                for mine, theirs in zip(self._segment(table, key), dists):
+                    mine.merge(theirs)
+
+    # ─────────────────────────────────────────────
+    #  LOOKUP
+    # ─────────────────────────────────────────────
+
+    def lookup(self, mask, company_size, industry, min_peers=MIN_PEERS):
+        """
+        Percentiles of an assessment among its peers: the (industry, size) segment,
+        else the industry, else all firms, whichever first has min_peers.
+        Returns None when no segment is large enough.
+        """
+        score, _, _, cats, *_ = PROGRAM.run(mask)
+        with self._lock:
+            for key in ((industry, company_size), (industry, ANY), (ANY, ANY)):
+                dists = self.segments.get(key)
+                if dists is not None and dists[0].count >= min_peers:
+                    return {
+                        "segment": key,
+                        "label": segment_label(*key),
+                        "peers": dists[0].count,
+                        "percentile": dists[0].percentile(score),
+                        "mean_score": dists[0].mean,
+                        "category_percentiles": {c: d.percentile(v) for c, d, v in zip(CATEGORIES, dists[1:], cats)},
+                    }
+        return None
+
+    # ─────────────────────────────────────────────
+    #  PERSISTENCE
+    # ─────────────────────────────────────────────
+
+    def to_bytes(self, table=None):
+        """Leaf segments: MAGIC, header length, JSON header, zlib(counts)."""
+        table = self.leaves() if table is None else table
+        keys = sorted(table)
+        header = json.dumps({"format": FORMAT_VERSION, "program": self.version, "widths": self.widths,
+                             "segments": keys}).encode()
+        counts = array.array("Q")
+        for key in keys:
+            for dist in table[key]:
+                counts.extend(dist.counts)
+        return MAGIC + struct.pack("<I", len(header)) + header + zlib.compress(counts.tobytes(), 6)
+
+    def from_bytes(self, data):
+        """Leaf segments encoded by to_bytes(); ValueError if they belong to other rules."""
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a peer benchmark file")
+        try:
+            (size,) = struct.unpack_from("<I", data, len(MAGIC))
+            start = len(MAGIC) + 4
+            header = json.loads(data[start:start + size])
+            recorded = (header["format"], header["program"], tuple(header["widths"]))
+            counts = array.array("Q", zlib.decompress(data[start + size:]))
+        except (struct.error, zlib.error, KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"corrupt peer benchmark file: {exc}") from exc
+        if recorded != (FORMAT_VERSION, self.version, self.widths):
+            raise ValueError("peer benchmarks were recorded under a different rule program")
+        leaves, offset = {}, 0
+        for key in header["segments"]:
+            dists = leaves[tuple(key)] = self._new()
+            for dist in dists:
+                width = len(dist.counts)
+                dist.counts = counts[offset:offset + width]
+                dist.count = sum(dist.counts)
+                dist.sum = sum(v * n for v, n in enumerate(dist.counts))
+                offset += width
+        return leaves
+
+    def sync(self, path):
+        """
+        Fold pending counts into the file at path and reload the merged totals.
+        On failure the counts go back to pending for the next sync. A file that
+        cannot be read as this program's benchmarks is moved aside, not overwritten.
+        """
+        with self._lock:
+            pending, self.pending, self.pending_count = self.pending, {}, 0
+            self.synced_at = time.monotonic()
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    with open(path, "rb") as f:
+                        leaves = self.from_bytes(f.read())
+                except FileNotFoundError:
+                    leaves = {}
+                except ValueError as exc:
+                    rejected = f"{path}.rejected-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+                    os.replace(path, rejected)
+                    print(f"peer_benchmarks: {exc}; moved {path} to {rejected}", file=sys.stderr)
+                    leaves = {}
+                self._merge_into(leaves, pending)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                try:
+                    with open(tmp, "wb") as f:
+                        f.write(self.to_bytes(leaves))
+                    os.replace(tmp, path)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    raise
+        except BaseException:
+            with self._lock:
+                self._merge_into(self.pending, pending)
+                self.pending_count += sum(dists[0].count for dists in pending.values())
+            raise
+        # the file now holds every process's synced counts; adopt it plus whatever was added meanwhile
+        with self._lock:
+            self.segments = {}
+            self._merge_into(self.segments, leaves, rollups=True)
+            self._merge_into(self.segments, self.pending, rollups=True)
+
+    def maybe_sync(self, path):
+        if self.pending_count >= SYNC_EVERY or (
+                self.pending_count and time.monotonic() - self.synced_at >= SYNC_SECONDS):
+            self.sync(path)
+
+
+def ordinal(percentile):
+    """Percentile rank as an ordinal: 63.4 -> '63rd' (clamped to 1st..99th)."""
+    n = min(max(round(percentile), 1), 99)
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+
+def segment_label(industry, company_size):
+    """'Small Healthcare firms', 'Healthcare firms', 'all firms'."""
+    size = "" if company_size == ANY else company_size.split(" (")[0] + " "
+    return "all firms" if industry == ANY and company_size == ANY else \
+        f"{size}{'' if industry == ANY else industry + ' '}firms"
+
+
+_benchmarks = None
+_benchmarks_lock = threading.Lock()
+
+
+def benchmarks_path():
+    return os.environ.get("DTA_PEER_BENCHMARKS", DEFAULT_PATH)
+
+
+def get_benchmarks():
+    """Process-wide benchmarks, loaded from the shared file on first use."""
+    global _benchmarks
+    if _benchmarks is None:
+        with _benchmarks_lock:
+            if _benchmarks is None:
+                peers = PeerBenchmarks()
+                path = benchmarks_path()
+                if path:
+                    try:
+                        with open(path, "rb") as f:
+                            peers.merge_leaves(peers.from_bytes(f.read()))
+                    except FileNotFoundError:
+                        pass
+                    except (OSError, ValueError) as exc:
+                        print(f"peer_benchmarks: starting empty: {exc}", file=sys.stderr)
+                    atexit.register(lambda: peers.pending_count and peers.sync(path))
+                _benchmarks = peers
+    return _benchmarks
+
+
+def record(mask, company_size, industry):
+    """Percentile lookup for an assessment, then count it (lookup excludes the assessment itself)."""
+    peers = get_benchmarks()
+    found = peers.lookup(mask, company_size, industry)
+    peers.add(mask, company_size, industry)
+    path = benchmarks_path()
+    if path:
+        try:
+            peers.maybe_sync(path)
+        except OSError as exc:
+            print(f"peer_benchmarks: sync failed: {exc}", file=sys.stderr)
+    return found
+
+
+# ─────────────────────────────────────────────
+#  COMMAND LINE
+# ─────────────────────────────────────────────
+
+def build(path, store):
+    """Rebuild the file from every assessment in the store (re-scored under the current rules)."""
+    peers = PeerBenchmarks()
+    leaves = {}
+    for mask, company_size, industry, n in store.answer_counts():
+        score, _, _, cats, *_ = PROGRAM.run(mask)
+        for dist, value in zip(peers._segment(leaves, (industry, company_size)), (score,) + tuple(cats)):
+            dist.add(value, n)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(peers.to_bytes(leaves))
+        os.replace(tmp, path)
+    return sum(d[0].count for d in leaves.values()), os.path.getsize(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the peer benchmarks.")
+    parser.add_argument("command", choices=("build", "show"))
+    parser.add_argument("--file", help="benchmark file (default: DTA_PEER_BENCHMARKS or .data/peer_benchmarks.bin)")
+    parser.add_argument("--db", help="assessment database for build")
+    parser.add_argument("--industry", default=ANY, choices=(ANY,) + PROFILE_OPTIONS["industry"])
+    parser.add_argument("--size", default=ANY, choices=(ANY,) + PROFILE_OPTIONS["company_size"])
+    args = parser.parse_args(argv)
+
+    path = args.file or benchmarks_path() or DEFAULT_PATH
+    if args.command == "build":
+        import assessment_store
+        store = assessment_store.AssessmentStore(args.db or os.environ.get("DTA_ASSESSMENT_DB")
+                                                 or assessment_store.DEFAULT_PATH)
+        t = time.perf_counter()
+        count, size = build(path, store)
+        print(f"{count:,} assessments -> {path} ({size:,} bytes) in {time.perf_counter() - t:.1f}s")
+        return 0
+    peers = PeerBenchmarks()
+    with open(path, "rb") as f:
+        peers.merge_leaves(peers.from_bytes(f.read()))
+    dists = peers.segments.get((args.industry, args.size))
+    if dists is None:
+        print(f"no assessments for {segment_label(args.industry, args.size)}")
+        return 1
+    quartiles = lambda d: " / ".join(str(d.quantile(q)) for q in (0.25, 0.5, 0.75))
+    print(f"{segment_label(args.industry, args.size)}: {dists[0].count:,} assessments")
+    print(f"  {'Maturity score':24s} mean {dists[0].mean:6.1f}   quartiles {quartiles(dists[0])}")
+    for cat, dist in zip(CATEGORIES, dists[1:]):
+        print(f"  {cat:24s} mean {dist.mean:6.1f}   quartiles {quartiles(dist)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+# report.py
+# PDF assessment report for the Digital Transformation Advisor
+#
+# generate_pdf() lays out the ReportLab document. An evaluate() result is fully
+# determined by the answer mask and the rule program, so finished reports are
+# cached under a hash of (business profile, answer mask, PROGRAM.version,
+# REPORT_VERSION): a repeat download for the same client and answers skips
+# doc.build() and serves the stored bytes. prefetch_pdf() builds the report on
+# a background worker while the results page renders, so the page never waits
+# for ReportLab; the bytes are only handed over when a download is requested.
+# Reports for assessments with "Unsure" answers add the score interval and
+# tier/risk probabilities from uncertainty.distribution(), and are keyed by
+# the answer probabilities too.
+#
+# Usage:  python report.py stats
+
+import os
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+)
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+
+from advisor_engine import PROGRAM
+from byte_cache import BytesCache, cache_key
+from instrumentation import stage
+from knowledge_base import MATURITY_LEVELS, QUESTIONS
+import uncertainty
+
+REPORT_VERSION = 3    # bump when the layout changes so cached reports are not reused
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "reports")
+
+
+# ─────────────────────────────────────────────
+#  LAYOUT
+# ─────────────────────────────────────────────
+
+# Paragraph and table styles are built once per process and shared by every report.
+_styles=getSampleStyleSheet()
+TITLE_S=ParagraphStyle("title",parent=_styles["Title"],fontSize=20,spaceAfter=6,textColor=colors.HexColor("#1a4a7a"),alignment=TA_CENTER)
+SUB_S=ParagraphStyle("sub",parent=_styles["Normal"],fontSize=11,textColor=colors.grey,alignment=TA_CENTER,spaceAfter=16)
+H2_S=ParagraphStyle("h2",parent=_styles["Heading2"],fontSize=14,textColor=colors.HexColor("#1a4a7a"),spaceBefore=14,spaceAfter=7)
+BODY_S=ParagraphStyle("body",parent=_styles["Normal"],fontSize=11,leading=15,spaceAfter=6)
+REC_S=ParagraphStyle("rec",parent=_styles["Normal"],fontSize=10,leading=14,spaceAfter=4,leftIndent=10)
+CELL_S=ParagraphStyle("rc",fontSize=9,leading=11)
+DESC_S=ParagraphStyle("rd",fontSize=9,leading=12,wordWrap="LTR")
+FOOTER_S=ParagraphStyle("footer",parent=_styles["Normal"],fontSize=8,textColor=colors.grey,alignment=TA_CENTER,spaceBefore=8)
+
+KV_TABLE_STYLE=TableStyle([
+    ("BACKGROUND",(0,0),(0,-1),colors.HexColor("#eaf4fb")),
+    ("FONTNAME",(0,0),(-1,-1),"Helvetica"),("FONTSIZE",(0,0),(-1,-1),11),
+    ("GRID",(0,0),(-1,-1),0.5,colors.HexColor("#cce0f0")),
+    ("ROWBACKGROUNDS",(0,0),(-1,-1),[colors.white,colors.HexColor("#f5faff")]),
+    ("TOPPADDING",(0,0),(-1,-1),6),("BOTTOMPADDING",(0,0),(-1,-1),6),])
+TRACE_TABLE_STYLE=TableStyle([
+    ("BACKGROUND",(0,0),(-1,0),colors.HexColor("#1a6b45")),
+    ("TEXTCOLOR",(0,0),(-1,0),colors.white),
+    ("FONTNAME",(0,0),(-1,0),"Helvetica-Bold"),("FONTSIZE",(0,0),(-1,0),10),
+    ("GRID",(0,0),(-1,-1),0.4,colors.HexColor("#cce0f0")),
+    ("ROWBACKGROUNDS",(0,1),(-1,-1),[colors.white,colors.HexColor("#f5faff")]),
+    ("TOPPADDING",(0,0),(-1,-1),5),("BOTTOMPADDING",(0,0),(-1,-1),5),
+    ("VALIGN",(0,0),(-1,-1),"TOP")])
+
+USABLE=16.4*cm
+KV_WIDTHS=[5*cm,USABLE-5*cm]
+TRACE_WIDTHS=[1.4*cm,3.8*cm,USABLE-1.4*cm-3.8*cm-1.1*cm,1.1*cm]
+PRIORITY_PREFIX={"Critical":"[CRITICAL]","Important":"[IMPORTANT]","Optional":"[OPTIONAL]"}
+
+
+def _uncertainty_section(probabilities):
+    """Flowables for the score interval and tier/risk probabilities of uncertain answers."""
+    spread=uncertainty.distribution(probabilities)
+    unsure=[(q,p) for (_,_,_,q),p in zip(QUESTIONS,probabilities) if 0<p<1]
+    levels={t:level for _,level,_,t in MATURITY_LEVELS}
+    rows=[[f"Score ({uncertainty.CONFIDENCE:.0%} interval)",
+           f"{spread.interval[0]} – {spread.interval[1]}  (expected {spread.mean:.1f})"]]
+    rows+=[[f"Maturity: {levels[t]}",f"{p:.1%}"] for t,p in spread.tiers.items()]
+    rows+=[[f"Risk: {r}",f"{p:.1%}"] for r,p in spread.risks.items()]
+    out=[Paragraph("Answer Uncertainty",H2_S),
+         Paragraph(f"The results above count the {len(unsure)} answer(s) marked Unsure as No. "
+                   f"Taking the estimated likelihood of each into account:",BODY_S)]
+    out+=[Paragraph(f"{q} <i>({p:.0%} likely)</i>",REC_S) for q,p in unsure]
+    out+=[Spacer(1,0.2*cm),Table(rows,colWidths=KV_WIDTHS,style=KV_TABLE_STYLE)]
+    return out
+
+
+def generate_pdf(result,company_size,industry,budget,years,probabilities=None):
+    """
+    Build the assessment report for an evaluate() result. Returns PDF bytes.
+    probabilities: uncertainty.probabilities() of the answers when some were "Unsure".
+    """
+    buffer=BytesIO()
+    doc=SimpleDocTemplate(buffer,pagesize=A4,rightMargin=1.8*cm,leftMargin=1.8*cm,topMargin=2*cm,bottomMargin=2*cm)
+    story=[]
+    story.append(Paragraph("Small Business Digital Transformation Advisor",TITLE_S))
+    story.append(Paragraph("Expert System Assessment Report — COM6008 Knowledge-Based Systems",SUB_S))
+    story.append(HRFlowable(width="100%",thickness=1.5,color=colors.HexColor("#1a6b45")))
+    story.append(Spacer(1,0.4*cm))
+    story.append(Paragraph("Business Profile",H2_S))
+    pt=Table([["Company Size",company_size],["Industry Sector",industry],
+              ["Annual Digital Budget",budget],["Years in Operation",years]],
+             colWidths=KV_WIDTHS,style=KV_TABLE_STYLE)
+    story.append(pt); story.append(Spacer(1,0.4*cm))
+    story.append(Paragraph("Assessment Results",H2_S))
+    rt=Table([["Maturity Score",f"{result['score']} / {PROGRAM.max_score}"],
+              ["Digital Maturity Level",result["level"]],
+              ["Risk Level",result["risk_level"]],
+              ["Rules Fired",str(len(result["rules_triggered"]))]],
+             colWidths=KV_WIDTHS,style=KV_TABLE_STYLE)
+    story.append(rt); story.append(Spacer(1,0.2*cm))
+    story.append(Paragraph(result["risk_description"],BODY_S))
+    if probabilities is not None:
+        story.extend(_uncertainty_section(probabilities))
+    story.append(Paragraph("Expert Recommendations",H2_S))
+    for rec in result["recommendations"]:
+        story.append(Paragraph(f'<b>{PRIORITY_PREFIX[rec["priority"]]} {rec["category"]}:</b> {rec["text"]}',REC_S))
+    story.append(Paragraph("Expert Rule Trace",H2_S))
+    rd=[["Rule","Category","Description","Pts"]]
+    for r in result["rules_triggered"]:
+        rd.append([Paragraph(f"Rule {r['id']:02d}",CELL_S),
+                   Paragraph(r["category"],CELL_S),
+                   Paragraph(r["description"],DESC_S),
+                   Paragraph(f"+{r['points']}",CELL_S)])
+    story.append(Table(rd,colWidths=TRACE_WIDTHS,repeatRows=1,style=TRACE_TABLE_STYLE))
+    story.append(Spacer(1,0.5*cm))
+    story.append(HRFlowable(width="100%",thickness=0.5,color=colors.grey))
+    story.append(Paragraph(
+        "Generated by the Small Business Digital Transformation Advisor | "
+        "Rules derived from McKinsey Digital Maturity Framework (2023) & Gartner IT Maturity Model (2024) | "
+        "COM6008 Knowledge-Based Systems — Buckinghamshire New University",
+        FOOTER_S))
+    with stage("report.doc_build"):
+        doc.build(story)
+    return buffer.getvalue()
+
+# ─────────────────────────────────────────────
+#  CACHE
+# ─────────────────────────────────────────────
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_report_cache():
+    """
+    Process-wide report cache. The disk tier lives in .cache/reports unless
+    DTA_REPORT_CACHE names another directory (empty string: memory only).
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                disk_dir = os.environ.get("DTA_REPORT_CACHE", DEFAULT_DIR) or None
+                _cache = BytesCache(max_bytes=32 << 20, disk_dir=disk_dir,
+                                    disk_max_bytes=256 << 20, suffix=".pdf")
+    return _cache
+
+
+def report_key(mask, company_size, industry, budget, years, probabilities=None):
+    return cache_key("report", REPORT_VERSION, PROGRAM.version, mask,
+                     company_size, industry, budget, years, probabilities)
+
+
+def cached_pdf(result, mask, company_size, industry, budget, years, cache=None, probabilities=None):
+    """
+    PDF bytes for `result`, the evaluation of answer mask `mask`, built only if
+    this profile and mask have not been rendered before.
+    """
+    cache = cache or get_report_cache()
+    return cache.get_or_create(report_key(mask, company_size, industry, budget, years, probabilities),
+                               lambda: generate_pdf(result, company_size, industry, budget, years, probabilities))
+
+
+# ─────────────────────────────────────────────
+#  BACKGROUND GENERATION
+# ─────────────────────────────────────────────
+
+_pool = None
+_inflight = {}                  # report key -> Future, while it is being built
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _cache_lock:
+            if _pool is None:
+                workers = int(os.environ.get("DTA_PDF_WORKERS", 1))
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+    return _pool
+
+
+def prefetch_pdf(result, mask, company_size, industry, budget, years, cache=None, probabilities=None):
+    """
+    Start building the report in the background and return a Future of its
+    bytes, so the results page can render without waiting for ReportLab.
+    Cached reports come back as an already completed Future, and a report
+    already being built is not queued twice.
+    """
+    cache = cache or get_report_cache()
+    key = report_key(mask, company_size, industry, budget, years, probabilities)
+    with _cache_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+    data = cache.get(key)
+    if data is not None:
+        future = Future()
+        future.set_result(data)
+        return future
+
+    def build():
+        data = generate_pdf(result, company_size, industry, budget, years, probabilities)
+        cache.put(key, data)
+        return data
+
+    pool = _get_pool()
+    with _cache_lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = _inflight[key] = pool.submit(build)
+            future.add_done_callback(lambda _: _inflight.pop(key, None))
+    return future
+
+
+def main(argv=None):
+    if (argv if argv is not None else sys.argv[1:]) not in ([], ["stats"]):
+        print("usage: python report.py stats", file=sys.stderr)
+        return 2
+    for k, v in get_report_cache().stats().items():
+        print(f"{k:15s} {v}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
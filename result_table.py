@@ -0,0 +1,285 @@
+# result_table.py
+# Precomputed outcome table for the Digital Transformation Advisor
+#
+# All 19 diagnostic answers are binary, so an assessment is fully described by
+# a 19-bit answer mask (advisor_engine.encode_answers) and there are only
+# 2^19 = 524,288 possible outcomes. The table is generated once by running the
+# compiled rule program over the whole answer space, written to a
+# memory-mappable file and versioned against the rule base. Evaluation then
+# becomes a single fixed-size record read instead of a full apply_rules() pass.
+#
+# Usage:  python result_table.py build      (pre-generate the table)
+#         python result_table.py info       (show version and catalogue sizes)
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from advisor_engine import (
+    ANSWER_SPACE, CATEGORIES, PROGRAM, QUESTION_KEYS, RISK_LEVELS,
+    DigitalTransformationAdvisor, decode_mask, encode_answers, iter_bits,
+)
+from knowledge_base import MATURITY_LEVELS, RISK_BANDS
+
+FORMAT_VERSION = 1
+MAGIC = b"DTATBL01"
+PRIORITY_ORDER = {"Critical": 0, "Important": 1, "Optional": 2}
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+PATH_ENV = "DTA_RESULT_TABLE"
+
+
+def default_path(fingerprint=None):
+    if os.environ.get(PATH_ENV):
+        return os.environ[PATH_ENV]
+    fingerprint = fingerprint or PROGRAM.version
+    return os.path.join(DEFAULT_DIR, f"result_table-{fingerprint[:12]}.bin")
+
+
+def _nbytes(nbits):
+    return max(1, (nbits + 7) // 8)
+
+
+def _record_format(layout):
+    """Packed struct: score | tier | risk | category scores | 4 bitsets."""
+    return (f"<HBB{len(layout['categories'])}H"
+            f"{layout['fired_bytes']}s{layout['rec_bytes']}s"
+            f"{layout['flag_bytes']}s{layout['gap_bytes']}s")
+
+
+# ─────────────────────────────────────────────
+#  TABLE GENERATION
+# ─────────────────────────────────────────────
+
+def build_table(path=None, verify_stride=61):
+    """
+    Run the compiled rule program over all 2^19 answer masks and write the
+    table file. A strided sample of masks is checked against
+    DigitalTransformationAdvisor before the file is published.
+    """
+    path = path or default_path(PROGRAM.version)
+    layout = {
+        "categories": list(CATEGORIES),
+        "fired_bytes": _nbytes(len(PROGRAM.outcomes)),
+        "rec_bytes": _nbytes(len(PROGRAM.recommendations)),
+        "flag_bytes": _nbytes(len(PROGRAM.risk_flags)),
+        "gap_bytes": _nbytes(len(PROGRAM.critical_gaps)),
+    }
+    header = {
+        "format": FORMAT_VERSION,
+        "engine": PROGRAM.version,
+        "questions": list(QUESTION_KEYS),
+        "layout": layout,
+        "outcomes": PROGRAM.outcomes,
+        "recommendations": PROGRAM.recommendations,
+        "risk_flags": PROGRAM.risk_flags,
+        "critical_gaps": PROGRAM.critical_gaps,
+        "levels": {str(tier): [level, color] for _, level, color, tier in MATURITY_LEVELS},
+        "risk_descriptions": {level: desc for _, level, desc in RISK_BANDS},
+    }
+
+    rec_struct = struct.Struct(_record_format(layout))
+    data = bytearray(rec_struct.size * ANSWER_SPACE)
+    fb, rb, flb, gb = (layout["fired_bytes"], layout["rec_bytes"],
+                       layout["flag_bytes"], layout["gap_bytes"])
+    for mask in range(ANSWER_SPACE):
+        score, tier, risk, cats, fired, recs, flags, gaps = PROGRAM.run(mask)
+        rec_struct.pack_into(
+            data, mask * rec_struct.size, score, tier, risk, *cats,
+            fired.to_bytes(fb, "little"), recs.to_bytes(rb, "little"),
+            flags.to_bytes(flb, "little"), gaps.to_bytes(gb, "little"))
+
+    blob = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(blob)) + blob
+    prefix += b"\0" * (-len(prefix) % 16)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(prefix)
+        fh.write(data)
+    table = ResultTable(tmp)
+    try:
+        for mask in range(0, ANSWER_SPACE, verify_stride):
+            expected = DigitalTransformationAdvisor(decode_mask(mask)).evaluate()
+            if table.result(mask) != expected:
+                raise RuntimeError(f"Result table does not reproduce the engine at mask {mask:#07x}")
+    except BaseException:
+        table.close()
+        os.remove(tmp)
+        raise
+    table.close()
+    os.replace(tmp, path)
+    return path
+
+
+# ─────────────────────────────────────────────
+#  TABLE ACCESS
+# ─────────────────────────────────────────────
+
+class ResultTable:
+    """Read-only, memory-mapped view of a generated result table."""
+
+    def __init__(self, path, expected_engine=None):
+        self.path = path
+        self._fh = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._mm[:8] != MAGIC:
+                raise ValueError(f"{path} is not a result table")
+            (hlen,) = struct.unpack_from("<I", self._mm, 8)
+            self.header = json.loads(self._mm[12:12 + hlen])
+            if self.header["format"] != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported table format {self.header['format']}")
+            if expected_engine and self.header["engine"] != expected_engine:
+                raise ValueError(f"{path} was generated from a different rule engine version")
+            if self.header["questions"] != list(QUESTION_KEYS):
+                raise ValueError(f"{path} was generated for a different question set")
+        except BaseException:
+            self.close()
+            raise
+        self.offset = 12 + hlen + (-(12 + hlen) % 16)
+        self._struct = struct.Struct(_record_format(self.header["layout"]))
+        self.record_size = self._struct.size
+        self.n_categories = len(self.header["layout"]["categories"])
+        self.outcomes = self.header["outcomes"]
+        self.recommendations = self.header["recommendations"]
+        self.risk_flags = self.header["risk_flags"]
+        self.critical_gaps = self.header["critical_gaps"]
+        self.levels = {int(t): tuple(v) for t, v in self.header["levels"].items()}
+        self.risk_descriptions = self.header["risk_descriptions"]
+
+    @property
+    def version(self):
+        return self.header["engine"]
+
+    def close(self):
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        self._fh.close()
+
+    def lookup(self, mask):
+        """
+        Raw record for an answer mask:
+        (score, tier, risk_index, category_scores, fired, recommendations, risk_flags, critical_gaps)
+        Category scores follow CATEGORIES order; the last four fields are int bitsets
+        indexing the outcome / recommendation / risk flag / critical gap catalogues.
+        """
+        if not 0 <= mask < ANSWER_SPACE:
+            raise IndexError(f"answer mask out of range: {mask}")
+        row = self._struct.unpack_from(self._mm, self.offset + mask * self.record_size)
+        n = self.n_categories
+        return (row[0], row[1], row[2], row[3:3 + n],
+                *(int.from_bytes(b, "little") for b in row[3 + n:]))
+
+    def score(self, mask):
+        return self.lookup(mask)[0]
+
+    def result(self, mask):
+        """Rebuild the exact dict DigitalTransformationAdvisor.evaluate() returns."""
+        score, tier, risk, _, fired, rec_bits, flag_bits, gap_bits = self.lookup(mask)
+        rule_log = [dict(self.outcomes[i]) for i in iter_bits(fired)]
+        category_scores = {}
+        for r in rule_log:
+            category_scores[r["category"]] = category_scores.get(r["category"], 0) + r["points"]
+        recommendations = sorted(
+            (dict(self.recommendations[i]) for i in iter_bits(rec_bits)),
+            key=lambda r: PRIORITY_ORDER[r["priority"]])
+        level, color = self.levels[tier]
+        risk_level = RISK_LEVELS[risk]
+        return {
+            "score": score,
+            "score_pct": PROGRAM.score_pct[score],
+            "level": level,
+            "level_color": color,
+            "tier": tier,
+            "risk_level": risk_level,
+            "risk_description": self.risk_descriptions[risk_level],
+            "risk_flags": [self.risk_flags[i] for i in iter_bits(flag_bits)],
+            "critical_gaps": [self.critical_gaps[i] for i in iter_bits(gap_bits)],
+            "recommendations": recommendations,
+            "rules_triggered": rule_log,
+            "category_scores": category_scores,
+        }
+
+    def evaluate(self, answers):
+        """Drop-in replacement for DigitalTransformationAdvisor(answers).evaluate()."""
+        return self.result(encode_answers(answers))
+
+    def records(self):
+        """All 2^19 records as a zero-copy NumPy structured array (requires numpy)."""
+        import numpy as np
+        layout = self.header["layout"]
+        dtype = np.dtype([
+            ("score", "<u2"), ("tier", "u1"), ("risk", "u1"),
+            ("category_scores", "<u2", (self.n_categories,)),
+            ("fired", "u1", (layout["fired_bytes"],)),
+            ("recommendations", "u1", (layout["rec_bytes"],)),
+            ("risk_flags", "u1", (layout["flag_bytes"],)),
+            ("critical_gaps", "u1", (layout["gap_bytes"],)),
+        ])
+        return np.frombuffer(self._mm, dtype=dtype, count=ANSWER_SPACE, offset=self.offset)
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table(path=None, build=True):
+    """
+    Process-wide lazily loaded table. Generates the file on first use (or when
+    the rule base has changed since it was written) unless build is False, in which
+    case a missing or stale table raises.
+    """
+    global _table
+    if _table is not None:
+        return _table
+    with _table_lock:
+        if _table is None:
+            path = path or default_path()
+            try:
+                _table = ResultTable(path, expected_engine=PROGRAM.version)
+            except (FileNotFoundError, ValueError):
+                if not build:
+                    raise
+                build_table(path)
+                _table = ResultTable(path, expected_engine=PROGRAM.version)
+    return _table
+
+
+def available_table(path=None):
+    """get_table() without building: None when no table for this engine version is on disk."""
+    try:
+        return get_table(path, build=False)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate or inspect the precomputed result table.")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--path", help=f"table file (default: ${PATH_ENV} or {DEFAULT_DIR}/)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(f"Wrote {build_table(args.path)}")
+        return 0
+    table = ResultTable(args.path or default_path())
+    stale = table.version != PROGRAM.version
+    print(f"path:            {table.path}")
+    print(f"engine version:  {table.version[:12]}{'  (STALE)' if stale else ''}")
+    print(f"records:         {ANSWER_SPACE} x {table.record_size} bytes")
+    print(f"rule outcomes:   {len(table.outcomes)}")
+    print(f"recommendations: {len(table.recommendations)}")
+    table.close()
+    return 1 if stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
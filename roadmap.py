@@ -0,0 +1,180 @@
+# roadmap.py
+# Budget-constrained transformation roadmap
+#
+# Turns the business's digital budget band into a phased plan of capabilities
+# to adopt. Each capability has an indicative cost and effort
+# (knowledge_base.CAPABILITY_COSTS). Each phase adds its share of the annual
+# budget, and money not spent in one phase carries over to the next. Effort
+# is capped per phase at EFFORT_PER_MONTH person-weeks a month; unused
+# capacity does not carry over.
+#
+#   1. Selection — an exact two-constraint 0/1 knapsack over the whole
+#      horizon. Every superset of the current answers is costed, sized and
+#      scored (tier_planner's superset scan over the precomputed score
+#      array), so compound-rule bonuses count exactly. The plan is the
+#      highest final score within the total budget and total effort
+#      capacity; ties go to the cheapest.
+#   2. Phasing — phase by phase, the subset of what is left that fits the
+#      money available and the phase's effort capacity and scores highest
+#      (then costs least) is scheduled. Anything selected that no phase has
+#      room for is reported as not scheduled, with the unselected capabilities.
+#
+# A plan takes ~15 ms in the worst case, so the results page recomputes it
+# live as the budget changes. `portfolio` plans every record of a CSV/JSONL
+# file, reusing plans for repeated (answers, budget) pairs.
+#
+# Usage:  python roadmap.py plan --yes cloud,crm --budget "Under £5,000"
+#         python roadmap.py portfolio answers.csv -o roadmaps.csv [--budget "Over £100,000"]
+
+import argparse
+import functools
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from advisor_engine import QUESTION_KEYS, encode_answers
+from bulk_assess import ResultWriter, _detect_format, _open_in, _open_out, read_records, split_record
+from knowledge_base import BUDGET_AMOUNTS, CAPABILITY_COSTS
+from tier_planner import score_table, supersets
+
+# (name, months)
+PHASES = (
+    ("Quick wins", 6),
+    ("Foundations", 6),
+    ("Scale", 12),
+)
+
+COST = [CAPABILITY_COSTS[k][0] for k in QUESTION_KEYS]
+EFFORT = [CAPABILITY_COSTS[k][1] for k in QUESTION_KEYS]
+EFFORT_PER_MONTH = 4    # person-weeks a small business can put into change per month (about one person)
+
+# flips: question keys to adopt in the phase; budget: allowance added by the phase;
+# effort: person-weeks scheduled, at most capacity
+Phase = namedtuple("Phase", "name months budget flips cost effort capacity score")
+Roadmap = namedtuple("Roadmap", "annual_budget start_score final_score total_cost phases unfunded")
+
+
+def annual_budget(budget):
+    """Budget band label (PROFILE_OPTIONS["budget"]) or an amount in GBP."""
+    return BUDGET_AMOUNTS[budget] if isinstance(budget, str) else float(budget)
+
+
+def _best(masks, cost, limit, effort, capacity):
+    """Position of the highest-scoring mask within the cost limit and effort capacity (cheapest among ties)."""
+    fits = np.flatnonzero((cost <= limit + 1e-9) & (effort <= capacity))      # never empty: position 0 adds nothing
+    reached = score_table()[masks[fits]]
+    top = fits[reached == reached.max()]
+    return top[np.argmin(cost[top])]
+
+
+def _keys(bits):
+    return tuple(k for b, k in enumerate(QUESTION_KEYS) if bits >> b & 1)
+
+
+def optimise(mask, budget, phases=PHASES, effort_per_month=EFFORT_PER_MONTH):
+    """Phased Roadmap for an answer mask under a budget band (or annual amount)."""
+    scores = score_table()
+    annual = annual_budget(budget)
+    allowances = [annual * months / 12 for _, months in phases]
+    capacities = [effort_per_month * months for _, months in phases]
+    missing = [b for b in range(len(QUESTION_KEYS)) if not mask >> b & 1]
+
+    masks, cost = supersets(mask, missing, COST)
+    effort = supersets(mask, missing, EFFORT)[1]
+    target = int(masks[_best(masks, cost, sum(allowances), effort, sum(capacities))])
+
+    planned, current, spent, available = [], mask, 0.0, 0.0
+    for (name, months), allowance, capacity in zip(phases, allowances, capacities):
+        available += allowance
+        remaining = [b for b in missing if target >> b & 1 and not current >> b & 1]
+        sub_masks, sub_cost = supersets(current, remaining, COST)
+        sub_effort = supersets(current, remaining, EFFORT)[1]
+        pick = _best(sub_masks, sub_cost, available - spent, sub_effort, capacity)
+        added = int(sub_masks[pick]) ^ current
+        current |= added
+        spent += float(sub_cost[pick])
+        planned.append(Phase(name, months, allowance, _keys(added), float(sub_cost[pick]),
+                             int(sub_effort[pick]), capacity, int(scores[current])))
+    unfunded = ~current & ((1 << len(QUESTION_KEYS)) - 1)
+    return Roadmap(annual, int(scores[mask]), int(scores[current]), spent, planned, _keys(unfunded))
+
+
+@functools.lru_cache(maxsize=65536)
+def _cached(mask, annual):
+    return optimise(mask, annual)
+
+
+# ─────────────────────────────────────────────
+#  PORTFOLIO (batch) MODE
+# ─────────────────────────────────────────────
+
+def roadmap_row(roadmap):
+    """Flat dict of a Roadmap for CSV/JSONL output."""
+    row = {"start_score": roadmap.start_score, "final_score": roadmap.final_score,
+           "total_cost": round(roadmap.total_cost)}
+    for i, phase in enumerate(roadmap.phases, 1):
+        row[f"phase{i}_changes"] = ";".join(phase.flips)
+        row[f"phase{i}_cost"] = round(phase.cost)
+        row[f"phase{i}_effort"] = phase.effort
+        row[f"phase{i}_score"] = phase.score
+    row["unfunded"] = ";".join(roadmap.unfunded)
+    return row
+
+
+def portfolio(records, budget=None):
+    """Yield (passthrough + roadmap) rows; budget defaults to each record's "budget" field."""
+    for record in records:
+        answers, passthrough = split_record(record)
+        band = budget or passthrough.get("budget")
+        if band not in BUDGET_AMOUNTS:
+            raise ValueError(f"record has no valid budget band: {band!r}")
+        yield {**passthrough, **roadmap_row(_cached(encode_answers(answers), annual_budget(band)))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Budget-constrained transformation roadmaps.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    one = sub.add_parser("plan", help="roadmap for one set of answers")
+    one.add_argument("--yes", default="", help="comma-separated question keys currently answered Yes")
+    one.add_argument("--budget", required=True, choices=tuple(BUDGET_AMOUNTS))
+    many = sub.add_parser("portfolio", help="roadmaps for every record of a CSV/JSONL file")
+    many.add_argument("input", help="CSV/JSONL file, or - for stdin")
+    many.add_argument("-o", "--output", default="-", help="CSV or JSONL output (default: CSV on stdout)")
+    many.add_argument("--budget", choices=tuple(BUDGET_AMOUNTS), help="override each record's budget band")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        yes = {k for k in args.yes.split(",") if k}
+        if yes - set(QUESTION_KEYS):
+            parser.error(f"unknown question keys: {', '.join(sorted(yes - set(QUESTION_KEYS)))}")
+        score_table()
+        t = time.perf_counter()
+        r = optimise(encode_answers({k: 1 for k in yes}), args.budget)
+        print(f"score {r.start_score} -> {r.final_score} for £{r.total_cost:,.0f} "
+              f"(£{r.annual_budget:,.0f}/year) in {(time.perf_counter() - t) * 1000:.1f} ms")
+        for p in r.phases:
+            print(f"  {p.name:12s} {p.months:2d} months  +£{p.budget:>9,.0f}  spend £{p.cost:>7,.0f}  "
+                  f"{p.effort:3d}/{p.capacity} wk  score {p.score:3d}  {', '.join(p.flips) or '-'}")
+        print(f"  not scheduled: {', '.join(r.unfunded) or '-'}")
+        return 0
+
+    in_fmt = _detect_format(args.input, None)
+    out_fmt = _detect_format(args.output, None)
+    n, start = 0, time.perf_counter()
+    with _open_in(args.input) as src, _open_out(args.output) as dst:
+        writer = ResultWriter(dst, out_fmt, fields=())
+        try:
+            for row in portfolio(read_records(src, in_fmt), args.budget):
+                writer.write((row,))
+                n += 1
+        except ValueError as exc:                   # invalid answer or budget band
+            raise SystemExit(f"record {n + 1}: {exc}")
+    elapsed = time.perf_counter() - start
+    print(f"{n} roadmaps in {elapsed:.2f}s ({_cached.cache_info().hits} reused)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+# scoring_service.py
+# Headless HTTP scoring service for the Digital Transformation Advisor
+#
+# A small asyncio HTTP/1.1 server (standard library only) around
+# advisor_engine, so other systems can score assessments without the
+# Streamlit UI:
+#
+#   GET  /health             -> {"status": "ok", "engine": "<program version>"}
+#   POST /v1/assess          -> evaluate() result for one record
+#   POST /v1/assess/batch    -> JSON array of evaluate() results, streamed
+#   GET  /metrics            -> Prometheus text: micro-batching metrics, plus stage
+#                               timings when DTA_INSTRUMENT=1
+#
+# A record is {"answers": {key: Yes/No/1/0, ...}} or the answers dict itself;
+# a batch body is {"records": [...]} or a JSON array of records. Connections
+# are kept alive (HTTP/1.1 semantics, idle timeout), bodies must carry a
+# Content-Length within the size limits, and batch results are written as a
+# chunked stream so large responses never sit in memory whole. --workers N
+# forks N processes that share one listening socket. Concurrent single
+# assessments are coalesced by a microbatch.MicroBatcher (--batch-window-ms,
+# --max-batch) and scored together in one deduplicated pass. Records come
+# from the precomputed result table when one is on disk (result_table.py
+# build); it is memory-mapped, so forked workers share its pages.
+#
+# Usage:  python scoring_service.py --port 8080 --workers 4
+#         python load_client.py --port 8080 --requests 20000 --concurrency 64
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+from functools import lru_cache
+from http import HTTPStatus
+
+import instrumentation
+from advisor_engine import PROGRAM, RISK_LEVELS, encode_answers, iter_bits
+from bulk_assess import split_record
+from instrumentation import stage
+from knowledge_base import MATURITY_LEVELS, PRIORITIES, RISK_BANDS
+from microbatch import MicroBatcher
+from result_table import available_table
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY = 64 * 1024                # single assessment
+MAX_BATCH_BODY = 16 * 1024 * 1024
+MAX_BATCH_RECORDS = 100_000
+STREAM_CHUNK = 500                  # results per chunk of a streamed batch response
+IDLE_TIMEOUT = 15.0
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+
+
+# ─────────────────────────────────────────────
+#  SCORING
+# ─────────────────────────────────────────────
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class ResultEncoder:
+    """
+    Writes the evaluate() JSON for an answer mask straight from a run()
+    record: every catalogue entry of the program (rule outcomes,
+    recommendations, flags, gaps) is JSON-encoded once, so a result is
+    assembled by joining fragments instead of building and dumping dicts.
+    Output is byte-identical to json.dumps(evaluate(), separators=(",", ":")).
+    With a result_table.ResultTable of the same program, records are table reads.
+    """
+
+    def __init__(self, program=PROGRAM, table=None):
+        self.program = program
+        self.run = table.lookup if table is not None else program.run
+        self.score_pct = program.score_pct
+        self.outcomes = [_dumps(o) for o in program.outcomes]
+        self.outcome_cat = [(o["category"], o["points"]) for o in program.outcomes]
+        order = {p: i for i, p in enumerate(PRIORITIES)}
+        self.rec_rank = [order[r["priority"]] for r in program.recommendations]
+        self.recs = [_dumps(r) for r in program.recommendations]
+        self.flags = [_dumps(f) for f in program.risk_flags]
+        self.gaps = [_dumps(g) for g in program.critical_gaps]
+        self.levels = {tier: f'"level":{_dumps(level)},"level_color":{_dumps(color)},"tier":{tier}'
+                       for _, level, color, tier in MATURITY_LEVELS}
+        self.risks = [f'"risk_level":{_dumps(level)},"risk_description":{_dumps(desc)}'
+                      for level, desc in (next((lv, d) for _, lv, d in RISK_BANDS if lv == name)
+                                          for name in RISK_LEVELS)]
+
+    def encode(self, mask):
+        score, tier, risk, _, fired, recs, flags, gaps = self.run(mask)
+        cats = {}
+        for i in iter_bits(fired):
+            cat, points = self.outcome_cat[i]
+            cats[cat] = cats.get(cat, 0) + points
+        rec_order = sorted(iter_bits(recs), key=self.rec_rank.__getitem__)
+        return (
+            f'{{"score":{score},"score_pct":{self.score_pct[score]},{self.levels[tier]},{self.risks[risk]},'
+            f'"risk_flags":[{",".join(self.flags[i] for i in iter_bits(flags))}],'
+            f'"critical_gaps":[{",".join(self.gaps[i] for i in iter_bits(gaps))}],'
+            f'"recommendations":[{",".join(self.recs[i] for i in rec_order)}],'
+            f'"rules_triggered":[{",".join(self.outcomes[i] for i in iter_bits(fired))}],'
+            f'"category_scores":{_dumps(cats)}}}'
+        ).encode()
+
+
+ENCODER = ResultEncoder(table=available_table())
+
+
+@lru_cache(maxsize=65536)
+def encoded_result(mask):
+    """evaluate() result for an answer mask as compact JSON bytes (results depend only on the mask)."""
+    return ENCODER.encode(mask)
+
+
+def score_batch(masks):
+    """Encoded results for a list of masks in one pass, each distinct mask evaluated once."""
+    with stage("service.score_batch"):
+        unique = {m: encoded_result(m) for m in set(masks)}
+        return [unique[m] for m in masks]
+
+
+BATCHER = None          # MicroBatcher for /v1/assess, set by serve() when batching is on
+
+
+def configure_batching(window_ms, max_batch):
+    """Coalesce concurrent single assessments (window_ms <= 0 turns batching off)."""
+    global BATCHER
+    BATCHER = MicroBatcher(score_batch, max_batch, window_ms / 1000) if window_ms > 0 else None
+
+
+def record_mask(record, index=None):
+    where = "" if index is None else f"record {index}: "
+    if not isinstance(record, dict):
+        raise HTTPError(400, f"{where}expected a JSON object")
+    if not isinstance(record.get("answers", record), dict):
+        raise HTTPError(400, f"{where}answers must be a JSON object")
+    try:
+        answers, _ = split_record(record)
+    except ValueError as exc:
+        raise HTTPError(400, f"{where}{exc}")
+    return encode_answers(answers)
+
+
+def _load_json(body):
+    try:
+        return json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise HTTPError(400, f"invalid JSON: {exc}")
+
+
+# ─────────────────────────────────────────────
+#  HTTP
+# ─────────────────────────────────────────────
+
+async def read_request(reader):
+    """(method, path, version, headers) or None on a cleanly closed connection."""
+    try:
+        line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+    except (asyncio.TimeoutError, ConnectionError):
+        return None
+    if not line:
+        return None
+    try:
+        method, path, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    if version not in ("HTTP/1.0", "HTTP/1.1"):
+        raise HTTPError(505)
+    headers, size = {}, len(line)
+    while True:
+        try:
+            line = await reader.readline()
+        except ValueError:                  # line longer than the stream limit
+            raise HTTPError(431)
+        size += len(line)
+        if size > MAX_HEADER_BYTES:
+            raise HTTPError(431)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method, path, version, headers
+
+
+async def read_body(reader, headers, limit):
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(411, "chunked request bodies are not supported; send Content-Length")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > limit:
+        raise HTTPError(413, f"body exceeds {limit} bytes")
+    return await reader.readexactly(length) if length else b""
+
+
+def _head(status, headers, keep_alive):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def send(writer, status, body, keep_alive, content_type="application/json"):
+    writer.write(_head(status, {"Content-Type": content_type, "Content-Length": len(body)}, keep_alive) + body)
+    await writer.drain()
+
+
+async def send_stream(writer, masks, keep_alive):
+    """Stream a JSON array of results with chunked transfer encoding."""
+    writer.write(_head(200, {"Content-Type": "application/json", "Transfer-Encoding": "chunked"}, keep_alive))
+    for start in range(0, len(masks), STREAM_CHUNK):
+        part = b",".join(score_batch(masks[start:start + STREAM_CHUNK]))
+        part = (b"[" if start == 0 else b",") + part
+        if start + STREAM_CHUNK >= len(masks):
+            part += b"]"
+        writer.write(b"%x\r\n%s\r\n" % (len(part), part))
+        await writer.drain()                # backpressure, and lets other connections run
+    if not masks:
+        writer.write(b"2\r\n[]\r\n")
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def route(method, path, headers, reader, writer, keep_alive):
+    path = path.split("?", 1)[0]
+    if path == "/health":
+        if method != "GET":
+            raise HTTPError(405)
+        body = json.dumps({"status": "ok", "engine": PROGRAM.version, "pid": os.getpid()}).encode()
+        return await send(writer, 200, body, keep_alive)
+    if path == "/metrics":
+        if method != "GET":
+            raise HTTPError(405)
+        text = BATCHER.prometheus() if BATCHER else ""
+        if instrumentation.ENABLED:
+            text += instrumentation.REGISTRY.prometheus()
+        return await send(writer, 200, text.encode(), keep_alive, "text/plain; version=0.0.4; charset=utf-8")
+    if path == "/v1/assess":
+        if method != "POST":
+            raise HTTPError(405)
+        record = _load_json(await read_body(reader, headers, MAX_BODY))
+        mask = record_mask(record)
+        body = await BATCHER.submit(mask) if BATCHER else encoded_result(mask)
+        return await send(writer, 200, body, keep_alive)
+    if path == "/v1/assess/batch":
+        if method != "POST":
+            raise HTTPError(405)
+        doc = _load_json(await read_body(reader, headers, MAX_BATCH_BODY))
+        records = doc.get("records") if isinstance(doc, dict) else doc
+        if not isinstance(records, list):
+            raise HTTPError(400, 'expected a JSON array or {"records": [...]}')
+        if len(records) > MAX_BATCH_RECORDS:
+            raise HTTPError(413, f"batch exceeds {MAX_BATCH_RECORDS} records")
+        masks = [record_mask(r, i) for i, r in enumerate(records)]
+        return await send_stream(writer, masks, keep_alive)
+    raise HTTPError(404)
+
+
+async def handle_connection(reader, writer):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, version, headers = request
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+                await route(method, path, headers, reader, writer, keep_alive)
+            except HTTPError as exc:
+                # the rest of the request may be unread, so do not reuse the connection
+                await send(writer, exc.status, json.dumps({"error": str(exc)}).encode(), False)
+                break
+            except asyncio.IncompleteReadError:
+                break
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+# ─────────────────────────────────────────────
+#  PROCESSES
+# ─────────────────────────────────────────────
+
+def listen_socket(host, port, backlog=1024):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+async def _serve(sock):
+    instrumentation.configure_from_env()
+    server = await asyncio.start_server(handle_connection, sock=sock, limit=MAX_HEADER_BYTES)
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set_result, None)
+    async with server:
+        await stop
+
+
+def serve_worker(sock):
+    try:
+        asyncio.run(_serve(sock))
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(host="127.0.0.1", port=8080, workers=1, ready=None, batch_window_ms=1.0, max_batch=64):
+    """
+    Run the service until SIGINT/SIGTERM. workers > 1 forks that many
+    processes accepting on one shared socket. `ready`, if given, is called
+    with the bound (host, port) once the socket is listening.
+    """
+    configure_batching(batch_window_ms, max_batch)
+    sock = listen_socket(host, port)
+    if ready:
+        ready(sock.getsockname()[:2])
+    if workers <= 1:
+        return serve_worker(sock)
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=serve_worker, args=(sock,), daemon=True) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    sock.close()
+    stop_signals = {signal.SIGINT, signal.SIGTERM}
+    signal.pthread_sigmask(signal.SIG_BLOCK, stop_signals)
+    try:
+        signal.sigwait(stop_signals)
+    finally:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, stop_signals)
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the advisor engine over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"worker processes (default: 1, this host has {os.cpu_count()})")
+    parser.add_argument("--batch-window-ms", type=float, default=1.0,
+                        help="coalesce single assessments arriving within this window (0: off, default: 1)")
+    parser.add_argument("--max-batch", type=int, default=64, help="flush a batch at this size (default: 64)")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, batch_window_ms=args.batch_window_ms, max_batch=args.max_batch,
+          ready=lambda addr: print(f"listening on http://{addr[0]}:{addr[1]} "
+                                   f"({args.workers} worker{'s' if args.workers != 1 else ''})",
+                                   file=sys.stderr, flush=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
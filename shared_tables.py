@@ -0,0 +1,295 @@
+# shared_tables.py
+# Read-only engine tables shared by every process on a host
+#
+# batch_engine.answer_space() (score, tier, risk and category scores of all
+# 2^19 answer masks) and the adaptive questionnaire's outcome classes add up to
+# ~8.5 MB of arrays. Each process used to build its own copy, so every extra
+# Streamlit, scoring-service or bulk worker added another copy to its heap.
+# They are now published once into one file and every process maps it
+# read-only. The arrays are zero-copy NumPy views over the mapping, so the
+# pages exist once in the page cache however many workers attach.
+#
+# The file goes in /dev/shm where it exists. That is the tmpfs behind
+# multiprocessing.shared_memory, but a named file is used directly: the
+# resource tracker would unlink a SharedMemory segment when the process that
+# created it exits, while the file outlives any one worker. Elsewhere it goes
+# to .cache/ (DTA_SHARED_TABLES overrides the path; an empty value turns
+# sharing off). The layout is a header
+# (magic, format, engine fingerprint, question keys, array directory) followed
+# by 64-byte-aligned arrays. A process attaches only if the header matches its
+# own PROGRAM.version, otherwise it publishes a fresh table under a flock, so
+# concurrent starters build it once.
+#
+# result_table.py's records file is already memory-mapped and shared the same
+# way. The rule and recommendation catalogues are small Python objects and
+# peer_benchmarks.py counts are written to; those stay per process.
+#
+# Usage:  python shared_tables.py build            (publish the tables now)
+#         python shared_tables.py info
+#         python shared_tables.py check [--workers 4]   (verify workers share one mapping)
+
+import argparse
+import fcntl
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+
+import numpy as np
+
+from advisor_engine import PROGRAM, QUESTION_KEYS, RISK_LEVELS
+
+FORMAT_VERSION = 1
+MAGIC = b"DTASHM01"
+ALIGN = 64
+PATH_ENV = "DTA_SHARED_TABLES"
+DEFAULT_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else \
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# answer_space() fields, in its return order
+SPACE_FIELDS = ("score", "tier", "risk", "category_scores")
+
+
+def default_path(fingerprint=None):
+    """Table file path; None when DTA_SHARED_TABLES is set to an empty value."""
+    if PATH_ENV in os.environ:
+        return os.environ[PATH_ENV] or None
+    fingerprint = fingerprint or PROGRAM.version
+    return os.path.join(DEFAULT_DIR, f"dta-tables-{fingerprint[:12]}.bin")
+
+
+def _arrays():
+    """The published arrays, built from the engine: {name: ndarray}."""
+    from batch_engine import evaluate_masks
+    space = evaluate_masks(np.arange(1 << len(QUESTION_KEYS), dtype=np.int32))
+    arrays = dict(zip(SPACE_FIELDS, space))
+    tier, risk = arrays["tier"], arrays["risk"]
+    arrays["outcome"] = ((tier.astype(np.uint8) - 1) * len(RISK_LEVELS) + risk).astype(np.uint8)
+    return arrays
+
+
+def publish(path=None):
+    """Build the tables and write them to path (atomic replace). Returns the path."""
+    path = path or default_path()
+    arrays = _arrays()
+    directory, offset = {}, 0
+    for name, a in arrays.items():
+        offset += -offset % ALIGN
+        directory[name] = [a.dtype.str, list(a.shape), offset]
+        offset += a.nbytes
+    header = {"format": FORMAT_VERSION, "engine": PROGRAM.version,
+              "questions": list(QUESTION_KEYS), "arrays": directory}
+    blob = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(blob)) + blob
+    prefix += b"\0" * (-len(prefix) % ALIGN)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(prefix)
+        for name, a in arrays.items():
+            fh.write(b"\0" * (len(prefix) + directory[name][2] - fh.tell()))
+            fh.write(np.ascontiguousarray(a).tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+class SharedTables:
+    """Read-only mapping of a published table file; arrays are zero-copy views."""
+
+    def __init__(self, path, expected_engine=None):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._mm[:8] != MAGIC:
+                raise ValueError(f"{path} is not a shared table file")
+            (hlen,) = struct.unpack_from("<I", self._mm, 8)
+            self.header = json.loads(self._mm[12:12 + hlen])
+            if self.header["format"] != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported format {self.header['format']}")
+            if expected_engine and self.header["engine"] != expected_engine:
+                raise ValueError(f"{path} was generated from a different rule engine version")
+            if self.header["questions"] != list(QUESTION_KEYS):
+                raise ValueError(f"{path} was generated for a different question set")
+            base = 12 + hlen + (-(12 + hlen) % ALIGN)
+            self.arrays = {
+                name: np.frombuffer(self._mm, dtype=np.dtype(dtype), count=int(np.prod(shape)),
+                                    offset=base + offset).reshape(shape)
+                for name, (dtype, shape, offset) in self.header["arrays"].items()}
+        except BaseException:
+            self._mm.close()
+            raise
+
+    @property
+    def version(self):
+        return self.header["engine"]
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def answer_space(self):
+        """(score, tier, risk_code, category_scores), as batch_engine.answer_space() returns."""
+        return tuple(self.arrays[name] for name in SPACE_FIELDS)
+
+
+def attach(path=None, build=True):
+    """
+    Map the tables for this engine version, publishing them first (under a
+    file lock, once per host) when missing or stale unless build is False.
+    """
+    path = path or default_path()
+    try:
+        return SharedTables(path, expected_engine=PROGRAM.version)
+    except (FileNotFoundError, ValueError):
+        if not build:
+            raise
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:                                    # another process may have published while we waited
+            return SharedTables(path, expected_engine=PROGRAM.version)
+        except (FileNotFoundError, ValueError):
+            publish(path)
+    return SharedTables(path, expected_engine=PROGRAM.version)
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def get_tables():
+    """Process-wide SharedTables, or None when sharing is off or the file cannot be used."""
+    global _tables
+    if _tables is None:
+        with _tables_lock:
+            if _tables is None:
+                path = default_path()
+                if not path:
+                    _tables = False
+                else:
+                    try:
+                        _tables = attach(path)
+                    except (OSError, ValueError) as exc:
+                        print(f"shared_tables: using per-process tables: {exc}", file=sys.stderr)
+                        _tables = False
+    return _tables or None
+
+
+# ─────────────────────────────────────────────
+#  SHARING CHECK
+# ─────────────────────────────────────────────
+
+def _mappings(path):
+    """/proc/self/smaps entries for path: [{field: kB}]."""
+    real, found, current = os.path.realpath(path), [], None
+    with open("/proc/self/smaps") as fh:
+        for line in fh:
+            parts = line.split()
+            if "-" in parts[0] and len(parts) >= 5 and not parts[0].endswith(":"):
+                current = {} if parts[-1] == real else None
+                if current is not None:
+                    found.append(current)
+            elif current is not None and parts[0].endswith(":") and len(parts) == 3:
+                current[parts[0][:-1]] = int(parts[1])
+    return found
+
+
+def _private_kb():
+    """Memory only this process holds (USS): private clean + dirty pages."""
+    with open("/proc/self/smaps_rollup") as fh:
+        return sum(int(line.split()[1]) for line in fh if line.startswith(("Private_Clean:", "Private_Dirty:")))
+
+
+def _worker(path, ready, go, out):
+    """Attach through batch_engine.answer_space() as the app does, touch every page, report."""
+    os.environ[PATH_ENV] = path
+    import adaptive
+    import batch_engine
+    before = _private_kb()
+    checksum = sum(int(a.sum()) for a in batch_engine.answer_space()) + int(adaptive._outcome_table().sum())
+    ready.set()
+    go.wait()                                   # every worker holds its mapping before anyone measures
+    st = os.stat(path) if path else None
+    out.put({"pid": os.getpid(), "inode": st and (st.st_dev, st.st_ino), "checksum": checksum,
+             "private_growth_kb": _private_kb() - before, "mappings": _mappings(path) if path else []})
+
+
+def check(workers, path=None):
+    """Spawn workers that attach to the tables; list of problems found (empty when sharing works)."""
+    path = path or default_path() or os.path.join(DEFAULT_DIR, "dta-tables-check.bin")
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for label, shared in (("shared", path), ("per-process", "")):
+        out, go = ctx.Queue(), ctx.Event()
+        ready = [ctx.Event() for _ in range(workers)]
+        procs = [ctx.Process(target=_worker, args=(shared, r, go, out)) for r in ready]
+        for p in procs:
+            p.start()
+        for r in ready:
+            r.wait()
+        go.set()
+        results[label] = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    size_kb = os.path.getsize(path) / 1024
+    problems = []
+    rows = results["shared"]
+    for r in rows:
+        print(f"  worker {r['pid']}: {len(r['mappings'])} mapping(s), "
+              + ", ".join(f"{k} {sum(m.get(k, 0) for m in r['mappings']):,} kB"
+                          for k in ("Rss", "Pss", "Private_Clean", "Private_Dirty"))
+              + f"; private memory +{r['private_growth_kb']:,} kB")
+        if len(r["mappings"]) != 1:
+            problems.append(f"worker {r['pid']} maps the table {len(r['mappings'])} times")
+        if any(m.get("Private_Clean", 0) + m.get("Private_Dirty", 0) for m in r["mappings"]):
+            problems.append(f"worker {r['pid']} holds private pages of the table")
+    if len({r["inode"] for r in rows}) != 1:
+        problems.append("workers mapped different table files")
+    if len({r["checksum"] for r in rows + results["per-process"]}) != 1:
+        problems.append("shared tables differ from the per-process tables")
+    pss = sum(m.get("Pss", 0) for r in rows for m in r["mappings"])
+    print(f"table {size_kb:,.0f} kB; summed Pss over {workers} workers {pss:,} kB "
+          f"(one copy = {size_kb:,.0f} kB, {workers} copies = {workers * size_kb:,.0f} kB)")
+    for label, rs in results.items():
+        growth = sorted(r["private_growth_kb"] for r in rs)
+        print(f"private memory per worker, {label:11s}: median +{growth[len(growth) // 2]:,} kB")
+    if not 0.5 * size_kb <= pss <= 1.5 * size_kb:
+        problems.append(f"summed Pss {pss:,} kB is not one copy of the {size_kb:,.0f} kB table")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish, inspect or check the shared engine tables.")
+    parser.add_argument("command", choices=["build", "info", "check"])
+    parser.add_argument("--path", help=f"table file (default: ${PATH_ENV} or {DEFAULT_DIR}/)")
+    parser.add_argument("--workers", type=int, default=4, help="processes to spawn for check")
+    args = parser.parse_args(argv)
+
+    path = args.path or default_path()
+    if args.command == "build":
+        print(f"Wrote {publish(path)}")
+        return 0
+    if args.command == "check":
+        if not os.path.exists("/proc/self/smaps_rollup"):
+            print("check needs /proc/self/smaps_rollup (Linux)", file=sys.stderr)
+            return 2
+        problems = check(args.workers, path)
+        for p in problems:
+            print(f"FAIL: {p}", file=sys.stderr)
+        return 1 if problems else 0
+    tables = SharedTables(path)
+    stale = tables.version != PROGRAM.version
+    print(f"path:            {tables.path}")
+    print(f"engine version:  {tables.version[:12]}{'  (STALE)' if stale else ''}")
+    for name, a in tables.arrays.items():
+        print(f"{name + ':':16s} {a.dtype} {a.shape}  {a.nbytes:,} bytes")
+    return 1 if stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
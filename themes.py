@@ -0,0 +1,232 @@
+# themes.py
+# Colour themes and stylesheets for the Digital Transformation Advisor UI and charts
+#
+# Usage:  python themes.py      (pre-build static/theme-*.css, e.g. for a read-only deployment)
+
+import argparse
+import functools
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+
+DARK = {
+    "app_bg":          "linear-gradient(135deg,#0f0c29 0%,#1a1a3e 50%,#0f0c29 100%)",
+    "hero_bg":         "linear-gradient(135deg,#1e3a5f 0%,#0d2137 100%)",
+    "hero_border":     "#2e6da4","hero_title":"#e8f4fd","hero_sub":"#7fb3d3",
+    "section_hdr":     "#e8f4fd","profile_bg":"rgba(30,58,95,0.45)",
+    "profile_border":  "rgba(46,134,193,0.3)","profile_label":"#7fb3d3",
+    "metric_bg":       "rgba(30,58,95,0.6)","metric_border":"rgba(46,134,193,0.3)",
+    "metric_label":    "#7fb3d3","metric_value":"#c4a35a",
+    "q_text":          "#d4e6f5","cat_label":"#c4a35a","divider":"rgba(46,134,193,0.2)",
+    "risk_bg":         "rgba(46,134,193,0.07)","risk_border":"rgba(46,134,193,0.18)","risk_txt":"#aed6f1",
+    "gap_bg":          "rgba(139,35,35,0.12)","gap_border":"#8b2323","gap_txt":"#f0c4bf",
+    "crit_bg":         "rgba(139,35,35,0.12)","crit_brd":"#8b2323","crit_txt":"#f0c4bf",
+    "imp_bg":          "rgba(139,105,20,0.12)","imp_brd":"#8b6914","imp_txt":"#f5dca3",
+    "opt_bg":          "rgba(26,107,69,0.12)","opt_brd":"#1a6b45","opt_txt":"#a9dfbf",
+    "rule_bg":         "rgba(30,58,95,0.25)","rule_border":"rgba(46,134,193,0.15)",
+    "rule_txt":        "#aed6f1","rule_id":"#c4a35a",
+    "box_bg":          "rgba(30,58,95,0.3)","box_border":"rgba(46,134,193,0.2)","box_txt":"#aed6f1",
+    "flag_txt":        "#f0c4bf","footer_txt":"#4a6fa5","footer_border":"rgba(46,134,193,0.15)",
+    "sel_bg":          "rgba(30,58,95,0.7)","sel_border":"rgba(46,134,193,0.4)","sel_txt":"#e8f4fd",
+    "lbl":             "#aed6f1","prio":"#7fb3d3",
+    "chart_bg":        "#0d1b2a","chart_txt":"#d4e6f5","chart_grid":"#1e3a5f",
+    "marker":          "white","sub_txt":"#7fb3d3","amber_txt":"#c4a35a",
+}
+
+LIGHT = {
+    "app_bg":          "#f0f4f8",
+    "hero_bg":         "linear-gradient(135deg,#1e3a5f 0%,#154360 100%)",
+    "hero_border":     "#1a6b9a","hero_title":"#ffffff","hero_sub":"#aed6f1",
+    "section_hdr":     "#0d2137","profile_bg":"#ffffff",
+    "profile_border":  "#b0cfe8","profile_label":"#1a4a7a",
+    "metric_bg":       "#ffffff","metric_border":"#b0cfe8",
+    "metric_label":    "#1a4a7a","metric_value":"#8b6914",
+    "q_text":          "#1a2a3a","cat_label":"#8b5000","divider":"#b0cfe8",
+    "risk_bg":         "#eaf4fb","risk_border":"#7fb3d3","risk_txt":"#1a3a5a",
+    "gap_bg":          "#fdecea","gap_border":"#c0392b","gap_txt":"#7b1a1a",
+    "crit_bg":         "#fdecea","crit_brd":"#c0392b","crit_txt":"#7b1a1a",
+    "imp_bg":          "#fef9e7","imp_brd":"#d4a017","imp_txt":"#5a3a00",
+    "opt_bg":          "#eafaf1","opt_brd":"#1a6b45","opt_txt":"#0b4a2a",
+    "rule_bg":         "#f0f7ff","rule_border":"#b0cfe8",
+    "rule_txt":        "#1a2a3a","rule_id":"#8b5000",
+    "box_bg":          "#eaf4fb","box_border":"#7fb3d3","box_txt":"#1a3a5a",
+    "flag_txt":        "#7b1a1a","footer_txt":"#1a4a7a","footer_border":"#b0cfe8",
+    "sel_bg":          "#ffffff","sel_border":"#7fb3d3","sel_txt":"#1a2a3a",
+    "lbl":             "#1a2a3a","prio":"#1a4a7a",
+    "chart_bg":        "#ffffff","chart_txt":"#1a2a3a","chart_grid":"#c8dff0",
+    "marker":          "#1a2a3a","sub_txt":"#1a4a7a","amber_txt":"#b35a00",
+}
+
+THEMES = {"dark": DARK, "light": LIGHT}
+
+
+# ─────────────────────────────────────────────
+#  STYLESHEETS
+# ─────────────────────────────────────────────
+# One stylesheet per theme, formatted and minified once per process. It is
+# written to static/ under a content-hashed name and linked from the page,
+# so a rerun sends a one-line <link> rather than ~7 KB of CSS. The browser
+# fetches each theme once and revalidates it by ETag. Streamlit serves the
+# directory at app/static/ when server.enableStaticServing is on (see
+# .streamlit/config.toml).
+#
+# Fonts are never fetched from a CDN and none are shipped: the text uses the
+# Source Sans / Source Code Pro faces bundled with Streamlit, then system fonts.
+
+STATIC_DIR = Path(__file__).with_name("static")
+STATIC_URL = "app/static"
+
+SANS = "'Source Sans',system-ui,-apple-system,'Segoe UI',Roboto,sans-serif"
+MONO = "'Source Code Pro',ui-monospace,SFMono-Regular,Menlo,Consolas,monospace"
+
+_STYLESHEET = """\
+* {{ font-family:{sans} !important; }}
+code,pre {{ font-family:{mono} !important; }}
+@keyframes fadeSlideIn {{ from{{opacity:0;transform:translateY(22px)}} to{{opacity:1;transform:translateY(0)}} }}
+@keyframes heroGlow {{ 0%,100%{{box-shadow:0 8px 32px rgba(46,110,164,.25)}} 50%{{box-shadow:0 8px 56px rgba(46,110,164,.5)}} }}
+@keyframes pulseAccent {{ 0%,100%{{border-left-color:#2e86c1}} 50%{{border-left-color:#8b6914}} }}
+@keyframes slideInLeft {{ from{{opacity:0;transform:translateX(-28px)}} to{{opacity:1;transform:translateX(0)}} }}
+@keyframes shimmerBtn {{ 0%{{background-position:0% 50%}} 50%{{background-position:100% 50%}} 100%{{background-position:0% 50%}} }}
+@keyframes countUp {{ from{{opacity:0;transform:scale(.75)}} to{{opacity:1;transform:scale(1)}} }}
+@keyframes fadeIn {{ from{{opacity:0}} to{{opacity:1}} }}
+
+.stApp {{ background:{app_bg} !important; min-height:100vh; }}
+.block-container {{ padding:2.5rem 3rem 3rem !important; max-width:1200px !important; }}
+
+.hero-box {{ background:{hero_bg}; border:1px solid {hero_border}; border-radius:16px;
+    padding:2.8rem 3rem; margin-top:0.5rem; margin-bottom:2rem; text-align:center;
+    animation:heroGlow 4s ease-in-out infinite,fadeSlideIn .7s ease both; }}
+.hero-title {{ font-size:2.5rem; font-weight:700; color:{hero_title}; margin:0 0 .6rem; letter-spacing:-.5px; }}
+.hero-sub   {{ font-size:1.15rem; color:{hero_sub}; margin:0; font-weight:400; }}
+
+.section-header {{ font-size:1.35rem; font-weight:600; color:{section_hdr};
+    border-left:4px solid #2e86c1; padding-left:.8rem; margin:1.6rem 0 1rem;
+    animation:pulseAccent 3s ease-in-out infinite,slideInLeft .5s ease both; }}
+
+.profile-section {{ background:{profile_bg}; border:1px solid {profile_border};
+    border-radius:14px; padding:1.6rem 1.6rem .6rem; margin-bottom:1.8rem; }}
+.profile-section-label {{ font-size:.82rem; font-weight:600; color:{profile_label};
+    text-transform:uppercase; letter-spacing:1.5px; margin-bottom:1rem; }}
+
+.metric-row {{ display:flex; gap:1rem; margin:1.5rem 0; }}
+.metric-card {{ flex:1; background:{metric_bg}; border:1px solid {metric_border};
+    border-radius:12px; padding:1.3rem 1.5rem; text-align:center;
+    animation:fadeSlideIn .6s ease both; transition:transform .2s,box-shadow .2s; }}
+.metric-card:hover {{ transform:translateY(-4px); box-shadow:0 10px 28px rgba(46,134,193,.22); }}
+.metric-value {{ font-size:2.3rem; font-weight:700; color:{metric_value};
+    font-family:{mono} !important; animation:countUp .9s cubic-bezier(.34,1.56,.64,1) both; }}
+.metric-label {{ font-size:.88rem; color:{metric_label}; text-transform:uppercase; letter-spacing:1px; margin-top:.3rem; }}
+
+.q-text   {{ color:{q_text}; font-size:1.05rem; padding-top:.45rem; line-height:1.5; }}
+.cat-label {{ font-size:.82rem; font-weight:600; text-transform:uppercase; letter-spacing:2px;
+    color:{cat_label}; margin:1.4rem 0 .6rem; }}
+.divider {{ border:none; border-top:1px solid {divider}; margin:1.5rem 0; }}
+
+.rec-critical {{ background:{crit_bg}; border-left:4px solid {crit_brd}; border-radius:0 8px 8px 0;
+    padding:.9rem 1.1rem; margin:.45rem 0; color:{crit_txt}; font-size:1rem;
+    animation:slideInLeft .4s ease both; transition:transform .2s; }}
+.rec-critical:hover {{ transform:translateX(4px); }}
+.rec-important {{ background:{imp_bg}; border-left:4px solid {imp_brd}; border-radius:0 8px 8px 0;
+    padding:.9rem 1.1rem; margin:.45rem 0; color:{imp_txt}; font-size:1rem;
+    animation:slideInLeft .4s ease .05s both; transition:transform .2s; }}
+.rec-important:hover {{ transform:translateX(4px); }}
+.rec-optional {{ background:{opt_bg}; border-left:4px solid {opt_brd}; border-radius:0 8px 8px 0;
+    padding:.9rem 1.1rem; margin:.45rem 0; color:{opt_txt}; font-size:1rem;
+    animation:slideInLeft .4s ease .1s both; transition:transform .2s; }}
+.rec-optional:hover {{ transform:translateX(4px); }}
+
+.rule-item {{ background:{rule_bg}; border:1px solid {rule_border}; border-radius:8px;
+    padding:.65rem 1rem; margin:.38rem 0; font-size:.95rem; color:{rule_txt};
+    animation:fadeIn .3s ease both; transition:background .2s; }}
+.rule-id {{ font-family:{mono}; color:{rule_id}; font-weight:600;
+    margin-right:.5rem; font-size:.92rem; }}
+
+div[data-testid="stSelectbox"]>div>div {{
+    background:{sel_bg} !important; border:1px solid {sel_border} !important;
+    border-radius:8px !important; color:{sel_txt} !important; font-size:1rem !important; }}
+div[data-testid="stButton"]>button {{
+    background:linear-gradient(270deg,#8b2323,#8b6914,#1a6b45,#8b6914,#8b2323);
+    background-size:400% 400%; color:white; border:none; border-radius:10px;
+    padding:.7rem 2.5rem; font-size:1.05rem; font-weight:600; width:100%;
+    animation:shimmerBtn 5s ease infinite; transition:transform .2s,box-shadow .2s; }}
+div[data-testid="stButton"]>button:hover {{
+    transform:translateY(-2px); box-shadow:0 8px 28px rgba(139,105,20,.45); }}
+
+div[data-testid="stDownloadButton"]>button {{
+    background:linear-gradient(135deg,#1a6b45 0%,#0d3d26 100%);
+    color:white; border:1px solid #1a6b45; border-radius:10px;
+    padding:.65rem 2rem; font-size:1rem; font-weight:600; width:100%; transition:all .2s; }}
+div[data-testid="stDownloadButton"]>button:hover {{
+    background:linear-gradient(135deg,#27ae60,#1a6b45); box-shadow:0 6px 20px rgba(26,107,69,.4); }}
+
+label {{ color:{lbl} !important; font-size:1rem !important; }}
+/* theme toggle (drawn last, so it restyles every st.button as a pill) */
+div[data-testid="stButton"] > button {{
+    background: rgba(30,58,95,0.5) !important;
+    color: #e8f4fd !important;
+    border: 1px solid rgba(46,134,193,0.5) !important;
+    border-radius: 20px !important;
+    padding: 0.3rem 0.9rem !important;
+    font-size: 0.82rem !important;
+    font-weight: 600 !important;
+    width: auto !important;
+    min-width: unset !important;
+    animation: none !important;
+    letter-spacing: 0.3px !important;
+    transition: all 0.2s !important;
+}}
+div[data-testid="stButton"] > button:hover {{
+    background: rgba(46,134,193,0.3) !important;
+    transform: none !important;
+    box-shadow: 0 2px 8px rgba(46,134,193,0.3) !important;
+}}
+"""
+
+
+def _minify(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r" ?([{}:;,>]) ?", r"\1", css)
+    return css.replace(" !important", "!important").replace(";}", "}").strip()
+
+
+@functools.lru_cache(maxsize=None)
+def stylesheet(name):
+    """Minified CSS for theme `name` ("dark" or "light")."""
+    return _minify(_STYLESHEET.format(sans=SANS, mono=MONO, **THEMES[name]))
+
+
+@functools.lru_cache(maxsize=None)
+def stylesheet_url(name):
+    """
+    app/static URL of theme `name`'s stylesheet, writing the file on first use.
+    None if static/ is not writable; the caller then inlines stylesheet(name).
+    """
+    css = stylesheet(name)
+    file = STATIC_DIR / f"theme-{name}-{hashlib.sha1(css.encode()).hexdigest()[:10]}.css"
+    if not file.exists():
+        try:
+            STATIC_DIR.mkdir(exist_ok=True)
+            tmp = file.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(css, encoding="utf-8")
+            os.replace(tmp, file)
+        except OSError:
+            return None
+    return f"{STATIC_URL}/{file.name}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the per-theme stylesheets to static/ (e.g. at image build time).")
+    parser.parse_args(argv)
+    for name in THEMES:
+        url = stylesheet_url(name)
+        if url is None:
+            raise SystemExit(f"themes: cannot write to {STATIC_DIR}")
+        print(f"{name:6s} {url}  {len(stylesheet(name).encode()):,} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
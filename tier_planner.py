@@ -0,0 +1,124 @@
+# tier_planner.py
+# Shortest path to the next maturity tier
+#
+# Finds the smallest (or, given per-capability costs, the cheapest) sets of
+# No → Yes answer changes that lift an assessment to a target score or tier.
+# Compound rules (e.g. cloud + security, or training + collaboration + leadership)
+# make the answer obvious only for simple cases, so the planner searches the
+# answer lattice exhaustively instead of greedily.
+#
+# The reachable answers are the supersets of the current mask, at most
+# 2^19 of them. Their scores come from one precomputed array over the whole
+# answer space (batch_engine, ~60 ms once per process). For a query the
+# superset masks and their costs are built by doubling, one missing answer at
+# a time, and scored with a single gather. Feasible sets that stay feasible
+# with any change removed are dropped; each missing answer is one strided
+# pass over a reshaped view. What remains are the minimal flip sets, ranked by
+# cost and then by resulting score. Worst case (every answer No) is ~20 ms.
+#
+# Usage:  python tier_planner.py [--yes cloud,crm,...] [--tier 3 | --score 80] [--alternatives 5]
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from advisor_engine import QUESTION_KEYS, encode_answers, maturity_level
+from knowledge_base import MATURITY_LEVELS
+
+# flips: question keys to change to Yes (QUESTION_KEYS order)
+Plan = namedtuple("Plan", "flips cost score tier")
+
+TIER_THRESHOLDS = {tier: threshold for threshold, _, _, tier in MATURITY_LEVELS}
+
+def score_table():
+    """int16 score of every answer mask (batch_engine.answer_space, computed once per process)."""
+    from batch_engine import answer_space
+    return answer_space()[0]
+
+
+def _cost_vector(costs):
+    """costs: None (count flips), {key: cost} or a sequence in QUESTION_KEYS order."""
+    if costs is None:
+        return [1.0] * len(QUESTION_KEYS)
+    if isinstance(costs, dict):
+        return [float(costs[k]) for k in QUESTION_KEYS]
+    return [float(c) for c in costs]
+
+
+def supersets(mask, bits, cost_of):
+    """
+    Every mask reachable by setting any of bits, with the summed cost_of[bit] of the
+    bits set. Bit j of an array position says whether bits[j] was set.
+    """
+    masks = np.empty(1 << len(bits), dtype=np.int32)
+    cost = np.empty(masks.shape[0], dtype=np.float64)
+    masks[0], cost[0], size = mask, 0.0, 1
+    for b in bits:
+        np.bitwise_or(masks[:size], 1 << b, out=masks[size:2 * size])
+        np.add(cost[:size], cost_of[b], out=cost[size:2 * size])
+        size *= 2
+    return masks, cost
+
+
+def plan(mask, target_score=None, target_tier=None, costs=None, alternatives=5):
+    """
+    Minimal sets of No → Yes changes reaching target_score (or the threshold of
+    target_tier; default: the next tier above the current one), cheapest first.
+    Returns a list of Plan; empty when the target cannot be reached, and a single
+    Plan with no flips when the assessment already meets it.
+    """
+    scores = score_table()
+    if target_score is None:
+        if target_tier is None:
+            target_tier = min(maturity_level(int(scores[mask]))[2] + 1, max(TIER_THRESHOLDS))
+        target_score = TIER_THRESHOLDS[target_tier]
+    missing = [b for b in range(len(QUESTION_KEYS)) if not mask >> b & 1]
+    masks, cost = supersets(mask, missing, _cost_vector(costs))
+    reached = scores[masks]
+    feasible = reached >= target_score
+
+    # keep a feasible set only if removing any one of its flips makes it infeasible
+    minimal = feasible.copy()
+    for j in range(len(missing)):
+        minimal.reshape(-1, 2, 1 << j)[:, 1, :] &= ~feasible.reshape(-1, 2, 1 << j)[:, 0, :]
+    found = np.flatnonzero(minimal)
+    ranked = found[np.lexsort((-reached[found], cost[found]))[:alternatives]]
+
+    plans = []
+    for i in ranked:
+        flipped = int(masks[i]) ^ mask
+        score = int(reached[i])
+        plans.append(Plan(tuple(k for b, k in enumerate(QUESTION_KEYS) if flipped >> b & 1),
+                          float(cost[i]), score, maturity_level(score)[2]))
+    return plans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the smallest answer changes that reach a maturity tier.")
+    parser.add_argument("--yes", default="", help="comma-separated question keys currently answered Yes")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--tier", type=int, choices=sorted(TIER_THRESHOLDS))
+    target.add_argument("--score", type=int)
+    parser.add_argument("--alternatives", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    yes = {k for k in args.yes.split(",") if k}
+    unknown = yes - set(QUESTION_KEYS)
+    if unknown:
+        parser.error(f"unknown question keys: {', '.join(sorted(unknown))}")
+    mask = encode_answers({k: 1 for k in yes})
+    score_table()
+    t = time.perf_counter()
+    plans = plan(mask, args.score, args.tier, alternatives=args.alternatives)
+    elapsed = (time.perf_counter() - t) * 1000
+    print(f"current score {score_table()[mask]} — {len(plans)} plan(s) in {elapsed:.1f} ms")
+    for p in plans:
+        print(f"  {len(p.flips):2d} change(s) -> score {p.score:3d} (tier {p.tier}): {', '.join(p.flips) or '-'}")
+    return 0 if plans else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# uncertainty.py
+# Probabilistic answers for the Digital Transformation Advisor
+#
+# Each question can carry a probability that it holds instead of a hard
+# Yes/No (UNSURE = 0.5). Answers are treated as independent, and the result is
+# the full distribution of score, maturity tier, risk level and category
+# scores, summarised as means, central CONFIDENCE intervals and tier/risk
+# probabilities.
+#
+#   exact     Closed form. The score, the category scores and the Critical
+#             recommendation count are sums of per-block contributions. A rule
+#             block only reads its own answer bits, and each recommendation
+#             belongs to one rule. With the answers that several blocks read
+#             held fixed, the blocks are independent, so each distribution
+#             is the convolution of the per-block distributions. Every
+#             assignment of the uncertain shared answers (one here: the two
+#             compiled blocks overlap on one bit) adds a weighted term.
+#             This takes about a millisecond.
+#   simulate  Monte Carlo through the engine's block tables
+#             (batch_engine.BLOCK_TABLES). Masks are sampled one uncertain bit
+#             at a time, in cache-sized chunks. Each block's outcome is packed
+#             into 8-bit lanes of an int64 (score, critical count, six
+#             categories), so every sample costs one gather and one add per
+#             block, then one bincount per lane. 10^6 samples take ~0.2 s
+#             on one core.
+#
+# distribution() uses the closed form unless more than EXACT_SHARED_LIMIT
+# uncertain answers are shared between blocks. Results are cached per
+# probability vector.
+#
+# Usage:  python uncertainty.py [--yes cloud,crm] [--unsure governance,backup[=0.7]] [--samples N]
+
+import argparse
+import functools
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from advisor_engine import CATEGORIES, PROGRAM, QUESTION_KEYS, RISK_LEVELS, maturity_level, risk_band
+from batch_engine import BLOCK_TABLES, block_index
+
+UNSURE = 0.5
+CONFIDENCE = 0.90
+DEFAULT_SAMPLES = 1_000_000
+EXACT_SHARED_LIMIT = 12
+CHUNK = 1 << 14
+
+# score_pmf: P(score = s) for s in 0..max_score; interval: central CONFIDENCE interval of the score
+# tiers: {tier: probability}; risks: {RISK_LEVELS name: probability}; categories: {category: (mean, low, high)}
+Uncertainty = namedtuple("Uncertainty", "method samples score_pmf mean interval tiers risks categories")
+
+_LANE = 8
+_MAX_CRITICAL = bin(PROGRAM.critical_mask).count("1")
+_SIZES = [PROGRAM.max_score + 1, _MAX_CRITICAL + 1] + [PROGRAM.category_max[c] + 1 for c in CATEGORIES]
+# per block: (block, lanes[local index, quantity]) with quantities in _SIZES order
+_QUANTITIES = [(block, np.column_stack([cat_lut.sum(axis=1), crit_lut, cat_lut]).astype(np.int64))
+               for block, cat_lut, crit_lut in BLOCK_TABLES]
+_PACKED = [(block, (q << (_LANE * np.arange(q.shape[1]))).sum(axis=1)) for block, q in _QUANTITIES]
+_TIER_OF = np.array([maturity_level(s)[2] for s in range(_SIZES[0])])
+_RISK_OF = np.array([RISK_LEVELS.index(risk_band(c)[0]) for c in range(_SIZES[1])])
+_SHARED = sorted({b for block in PROGRAM.blocks for b in block.bits
+                  if sum(b in other.bits for other in PROGRAM.blocks) > 1})
+
+
+def probabilities(answers):
+    """
+    Probability vector in QUESTION_KEYS order from {key: value}: 1/"Yes", 0/"No",
+    "Unsure", or a probability in [0, 1]. Missing keys count as No.
+    """
+    named = {"Yes": 1.0, "No": 0.0, "Unsure": UNSURE}
+    p = []
+    for key in QUESTION_KEYS:
+        value = answers.get(key, 0)
+        value = named[value] if isinstance(value, str) else float(value)
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f"{key}: probability {value} is outside [0, 1]")
+        p.append(value)
+    return tuple(p)
+
+
+def _quantile(pmf, q):
+    return int(np.searchsorted(np.cumsum(pmf), q - 1e-9))
+
+
+def _summarise(method, samples, pmfs):
+    """Uncertainty from normalised pmfs in _SIZES order."""
+    tail = (1 - CONFIDENCE) / 2
+    score_pmf, critical_pmf = pmfs[0], pmfs[1]
+    tiers = np.bincount(_TIER_OF, weights=score_pmf, minlength=4)
+    risks = np.bincount(_RISK_OF, weights=critical_pmf, minlength=len(RISK_LEVELS))
+    categories = {c: (float(pmf @ np.arange(len(pmf))), _quantile(pmf, tail), _quantile(pmf, 1 - tail))
+                  for c, pmf in zip(CATEGORIES, pmfs[2:])}
+    return Uncertainty(method, samples, score_pmf, float(score_pmf @ np.arange(len(score_pmf))),
+                       (_quantile(score_pmf, tail), _quantile(score_pmf, 1 - tail)),
+                       {t: float(tiers[t]) for t in (1, 2, 3)},
+                       {level: float(risks[i]) for i, level in enumerate(RISK_LEVELS)}, categories)
+
+
+def _local_weights(block, p):
+    """Probability of each local index of a block under independent answers p."""
+    w = np.ones(1 << len(block.bits))
+    for j, b in enumerate(block.bits):
+        halves = w.reshape(-1, 2, 1 << j)
+        halves[:, 0, :] *= 1 - p[b]
+        halves[:, 1, :] *= p[b]
+    return w
+
+
+def exact(p):
+    """Closed-form Uncertainty for probability vector p, or None if too many shared answers are uncertain."""
+    p = np.asarray(p, dtype=np.float64)
+    shared = [b for b in _SHARED if 0 < p[b] < 1]
+    if len(shared) > EXACT_SHARED_LIMIT:
+        return None
+    pmfs = [np.zeros(size) for size in _SIZES]
+    for assignment in range(1 << len(shared)):
+        fixed, weight = p.copy(), 1.0
+        for j, b in enumerate(shared):
+            fixed[b] = assignment >> j & 1
+            weight *= p[b] if fixed[b] else 1 - p[b]
+        terms = [np.ones(1) for _ in _SIZES]
+        for block, quantities in _QUANTITIES:
+            w = _local_weights(block, fixed)
+            for i in range(len(_SIZES)):
+                terms[i] = np.convolve(terms[i], np.bincount(quantities[:, i], weights=w))
+        for pmf, term in zip(pmfs, terms):
+            pmf[:len(term)] += weight * term[:len(pmf)]
+    return _summarise("exact", 0, pmfs)
+
+
+def sample_masks(p, n, rng):
+    """Yield chunks of answer masks drawn from independent answers with probabilities p."""
+    base = sum(1 << b for b, pb in enumerate(p) if pb >= 1)
+    uncertain = [(b, np.float32(pb)) for b, pb in enumerate(p) if 0 < pb < 1]
+    for start in range(0, n, CHUNK):
+        masks = np.full(min(CHUNK, n - start), base, dtype=np.int32)
+        for b, pb in uncertain:
+            masks |= (rng.random(masks.shape[0], dtype=np.float32) < pb).astype(np.int32) << b
+        yield masks
+
+
+def simulate(p, samples=DEFAULT_SAMPLES, seed=None):
+    """Monte Carlo Uncertainty for probability vector p from `samples` sampled assessments."""
+    counts = [np.zeros(size, dtype=np.int64) for size in _SIZES]
+    lane = (1 << _LANE) - 1
+    for masks in sample_masks(p, samples, np.random.default_rng(seed)):
+        packed = np.zeros(masks.shape[0], dtype=np.int64)
+        for block, table in _PACKED:
+            packed += table[block_index(block, masks)]
+        for i, size in enumerate(_SIZES):
+            counts[i] += np.bincount((packed >> (_LANE * i)) & lane, minlength=size)
+    return _summarise("monte carlo", samples, [c / samples for c in counts])
+
+
+@functools.lru_cache(maxsize=1024)
+def distribution(p, samples=DEFAULT_SAMPLES):
+    """Uncertainty for a probability tuple: closed form where possible, else simulate()."""
+    return exact(p) or simulate(p, samples, seed=6008)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score, tier and risk distribution for uncertain answers.")
+    parser.add_argument("--yes", default="", help="comma-separated question keys answered Yes")
+    parser.add_argument("--unsure", default="", help="comma-separated keys that are uncertain, optionally key=probability")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES)
+    args = parser.parse_args(argv)
+
+    answers = {k: 1 for k in args.yes.split(",") if k}
+    for item in filter(None, args.unsure.split(",")):
+        key, _, prob = item.partition("=")
+        answers[key] = float(prob) if prob else UNSURE
+    unknown = set(answers) - set(QUESTION_KEYS)
+    if unknown:
+        parser.error(f"unknown question keys: {', '.join(sorted(unknown))}")
+    p = probabilities(answers)
+
+    for name, run in (("exact", exact), ("monte carlo", lambda p: simulate(p, args.samples))):
+        t = time.perf_counter()
+        u = run(p)
+        elapsed = (time.perf_counter() - t) * 1000
+        if u is None:
+            print(f"{name}: not available (over {EXACT_SHARED_LIMIT} uncertain answers shared between blocks)")
+            continue
+        drawn = f"{u.samples:,} samples, " if u.samples else ""
+        print(f"{name} ({drawn}{elapsed:.1f} ms): score {u.mean:.1f}, "
+              f"{CONFIDENCE:.0%} interval {u.interval[0]}–{u.interval[1]}")
+        print("  tiers " + "  ".join(f"{t}: {v:.3f}" for t, v in u.tiers.items())
+              + "   risk " + "  ".join(f"{k}: {v:.3f}" for k, v in u.risks.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())